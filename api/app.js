@@ -123,6 +123,25 @@ app.get('/api/mundiales/:id', async (req, res) => {
   }
 });
 
+// Obtener todos los jugadores con su mundial y país (carga masiva)
+app.get('/api/jugadores', async (req, res) => {
+  try {
+    const [rows] = await pool.query(`
+      SELECT j.id, j.nombre, pos.nombre as posicion, pos.id as posicion_id, pos.abreviatura as posicion_abr,
+             j.titular, m.id as mundial_id, m.anio, p.nombre as pais
+      FROM jugadores j
+      JOIN mundiales m ON j.mundial_id = m.id
+      JOIN paises p ON m.pais_id = p.id
+      JOIN posiciones pos ON j.posicion_id = pos.id
+      ORDER BY m.anio DESC, j.titular DESC, j.posicion_id, j.nombre
+    `);
+    res.json(rows);
+  } catch (error) {
+    console.error('Error al obtener jugadores:', error);
+    res.status(500).json({ error: 'Error interno del servidor' });
+  }
+});
+
 // Búsqueda de jugadores
 app.get('/api/jugadores/buscar', async (req, res) => {
   try {
@@ -296,6 +315,88 @@ app.post('/api/jugadores', async (req, res) => {
   }
 });
 
+// Clave de un jugador con la misma comparación que la collation de la tabla
+// (utf8mb4_spanish_ci: sin mayúsculas, tildes ni espacios finales; la ñ es una letra aparte)
+function claveJugador(nombre, mundialId) {
+  const base = String(nombre)
+    .trimEnd()
+    .toLowerCase()
+    .normalize('NFD')
+    .replace(/n\u0303/g, 'ñ')
+    .replace(/[\u0300-\u036f]/g, '');
+  return `${base}|${Number(mundialId)}`;
+}
+
+// Crear varios jugadores a la vez (un INSERT y una transacción por lote)
+app.post('/api/jugadores/lote', async (req, res) => {
+  const { jugadores } = req.body;
+
+  if (!Array.isArray(jugadores) || jugadores.length === 0) {
+    return res.status(400).json({ error: 'La lista de jugadores es obligatoria' });
+  }
+  if (jugadores.some(j => !j.nombre || !j.mundial_id || !j.posicion_id)) {
+    return res.status(400).json({ error: 'El nombre, mundial y posición son obligatorios' });
+  }
+
+  const connection = await pool.getConnection();
+  try {
+    await connection.beginTransaction();
+
+    // Los que ya existen (mismo nombre y mundial) no se vuelven a insertar
+    const mundialIds = [...new Set(jugadores.map(j => j.mundial_id))];
+    const [existingRows] = await connection.query(
+      'SELECT id, nombre, mundial_id FROM jugadores WHERE mundial_id IN (?)',
+      [mundialIds]
+    );
+    const existentes = new Set(existingRows.map(j => j.id));
+    const vistos = new Set(existingRows.map(j => claveJugador(j.nombre, j.mundial_id)));
+
+    const nuevos = [];
+    for (const j of jugadores) {
+      const clave = claveJugador(j.nombre, j.mundial_id);
+      if (!vistos.has(clave)) {
+        vistos.add(clave);
+        nuevos.push(j);
+      }
+    }
+
+    if (nuevos.length > 0) {
+      await connection.query(
+        'INSERT INTO jugadores (nombre, mundial_id, posicion_id, titular) VALUES ?',
+        [nuevos.map(j => [j.nombre, j.mundial_id, j.posicion_id, j.titular ? 1 : 0])]
+      );
+    }
+
+    // Los ids se leen de la tabla: con innodb_autoinc_lock_mode=2 las filas de
+    // un INSERT múltiple no tienen por qué recibir ids consecutivos
+    const [jugadorRows] = await connection.query(`
+      SELECT j.id, j.nombre, pos.nombre as posicion, pos.id as posicion_id,
+             p.nombre as pais, m.anio, j.titular, m.id as mundial_id
+      FROM jugadores j
+      JOIN mundiales m ON j.mundial_id = m.id
+      JOIN paises p ON m.pais_id = p.id
+      JOIN posiciones pos ON j.posicion_id = pos.id
+      WHERE (j.nombre, j.mundial_id) IN (?)
+    `, [jugadores.map(j => [j.nombre, j.mundial_id])]);
+
+    await connection.commit();
+
+    const porClave = new Map(jugadorRows.map(j => [claveJugador(j.nombre, j.mundial_id), j]));
+
+    // En el mismo orden que la petición; "nuevo" indica si lo ha creado este lote
+    res.json(jugadores.map(j => {
+      const jugador = porClave.get(claveJugador(j.nombre, j.mundial_id));
+      return jugador ? { ...jugador, nuevo: !existentes.has(jugador.id) } : null;
+    }));
+  } catch (error) {
+    await connection.rollback();
+    console.error('Error al crear jugadores:', error);
+    res.status(500).json({ error: 'Error interno del servidor' });
+  } finally {
+    connection.release();
+  }
+});
+
 // Inicializar la aplicación
 async function startServer() {
   await initializeConnectionPool();
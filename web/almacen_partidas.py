@@ -0,0 +1,201 @@
+import copy
+import os
+import pickle
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+class AlmacenPartidas:
+    """
+    Almacén en memoria del estado de las partidas del Akinator, indexado por
+    un identificador de partida.
+
+    La cookie de sesión solo guarda el identificador; el estado (candidatos
+    que quedan, preguntas hechas, intentos...) vive en el servidor. Las
+    partidas caducan tras `ttl` segundos sin actividad y, si se supera
+    `max_partidas`, se descartan las menos recientes.
+
+    Las partidas viven en la memoria del proceso: solo sirve con un único
+    proceso de la aplicación (un worker, o balanceo con sesiones fijas). Con
+    varios workers, cada uno tendría sus propias partidas y una respuesta
+    atendida por otro worker no encontraría la suya; para eso está
+    AlmacenPartidasSQLite (AKINATOR_ALMACEN=sqlite).
+    """
+
+    def __init__(self, ttl: int = 3600, max_partidas: int = 10000):
+        self.ttl = ttl
+        self.max_partidas = max_partidas
+        self._partidas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def crear(self, estado: Dict) -> str:
+        """
+        Guarda el estado de una partida nueva y devuelve su identificador
+        """
+        partida_id = secrets.token_urlsafe(16)
+        self.guardar(partida_id, estado)
+        return partida_id
+
+    def guardar(self, partida_id: str, estado: Dict):
+        """
+        Guarda (o reemplaza) el estado de una partida
+        """
+        with self._lock:
+            self._partidas[partida_id] = (time.monotonic(), copy.deepcopy(estado))
+            self._partidas.move_to_end(partida_id)
+            self._purgar()
+
+    def obtener(self, partida_id: Optional[str]) -> Optional[Dict]:
+        """
+        Devuelve una copia del estado de la partida, o None si no existe o caducó
+        """
+        if not partida_id:
+            return None
+
+        with self._lock:
+            entrada = self._partidas.get(partida_id)
+            if entrada is None:
+                return None
+
+            actualizado, estado = entrada
+            if time.monotonic() - actualizado > self.ttl:
+                del self._partidas[partida_id]
+                return None
+
+            return copy.deepcopy(estado)
+
+    def eliminar(self, partida_id: Optional[str]):
+        """
+        Elimina una partida terminada
+        """
+        with self._lock:
+            self._partidas.pop(partida_id, None)
+
+    def __len__(self) -> int:
+        return len(self._partidas)
+
+    def _purgar(self):
+        """
+        Descarta partidas caducadas y las más antiguas si se supera el máximo
+        (debe llamarse con el lock adquirido)
+        """
+        limite = time.monotonic() - self.ttl
+        while self._partidas:
+            partida_id, (actualizado, _) = next(iter(self._partidas.items()))
+            if actualizado >= limite and len(self._partidas) <= self.max_partidas:
+                break
+            del self._partidas[partida_id]
+
+class AlmacenPartidasSQLite:
+    """
+    Almacén de partidas en un archivo SQLite, compartido por todos los
+    procesos de la aplicación en la misma máquina
+
+    Misma interfaz que AlmacenPartidas. El estado se guarda serializado con
+    pickle (lo escribe y lo lee solo el servidor) y la caducidad usa la hora
+    del sistema, común a todos los procesos. Cada operación abre su propia
+    conexión, así que el almacén se puede crear antes de que el servidor
+    lance sus workers.
+
+    El estado que guardan los motores no depende del proceso (candidatos
+    por id y huella de los datos, no posiciones en sus listas), así que
+    cualquier worker puede continuar una partida aunque haya cargado los
+    datos en otro orden o con registros posteriores.
+    """
+
+    def __init__(self, ruta: str = "partidas.db", ttl: int = 3600, max_partidas: int = 10000):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_partidas = max_partidas
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS partidas (id TEXT PRIMARY KEY, actualizado REAL NOT NULL, estado BLOB NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_partidas_actualizado ON partidas(actualizado)")
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """
+        Conexión para una operación: confirma la transacción al salir y se cierra
+        """
+        conexion = sqlite3.connect(self.ruta, timeout=10)
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def crear(self, estado: Dict) -> str:
+        """
+        Guarda el estado de una partida nueva y devuelve su identificador
+        """
+        partida_id = secrets.token_urlsafe(16)
+        self.guardar(partida_id, estado)
+        with self._conectar() as conexion:
+            self._purgar(conexion)
+        return partida_id
+
+    def guardar(self, partida_id: str, estado: Dict):
+        """
+        Guarda (o reemplaza) el estado de una partida
+        """
+        datos = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conectar() as conexion:
+            conexion.execute("REPLACE INTO partidas (id, actualizado, estado) VALUES (?, ?, ?)",
+                             (partida_id, time.time(), datos))
+
+    def obtener(self, partida_id: Optional[str]) -> Optional[Dict]:
+        """
+        Devuelve el estado de la partida, o None si no existe o caducó
+        """
+        if not partida_id:
+            return None
+
+        with self._conectar() as conexion:
+            fila = conexion.execute("SELECT actualizado, estado FROM partidas WHERE id = ?", (partida_id,)).fetchone()
+            if fila is None:
+                return None
+
+            actualizado, datos = fila
+            if time.time() - actualizado > self.ttl:
+                conexion.execute("DELETE FROM partidas WHERE id = ?", (partida_id,))
+                return None
+
+            return pickle.loads(datos)
+
+    def eliminar(self, partida_id: Optional[str]):
+        """
+        Elimina una partida terminada
+        """
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM partidas WHERE id = ?", (partida_id,))
+
+    def __len__(self) -> int:
+        with self._conectar() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM partidas").fetchone()[0]
+
+    def _purgar(self, conexion: sqlite3.Connection):
+        """
+        Descarta partidas caducadas y las más antiguas si se supera el máximo
+        """
+        conexion.execute("DELETE FROM partidas WHERE actualizado < ?", (time.time() - self.ttl,))
+        conexion.execute(
+            "DELETE FROM partidas WHERE id IN (SELECT id FROM partidas ORDER BY actualizado DESC LIMIT -1 OFFSET ?)",
+            (self.max_partidas,)
+        )
+
+def crear_almacen_partidas(ttl: int = 3600):
+    """
+    Almacén de partidas configurado con AKINATOR_ALMACEN ("memoria" o "sqlite")
+    """
+    almacen = os.getenv("AKINATOR_ALMACEN", "memoria")
+    if almacen == "memoria":
+        return AlmacenPartidas(ttl=ttl)
+    if almacen == "sqlite":
+        return AlmacenPartidasSQLite(os.getenv("AKINATOR_ALMACEN_SQLITE", "partidas.db"), ttl=ttl)
+    raise ValueError(f"AKINATOR_ALMACEN desconocido: {almacen} (opciones: memoria, sqlite)")
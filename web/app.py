@@ -1,11 +1,21 @@
+import time
+_inicio_arranque = time.perf_counter()
+
 from flask import Flask, render_template, request, jsonify, session
 from mundiales_akinator import MundialesAkinator
 from mundiales_agent import MundialesAgent
 from mundiales_agent_bert import MundialesAgentBERT
+from almacen_partidas import crear_almacen_partidas
+from cliente_api import estadisticas_clientes
+from trabajos_entrenamiento import GestorEntrenamientos, ColaEntrenamientoLlena
+from importar_jugadores import leer_filas
 import os
 from dotenv import load_dotenv
 import logging
 
+# Tiempo de cada etapa del arranque (segundos)
+tiempos_arranque = {"importaciones": time.perf_counter() - _inicio_arranque}
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -14,10 +24,51 @@ app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "192b9bdd22ab9ed4d12e236c78afcb9a393ec15f71bbf5dc987d54727823bcbf")
 app.logger.setLevel(logging.DEBUG)
 
-# Inicializar agentes
+# Inicializar agentes (el modelo BERT se carga al primer uso, o en segundo
+# plano si BERT_PRECARGA=true, así los workers del Akinator arrancan sin él)
+_inicio_etapa = time.perf_counter()
 akinator = MundialesAkinator(api_url=os.getenv("API_BASE_URL", "http://localhost:3000/api"))
 agente = MundialesAgent()
 agente_bert = MundialesAgentBERT(api_url=os.getenv("API_BASE_URL", "http://localhost:3000/api"))
+if os.getenv("BERT_PRECARGA", "false").lower() == "true":
+    agente_bert.precargar()
+tiempos_arranque["agentes"] = time.perf_counter() - _inicio_etapa
+
+# Los registros nuevos del Akinator invalidan las cachés de los agentes de consulta
+akinator.al_cambiar_datos(agente.invalidar_cache)
+akinator.al_cambiar_datos(lambda: agente_bert.invalidar_cache())
+akinator.al_cambiar_datos(lambda: agente_bert.sincronizar_entidades(akinator.cache.get("jugadores")))
+akinator.al_cambiar_datos(lambda: agente.sincronizar_jugadores(akinator.cache.get("jugadores")))
+akinator.al_cambiar_datos(lambda: agente_bert.sincronizar_jugadores(akinator.cache.get("jugadores")))
+
+# Estado de las partidas del Akinator en el servidor (la cookie solo guarda el id)
+partidas = crear_almacen_partidas(ttl=int(os.getenv("AKINATOR_TTL_PARTIDA", "3600")))
+
+def _cargar_modelo_entrenado(trabajo):
+    """
+    Carga el modelo recién entrenado y lo pone en servicio
+
+    El agente nuevo carga BERT mientras el anterior sigue atendiendo consultas;
+    solo cuando está listo se sustituye y se libera la cola del anterior.
+    """
+    global agente_bert
+    nuevo = MundialesAgentBERT(api_url=os.getenv("API_BASE_URL", "http://localhost:3000/api"))
+    nuevo.nlp
+    nuevo.sincronizar_entidades(akinator.cache.get("jugadores"))
+    nuevo.sincronizar_jugadores(akinator.cache.get("jugadores"))
+    anterior, agente_bert = agente_bert, nuevo
+    anterior.cerrar()
+    print(f"Modelo del entrenamiento {trabajo['id']} en servicio")
+
+# Entrenamientos del modelo BERT en segundo plano (uno a la vez, en otro proceso)
+entrenamientos = GestorEntrenamientos(
+    max_en_cola=int(os.getenv("ENTRENAMIENTO_MAX_EN_COLA", "2")),
+    max_terminados=int(os.getenv("ENTRENAMIENTO_MAX_TERMINADOS", "50")),
+    al_completar=_cargar_modelo_entrenado
+)
+
+tiempos_arranque["total"] = time.perf_counter() - _inicio_arranque
+print("Tiempos de arranque: " + ", ".join(f"{etapa} {segundos:.2f}s" for etapa, segundos in tiempos_arranque.items()))
 
 # Rutas para la aplicación
 @app.route('/')
@@ -35,14 +86,15 @@ def iniciar_juego():
         datos = request.json
         modo = datos.get('modo', 'equipo')
         
-        # Iniciar juego
-        mensaje = akinator.iniciar_juego(modo)
-        
-        # Guardar estado en sesión de forma segura
-        session['akinator_estado'] = serializable_estado(akinator.estado)
+        # Iniciar juego y generar la primera pregunta con el motor compartido
+        # (sin estado propio: cada petición trabaja sobre su propio estado)
+        motor = akinator.motor()
+        estado, mensaje = motor.iniciar(modo)
+        estado, pregunta = motor.hacer_pregunta(estado)
         
-        # Generar primera pregunta
-        pregunta = akinator.hacer_pregunta()
+        # Guardar el estado en el servidor; la sesión solo lleva el id de la partida
+        partidas.eliminar(session.get('partida_id'))
+        session['partida_id'] = partidas.crear(estado)
         
         return jsonify({
             'mensaje': mensaje,
@@ -59,31 +111,35 @@ def procesar_respuesta():
         datos = request.json
         respuesta = datos.get('respuesta', '')
         
-        # Recuperar estado de la sesión
-        if 'akinator_estado' in session:
-            try:
-                akinator.estado = session['akinator_estado']
-            except Exception as e:
-                app.logger.error(f"Error al recuperar estado: {e}")
-                # Iniciar nuevo juego si hay problema con el estado
-                modo = session.get('akinator_estado', {}).get('modo', 'equipo')
-                akinator.iniciar_juego(modo)
+        # Recuperar estado de la partida
+        partida_id = session.get('partida_id')
+        estado = partidas.obtener(partida_id)
+        if estado is None:
+            return jsonify({
+                'resultado': "No encontré tu partida (puede haber caducado). ¿Quieres jugar de nuevo?",
+                'es_final': True,
+                'error': True
+            }), 404
         
         # Procesar respuesta
-        resultado = akinator.procesar_respuesta(respuesta)
-        
-        # Guardar estado actualizado
-        session['akinator_estado'] = serializable_estado(akinator.estado)
+        estado, resultado = akinator.motor().step(estado, respuesta)
         
         # Determinar si es un resultado final o si necesita registro
         es_final = "¿Quieres jugar de nuevo?" in resultado or "¿Quieres intentar de nuevo?" in resultado
         necesita_registro = "No pude adivinar" in resultado or "No tengo más candidatos" in resultado
         
+        # Guardar estado actualizado (o liberar la partida si terminó)
+        if es_final or necesita_registro:
+            partidas.eliminar(partida_id)
+            session.pop('partida_id', None)
+        else:
+            partidas.guardar(partida_id, estado)
+        
         return jsonify({
             'resultado': resultado,
             'es_final': es_final,
             'necesita_registro': necesita_registro,
-            'modo': akinator.estado.get('modo', 'equipo')
+            'modo': estado.get('modo', 'equipo')
         })
     except Exception as e:
         app.logger.error(f"Error en procesar_respuesta: {e}")
@@ -93,28 +149,6 @@ def procesar_respuesta():
             'error': True
         }), 500
 
-def serializable_estado(estado):
-    """Convierte el estado en un objeto serializable para la sesión"""
-    # Crea una copia limpia del estado
-    estado_limpio = {}
-    
-    # Copia solo los elementos serializables
-    for clave, valor in estado.items():
-        if clave == "candidatos":
-            # Para candidatos, solo mantener las propiedades básicas
-            candidatos_limpios = []
-            for candidato in valor:
-                candidato_limpio = {
-                    k: v for k, v in candidato.items() 
-                    if isinstance(v, (str, int, float, bool, type(None)))
-                }
-                candidatos_limpios.append(candidato_limpio)
-            estado_limpio[clave] = candidatos_limpios
-        elif isinstance(valor, (str, int, float, bool, list, dict, type(None))):
-            estado_limpio[clave] = valor
-    
-    return estado_limpio
-
 @app.route('/api/posiciones', methods=['GET'])
 def obtener_posiciones():
     """Obtiene la lista de posiciones disponibles"""
@@ -210,6 +244,35 @@ def registrar_jugador():
         app.logger.error(f"Error en registrar_jugador: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/registrar/lote', methods=['POST'])
+def registrar_lote():
+    """Registra una plantilla de jugadores (JSON o archivo CSV/JSON en 'archivo')"""
+    try:
+        if 'archivo' in request.files:
+            archivo = request.files['archivo']
+            formato = os.path.splitext(archivo.filename or '')[1].lower().lstrip('.') or 'csv'
+            filas = leer_filas(archivo.read().decode('utf-8'), formato)
+        else:
+            filas = leer_filas(request.get_data(as_text=True), 'json')
+
+        if not filas:
+            return jsonify({'success': False, 'error': 'No hay jugadores que registrar'}), 400
+
+        resumen = akinator.registrar_lote(filas)
+
+        if resumen['errores']:
+            # Con errores de validación no se escribe nada (400); si falla una escritura, 500
+            return jsonify(dict(resumen, success=False, error=resumen['errores'][0])), 400 if not resumen['validas'] else 500
+
+        return jsonify(dict(resumen, success=True,
+                            message=f"Se han registrado {resumen['insertados']} jugadores "
+                                    f"({resumen['existentes']} ya estaban registrados)"))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': f'Archivo no válido: {e}'}), 400
+    except Exception as e:
+        app.logger.error(f"Error en registrar_lote: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # Rutas para el Agente de Consultas (BERT)
 @app.route('/entrenar')
 def entrenar_index():
@@ -226,7 +289,8 @@ def procesar_consulta():
     # Procesar la consulta con el agente BERT
     respuesta = agente_bert.procesar_consulta(consulta)
     
-    # Obtener el análisis BERT para información adicional (opcional)
+    # Obtener el análisis BERT para información adicional (opcional); sale de
+    # la caché de análisis que acaba de llenar procesar_consulta
     analisis = agente_bert.nlp.analyze_query(consulta)
     
     return jsonify({
@@ -238,6 +302,25 @@ def procesar_consulta():
         }
     })
 
+@app.route('/api/ejemplos', methods=['POST'])
+def agregar_ejemplos():
+    """Añade ejemplos etiquetados al índice kNN sin reentrenar el modelo"""
+    datos = request.json or {}
+    ejemplos = datos.get('ejemplos') or [datos]
+    if not all(isinstance(e, dict) and e.get('texto') and e.get('intencion') for e in ejemplos):
+        return jsonify({'success': False, 'error': 'Faltan datos obligatorios (texto e intencion en cada ejemplo)'}), 400
+    
+    try:
+        milisegundos = agente_bert.nlp.agregar_ejemplos(ejemplos)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'ejemplos': len(agente_bert.nlp.knn),
+        'milisegundos': milisegundos
+    })
+
 @app.route('/api/paises')
 def obtener_paises():
     paises = agente_bert.get_paises()
@@ -272,24 +355,27 @@ def entrenar_modelo():
             # Importar el módulo de entrenamiento
             import train_bert
             
-            # Crear ejemplos y entrenar el modelo
+            # Crear y guardar los ejemplos
             ejemplos = train_bert.crear_ejemplos_adicionales()
             train_bert.guardar_ejemplos(ejemplos)
             
             # Número de épocas (por defecto 3)
             epochs = int(request.form.get('epochs', 3))
             
-            # Entrenar el modelo
-            train_bert.entrenar_modelo(epochs=epochs, ejemplos=ejemplos)
-            
-            # Recargar el modelo en el agente
-            global agente_bert
-            agente_bert = MundialesAgentBERT(api_url=os.getenv("API_BASE_URL", "http://localhost:3000/api"))
+            # Encolar el entrenamiento; el modelo nuevo se carga al terminar
+            trabajo = entrenamientos.encolar(epochs=epochs, ejemplos=ejemplos)
             
             return jsonify({
                 'success': True,
-                'message': f'Modelo entrenado exitosamente con {len(ejemplos)} ejemplos durante {epochs} épocas.'
-            })
+                'trabajo_id': trabajo['id'],
+                'message': f'Entrenamiento en cola con {len(ejemplos)} ejemplos durante {epochs} épocas.'
+            }), 202
+        
+        except ColaEntrenamientoLlena as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 429
         
         except Exception as e:
             return jsonify({
@@ -300,6 +386,52 @@ def entrenar_modelo():
     # Si es GET, mostrar página de entrenamiento
     return render_template('entrenar.html')
 
+@app.route('/api/entrenamientos')
+def listar_entrenamientos():
+    """Todos los trabajos de entrenamiento, del más reciente al más antiguo"""
+    return jsonify(entrenamientos.listar())
+
+@app.route('/api/entrenamientos/<trabajo_id>')
+def estado_entrenamiento(trabajo_id):
+    """Estado y progreso (época actual y pérdidas) de un entrenamiento"""
+    trabajo = entrenamientos.obtener(trabajo_id)
+    if trabajo is None:
+        return jsonify({'error': 'Entrenamiento no encontrado'}), 404
+    return jsonify(trabajo)
+
+@app.route('/api/entrenamientos/<trabajo_id>/cancelar', methods=['POST', 'DELETE'])
+def cancelar_entrenamiento(trabajo_id):
+    """Cancela un entrenamiento en cola o detiene el que está en curso"""
+    if not entrenamientos.cancelar(trabajo_id):
+        return jsonify({'success': False, 'error': 'El entrenamiento no existe o ya terminó'}), 404
+    return jsonify({'success': True, 'trabajo': entrenamientos.obtener(trabajo_id)})
+
+@app.route('/api/estadisticas/cache')
+def estadisticas_cache():
+    """Aciertos y fallos de las cachés del agente de consultas"""
+    return jsonify(agente_bert.estadisticas_cache())
+
+@app.route('/api/estadisticas/api')
+def estadisticas_api():
+    """Peticiones, errores y latencia por endpoint de la API de datos"""
+    return jsonify(estadisticas_clientes())
+
+@app.route('/api/estadisticas/inferencia')
+def estadisticas_inferencia():
+    """Cola de inferencia BERT (profundidad y tamaños de lote) y caché de análisis"""
+    if not agente_bert.nlp_cargado:
+        return jsonify({'cargado': False})
+    return jsonify(agente_bert.nlp.estadisticas_inferencia())
+
+@app.route('/api/estadisticas/arranque')
+def estadisticas_arranque():
+    """Tiempo de cada etapa del arranque y de la carga del modelo BERT"""
+    return jsonify({
+        'arranque': tiempos_arranque,
+        'bert_cargado': agente_bert.nlp_cargado,
+        'carga_bert': agente_bert.tiempo_carga_nlp
+    })
+
 # Servir archivos estáticos de una manera organizada
 @app.route('/static/<path:filename>')
 def custom_static(filename):
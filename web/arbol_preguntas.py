@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional, Tuple
+from preguntas import RegistroPreguntas
+
+class ArbolPreguntas:
+    """
+    Árbol de decisión de preguntas compilado de antemano para un modo de juego.
+
+    Cada nodo interno guarda la pregunta que el planificador elegiría para el
+    conjunto de candidatos que llega a ese nodo, y los nodos hijos para las
+    respuestas "sí" y "no". Durante la partida, elegir la siguiente pregunta es
+    una consulta directa al nodo actual. Las hojas (pocos candidatos o ninguna
+    pregunta que los distinga) no tienen pregunta: ahí el motor adivina o
+    vuelve al planificador dinámico.
+    """
+
+    def __init__(self, registro: RegistroPreguntas, max_candidatos_hoja: int = 2):
+        """
+        Args:
+            registro: Registro de preguntas (con su índice de candidatos) del modo
+            max_candidatos_hoja: A partir de cuántos candidatos se deja de preguntar
+        """
+        # Cada nodo es (id de pregunta o None, nodo si "sí", nodo si "no")
+        self.nodos: List[Tuple[Optional[str], Optional[int], Optional[int]]] = []
+        self.profundidades: List[int] = []
+        self.raiz = self._compilar(registro, max_candidatos_hoja)
+
+    def _compilar(self, registro: RegistroPreguntas, max_candidatos_hoja: int) -> int:
+        """
+        Construye el árbol de forma iterativa, reutilizando los subárboles de
+        conjuntos de candidatos idénticos
+        """
+        nodo_por_mascara: Dict[int, int] = {}
+        pendientes = [(registro.indice.todos, 0, None, None)]
+        raiz = None
+
+        while pendientes:
+            mascara, profundidad, padre, rama = pendientes.pop()
+
+            nodo = nodo_por_mascara.get(mascara)
+            if nodo is None:
+                nodo = len(self.nodos)
+                nodo_por_mascara[mascara] = nodo
+
+                pregunta = None
+                if registro.indice.contar(mascara) > max_candidatos_hoja:
+                    pregunta = registro.mejor_pregunta(mascara)
+
+                self.nodos.append((pregunta.id if pregunta else None, None, None))
+                self.profundidades.append(profundidad)
+
+                if pregunta:
+                    pendientes.append((mascara & ~pregunta.mascara, profundidad + 1, nodo, 2))
+                    pendientes.append((mascara & pregunta.mascara, profundidad + 1, nodo, 1))
+
+            if padre is None:
+                raiz = nodo
+            else:
+                enlaces = list(self.nodos[padre])
+                enlaces[rama] = nodo
+                self.nodos[padre] = tuple(enlaces)
+
+        return raiz
+
+    def pregunta(self, nodo: Optional[int]) -> Optional[str]:
+        """
+        Identificador de la pregunta del nodo (None en las hojas)
+        """
+        if nodo is None or not 0 <= nodo < len(self.nodos):
+            return None
+        return self.nodos[nodo][0]
+
+    def siguiente(self, nodo: int, afirmativo: bool) -> Optional[int]:
+        """
+        Nodo al que se llega respondiendo "sí" o "no" a la pregunta del nodo
+        """
+        _, nodo_si, nodo_no = self.nodos[nodo]
+        return nodo_si if afirmativo else nodo_no
+
+    def estadisticas(self) -> Dict[str, float]:
+        """
+        Tamaño del árbol y número de preguntas hasta cada hoja
+        """
+        hojas = [p for (pregunta, _, _), p in zip(self.nodos, self.profundidades) if pregunta is None]
+        return {
+            "nodos": len(self.nodos),
+            "hojas": len(hojas),
+            "profundidad_maxima": max(hojas, default=0),
+            "profundidad_media": sum(hojas) / len(hojas) if hojas else 0.0
+        }
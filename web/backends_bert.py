@@ -0,0 +1,224 @@
+"""
+Backends de inferencia para el clasificador de intenciones BERT.
+
+Todos reciben la salida del tokenizador (tensores de PyTorch) y devuelven los
+logits como array de NumPy, de modo que BERTProcessor no depende de cómo se
+ejecute el modelo. codificar() devuelve además el embedding de cada texto
+(media de los tokens de la última capa) de la misma pasada, para el
+clasificador kNN:
+
+- "pytorch": el modelo en fp32 tal cual (CPU o GPU).
+- "int8": cuantización dinámica a int8 de las capas lineales, solo CPU.
+- "onnx": el modelo exportado a ONNX y ejecutado con ONNX Runtime, solo CPU.
+"""
+
+import copy
+import os
+from typing import Dict, Optional, Tuple
+import numpy as np
+import torch
+
+# Backends disponibles
+BACKENDS = ["pytorch", "int8", "onnx"]
+
+def _copia_cpu(model):
+    """
+    Copia del modelo en CPU y en modo evaluación
+
+    El original no se toca: BERTProcessor lo sigue usando en su dispositivo
+    (GPU si hay) para los embeddings del kNN y para fine_tune.
+    """
+    return copy.deepcopy(model).cpu().eval()
+
+def _bytes_tensores(valores) -> int:
+    """
+    Bytes de los tensores de un state_dict (los módulos cuantizados guardan
+    sus pesos empaquetados en tuplas)
+    """
+    total = 0
+    for valor in valores:
+        if isinstance(valor, torch.Tensor):
+            total += valor.numel() * valor.element_size()
+        elif isinstance(valor, (tuple, list)):
+            total += _bytes_tensores(valor)
+    return total
+
+def media_tokens(estados: torch.Tensor, mascara: torch.Tensor) -> torch.Tensor:
+    """
+    Media de los estados ocultos de los tokens reales (sin padding)
+    """
+    mascara = mascara.unsqueeze(-1).to(estados.dtype)
+    return (estados * mascara).sum(dim=1) / mascara.sum(dim=1).clamp(min=1)
+
+class _ClasificadorConEmbeddings(torch.nn.Module):
+    """
+    El clasificador con una segunda salida: el embedding medio de los tokens
+
+    Equivale al forward de BertForSequenceClassification (en evaluación el
+    dropout no hace nada) y se exporta así a ONNX para el kNN.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        salida = self.model.bert(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)
+        logits = self.model.classifier(salida.pooler_output)
+        return logits, media_tokens(salida.last_hidden_state, attention_mask)
+
+class BackendPyTorch:
+    """
+    Ejecuta el modelo de PyTorch sin cambios
+    """
+
+    nombre = "pytorch"
+
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+
+    def logits(self, inputs: Dict[str, torch.Tensor]) -> np.ndarray:
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits.float().cpu().numpy()
+
+    def codificar(self, inputs: Dict[str, torch.Tensor]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (embeddings, logits) de una sola pasada por el encoder
+        """
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            salida = self.model.bert(**inputs)
+            embeddings = media_tokens(salida.last_hidden_state, inputs["attention_mask"])
+            logits = self.model.classifier(salida.pooler_output)
+        return embeddings.float().cpu().numpy(), logits.float().cpu().numpy()
+
+    def memoria_pesos(self) -> int:
+        """
+        Bytes que ocupan los pesos del modelo tal como los ejecuta el backend
+        """
+        return _bytes_tensores(self.model.state_dict().values())
+
+class BackendInt8(BackendPyTorch):
+    """
+    Cuantización dinámica: pesos de las capas lineales en int8 y activaciones
+    cuantizadas al vuelo. Reduce el tamaño del modelo y acelera la inferencia
+    en CPU con una pérdida de precisión normalmente despreciable.
+    """
+
+    nombre = "int8"
+
+    def __init__(self, model, device=None):
+        # Se cuantiza una copia (inplace sobre ella, para no copiar dos veces)
+        cuantizado = torch.quantization.quantize_dynamic(_copia_cpu(model), {torch.nn.Linear},
+                                                         dtype=torch.qint8, inplace=True)
+        super().__init__(cuantizado, torch.device("cpu"))
+
+class BackendONNX:
+    """
+    Grafo exportado a ONNX y ejecutado con ONNX Runtime en CPU.
+
+    El archivo .onnx se genera junto a los pesos la primera vez (o cuando los
+    pesos son más recientes que la exportación).
+    """
+
+    nombre = "onnx"
+
+    def __init__(self, model, ruta_onnx: str, ruta_pesos: Optional[str] = None, reexportar: bool = False):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("El backend 'onnx' necesita el paquete onnxruntime (pip install onnxruntime)") from e
+
+        desactualizado = (
+            ruta_pesos and os.path.exists(ruta_pesos) and os.path.exists(ruta_onnx)
+            and os.path.getmtime(ruta_pesos) > os.path.getmtime(ruta_onnx)
+        )
+        self.ruta_onnx = ruta_onnx
+        if reexportar or not os.path.exists(ruta_onnx) or desactualizado:
+            exportar_onnx(model, ruta_onnx)
+
+        opciones = onnxruntime.SessionOptions()
+        opciones.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.sesion = onnxruntime.InferenceSession(ruta_onnx, opciones, providers=["CPUExecutionProvider"])
+        if "embeddings" not in [salida.name for salida in self.sesion.get_outputs()]:
+            # Exportación anterior, sin la salida de embeddings
+            exportar_onnx(model, ruta_onnx)
+            self.sesion = onnxruntime.InferenceSession(ruta_onnx, opciones, providers=["CPUExecutionProvider"])
+        self.entradas = [entrada.name for entrada in self.sesion.get_inputs()]
+
+    def _feed(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, np.ndarray]:
+        return {nombre: inputs[nombre].cpu().numpy().astype(np.int64) for nombre in self.entradas if nombre in inputs}
+
+    def logits(self, inputs: Dict[str, torch.Tensor]) -> np.ndarray:
+        return self.sesion.run(["logits"], self._feed(inputs))[0]
+
+    def codificar(self, inputs: Dict[str, torch.Tensor]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (embeddings, logits) de una sola ejecución del grafo
+        """
+        logits, embeddings = self.sesion.run(["logits", "embeddings"], self._feed(inputs))
+        return embeddings, logits
+
+    def memoria_pesos(self) -> int:
+        """
+        Bytes de los pesos del grafo (el .onnx los lleva como inicializadores
+        y la sesión los carga enteros)
+        """
+        return os.path.getsize(self.ruta_onnx)
+
+def exportar_onnx(model, ruta_onnx: str):
+    """
+    Exporta el clasificador a ONNX con lote y longitud de secuencia dinámicos
+
+    El grafo tiene dos salidas: "logits" y "embeddings" (para el kNN).
+    """
+    modelo_cpu = _ClasificadorConEmbeddings(_copia_cpu(model)).eval()
+    ejemplo = {
+        "input_ids": torch.ones(1, 8, dtype=torch.long),
+        "attention_mask": torch.ones(1, 8, dtype=torch.long),
+        "token_type_ids": torch.zeros(1, 8, dtype=torch.long)
+    }
+    ejes = {"batch": 0, "secuencia": 1}
+
+    # Exportar a un temporal en la misma carpeta y renombrar: otro proceso que
+    # abra la sesión a la vez nunca ve un grafo a medias
+    temporal = f"{ruta_onnx}.tmp"
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                modelo_cpu,
+                (ejemplo["input_ids"], ejemplo["attention_mask"], ejemplo["token_type_ids"]),
+                temporal,
+                input_names=list(ejemplo),
+                output_names=["logits", "embeddings"],
+                dynamic_axes={**{nombre: ejes for nombre in ejemplo}, "logits": {0: "batch"}, "embeddings": {0: "batch"}},
+                opset_version=14
+            )
+        os.replace(temporal, ruta_onnx)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    print(f"Modelo exportado a ONNX: {ruta_onnx}")
+
+def crear_backend(nombre: str, model, device, ruta_pesos: Optional[str] = None, reexportar: bool = False):
+    """
+    Construye el backend de inferencia indicado a partir del modelo cargado
+
+    Args:
+        nombre: Uno de BACKENDS
+        model: BertForSequenceClassification con los pesos ya cargados
+        device: Dispositivo del backend "pytorch"
+        ruta_pesos: Archivo de pesos del que sale el modelo (para nombrar y
+            revalidar la exportación ONNX)
+        reexportar: Regenerar el .onnx aunque exista (tras reentrenar)
+    """
+    if nombre == "int8":
+        return BackendInt8(model)
+    if nombre == "onnx":
+        base = os.path.splitext(ruta_pesos)[0] if ruta_pesos else "mundiales_bert_model"
+        return BackendONNX(model, f"{base}.onnx", ruta_pesos, reexportar)
+    if nombre != "pytorch":
+        print(f"Backend de inferencia desconocido '{nombre}', se usa 'pytorch'")
+    return BackendPyTorch(model, device)
@@ -0,0 +1,84 @@
+"""
+Script para comparar el modelo completo con el modelo destilado (estudiante).
+
+Para cada modelo clasifica los ejemplos de ejemplos_entrenamiento.json de uno
+en uno y muestra:
+
+- La precisión frente a la intención etiquetada (con los ejemplos por
+  defecto, sobre el conjunto con el que se entrenaron ambos modelos).
+- La latencia por consulta (p50 y p99).
+- El número de parámetros, la memoria de sus pesos en el backend elegido
+  (fp32, int8 o el grafo ONNX) y el tamaño del archivo.
+
+Uso:
+    python benchmark_destilado.py [--backend int8] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+from backends_bert import BACKENDS
+from bert_processor import BERTProcessor, RUTA_MODELO, RUTA_ESTUDIANTE
+from train_bert import cargar_ejemplos, aviso_conjunto_entrenamiento, medir_clasificacion
+
+def medir_modelo(ruta, ejemplos, backend="pytorch", repeticiones=3):
+    """
+    Carga un modelo y mide su tamaño, precisión y latencia
+
+    Returns:
+        Diccionario con las métricas del modelo
+    """
+    inicio = time.perf_counter()
+    processor = BERTProcessor(model_path=ruta, backend=backend)
+    segundos_carga = time.perf_counter() - inicio
+
+    parametros = sum(p.numel() for p in processor.model.parameters())
+    predicciones, latencias = medir_clasificacion(processor, ejemplos, repeticiones)
+    aciertos = sum(p == ejemplo["intencion"] for p, ejemplo in zip(predicciones, ejemplos))
+
+    return {
+        "capas": processor.model.config.num_hidden_layers,
+        "parametros_m": parametros / 1e6,
+        "memoria_mb": processor.backend.memoria_pesos() / 2 ** 20,
+        "archivo_mb": os.path.getsize(ruta) / 2 ** 20,
+        "carga_s": segundos_carga,
+        "precision": aciertos / len(ejemplos),
+        "p50_ms": float(np.percentile(latencias, 50)),
+        "p99_ms": float(np.percentile(latencias, 99))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el modelo completo con el destilado")
+    parser.add_argument("--profesor", default=RUTA_MODELO)
+    parser.add_argument("--estudiante", default=RUTA_ESTUDIANTE)
+    parser.add_argument("--ejemplos", default="ejemplos_entrenamiento.json",
+                        help="Ejemplos etiquetados (por defecto los del entrenamiento)")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    ejemplos = cargar_ejemplos(args.ejemplos)
+    if not ejemplos:
+        return
+
+    resultados = []
+    for nombre, ruta in [("completo", args.profesor), ("destilado", args.estudiante)]:
+        if not os.path.exists(ruta):
+            print(f"No se encontró el modelo {nombre}: {ruta}")
+            continue
+        print(f"\n=== Modelo {nombre}: {ruta} ===")
+        resultados.append((nombre, medir_modelo(ruta, ejemplos, args.backend, args.repeticiones)))
+
+    aviso = aviso_conjunto_entrenamiento(args.ejemplos)
+    columna = "Prec. entren." if aviso else "Precisión"
+    print(f"\n{'Modelo':<11}{'Capas':>6}{'Params (M)':>12}{'Memoria (MB)':>14}{'Archivo (MB)':>14}"
+          f"{'Carga (s)':>11}{columna:>15}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for nombre, r in resultados:
+        print(f"{nombre:<11}{r['capas']:>6}{r['parametros_m']:>12.1f}{r['memoria_mb']:>14.1f}{r['archivo_mb']:>14.1f}"
+              f"{r['carga_s']:>11.2f}{r['precision']:>15.1%}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    if aviso:
+        print(f"\n{aviso}")
+
+if __name__ == "__main__":
+    main()
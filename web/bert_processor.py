@@ -1,8 +1,83 @@
 import torch
-from transformers import BertTokenizer, BertForSequenceClassification
+from transformers import BertConfig, BertTokenizerFast, BertForSequenceClassification
+from transformers.modeling_utils import no_init_weights
+import json
+import os
+import random
 import re
+import time
 import numpy as np
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Optional
+from backends_bert import crear_backend
+from cache_ttl import CacheTTL
+from clasificador_knn import ClasificadorKNN
+from gazetteer import Gazetteer
+from cola_inferencia import ColaInferencia
+from formato_modelo import cargar_pesos, es_safetensors, guardar_pesos
+
+# Archivos de pesos del modelo completo y del modelo destilado (estudiante)
+RUTA_MODELO = 'mundiales_bert_model.safetensors'
+RUTA_ESTUDIANTE = 'mundiales_bert_student.safetensors'
+
+# Modos de clasificación: solo la cabeza del modelo, solo kNN sobre los
+# ejemplos, kNN primero (la cabeza solo si kNN no está seguro), o la media de ambos
+MODOS_CLASIFICACION = ["cabeza", "knn", "primero", "combinado"]
+
+def guardar_modelo(model, ruta: str, destilado: bool = False, metadatos: Optional[Dict[str, Any]] = None):
+    """
+    Guarda los pesos del clasificador
+    
+    Con extensión .safetensors se guardan con su configuración y los metadatos
+    (etiquetas, estadísticas del entrenamiento) en la cabecera; ver
+    formato_modelo. Con otra extensión se usa el formato anterior de
+    torch.save: el modelo completo solo con su state_dict (sobre la
+    arquitectura base) y el destilado con su configuración.
+    """
+    if es_safetensors(ruta):
+        guardar_pesos(model, ruta, dict(metadatos or {}, destilado=destilado))
+        return
+    
+    # Escribir en un temporal y renombrar, para que nadie cargue un archivo a medias
+    temporal = f"{ruta}.tmp"
+    if destilado:
+        torch.save({"config": model.config.to_dict(), "state_dict": model.state_dict(),
+                    "vocabulario": (metadatos or {}).get("vocabulario")}, temporal)
+    else:
+        torch.save(model.state_dict(), temporal)
+    os.replace(temporal, ruta)
+
+def mapa_tokens(vocabulario: List[int], total: int, unk_id: int) -> torch.Tensor:
+    """
+    Tabla de ids del tokenizador a ids de un vocabulario reducido
+    
+    Args:
+        vocabulario: Ids del tokenizador que conserva el modelo, en orden
+            creciente (así [PAD], el id 0, sigue siendo el 0)
+        total: Tamaño del vocabulario del tokenizador
+        unk_id: Id de [UNK] en el tokenizador; los ids que no están en el
+            vocabulario se leen como [UNK]
+    """
+    mapa = torch.full((total,), vocabulario.index(unk_id), dtype=torch.long)
+    mapa[torch.tensor(vocabulario, dtype=torch.long)] = torch.arange(len(vocabulario))
+    return mapa
+
+def lotes_por_longitud(longitudes: List[int], tamano_lote: int, mezclar: bool = True) -> List[List[int]]:
+    """
+    Agrupa los índices de los ejemplos en lotes de longitud parecida
+    
+    Cada lote se rellena solo hasta su ejemplo más largo, así que agrupar por
+    longitud evita procesar tokens de relleno. Con mezclar, los empates de
+    longitud y el orden de los lotes cambian en cada llamada (cada época).
+    """
+    indices = list(range(len(longitudes)))
+    if mezclar:
+        random.shuffle(indices)
+    indices.sort(key=lambda i: longitudes[i])
+    
+    lotes = [indices[i:i + tamano_lote] for i in range(0, len(indices), tamano_lote)]
+    if mezclar:
+        random.shuffle(lotes)
+    return lotes
 
 class BERTProcessor:
     """
@@ -10,7 +85,14 @@ class BERTProcessor:
     de consultas relacionadas con datos de mundiales de fútbol.
     """
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend=None):
+        """
+        Args:
+            model_path: Pesos entrenados (mundiales_bert_model.safetensors, o el
+                modelo destilado mundiales_bert_student.safetensors; también se
+                aceptan los .pt anteriores); si no existe se usa el modelo base
+            backend: "pytorch", "int8" u "onnx" (por defecto BERT_BACKEND)
+        """
         # Definir etiquetas de intención
         self.intent_labels = [
             "buscar_mundial_por_anio",
@@ -20,73 +102,337 @@ class BERTProcessor:
             "consulta_general"
         ]
         
-        # Inicializar tokenizador BERT
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-multilingual-cased')
+        # Tiempo de cada etapa de la carga (segundos)
+        self.tiempos_carga: Dict[str, float] = {}
+        inicio = time.perf_counter()
+        
+        # Inicializar tokenizador BERT (implementación rápida en Rust)
+        self.tokenizer = BertTokenizerFast.from_pretrained('bert-base-multilingual-cased')
+        self.tiempos_carga["tokenizador"] = time.perf_counter() - inicio
+        
+        # Determinar dispositivo (CPU/GPU)
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        print(f"Utilizando dispositivo: {self.device}")
         
         # Inicializar modelo de clasificación
-        if model_path and torch.cuda.is_available():
-            # Cargar modelo pre-entrenado si está disponible
-            self.model = BertForSequenceClassification.from_pretrained(
-                'bert-base-multilingual-cased',
-                num_labels=len(self.intent_labels)
-            )
-            self.model.load_state_dict(torch.load(model_path))
-            self.model.to('cuda')
+        inicio = time.perf_counter()
+        self.ruta_configurada = model_path
+        model_path = self._resolver_ruta(model_path)
+        state_dict = None
+        config = None
+        self.metadatos: Dict[str, Any] = {}
+        if model_path and es_safetensors(model_path):
+            # Pesos mapeados en memoria (sin copiarlos) y configuración de la cabecera
+            state_dict, self.metadatos = cargar_pesos(model_path)
+            config = BertConfig.from_dict(self.metadatos["config"])
+            self.intent_labels = self.metadatos.get("etiquetas", self.intent_labels)
+        elif model_path:
+            # Formato anterior (torch.save); también mapeado en memoria
+            checkpoint = torch.load(model_path, map_location="cpu", mmap=True, weights_only=True)
+            if "config" in checkpoint:
+                config = BertConfig.from_dict(checkpoint["config"])
+                state_dict = checkpoint["state_dict"]
+                self.metadatos["destilado"] = True
+                self.metadatos["vocabulario"] = checkpoint.get("vocabulario")
+            else:
+                state_dict = checkpoint
+        
+        # Los modelos destilados tienen su propia configuración (menos capas)
+        self.destilado = bool(self.metadatos.get("destilado", False))
+        if config is not None:
+            # Sin inicializar pesos aleatorios: se sustituyen a continuación
+            with no_init_weights():
+                self.model = BertForSequenceClassification(config)
         else:
-            # Usar modelo base si no hay uno pre-entrenado
             self.model = BertForSequenceClassification.from_pretrained(
                 'bert-base-multilingual-cased',
                 num_labels=len(self.intent_labels)
             )
+        if state_dict is not None:
+            # assign: los parámetros usan directamente los tensores cargados
+            self.model.load_state_dict(state_dict, assign=True)
+        self.model.to(self.device)
+        self.model_path = model_path
+        
+        # Los estudiantes con vocabulario reducido guardan qué ids del
+        # tokenizador conservan; tokenizar() traduce los ids de cada texto
+        # (se vuelven a guardar con el modelo en cada fine-tuning)
+        self.vocabulario: Optional[List[int]] = self.metadatos.get("vocabulario")
+        self._mapa_tokens = (mapa_tokens(self.vocabulario, len(self.tokenizer), self.tokenizer.unk_token_id)
+                             if self.vocabulario else None)
         
         # Poner el modelo en modo evaluación
         self.model.eval()
+        self.tiempos_carga["modelo"] = time.perf_counter() - inicio
         
-        # Determinar dispositivo (CPU/GPU)
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        print(f"Utilizando dispositivo: {self.device}")
+        # Backend con el que se ejecuta la inferencia
+        inicio = time.perf_counter()
+        self.backend_nombre = backend or os.getenv("BERT_BACKEND", "pytorch")
+        self.backend = crear_backend(self.backend_nombre, self.model, self.device, model_path)
+        self.tiempos_carga["backend"] = time.perf_counter() - inicio
+        print(f"Backend de inferencia: {self.backend.nombre}")
+        print("Tiempos de carga BERT: " + ", ".join(f"{etapa} {segundos:.2f}s" for etapa, segundos in self.tiempos_carga.items()))
         
-        # Lista de países para reconocimiento de entidades
+        # Cola que agrupa en un solo forward las consultas concurrentes
+        self.cola = ColaInferencia(
+            self.classify_intents,
+            ventana_ms=float(os.getenv("BERT_VENTANA_LOTE_MS", "5")),
+            max_lote=int(os.getenv("BERT_MAX_LOTE", "16")),
+            timeout=float(os.getenv("BERT_TIMEOUT_COLA_S", "30"))
+        )
+        
+        # Clasificador kNN opcional sobre los embeddings de los ejemplos
+        self.modo_clasificacion = os.getenv("BERT_CLASIFICADOR", "cabeza")
+        self.umbral_knn = float(os.getenv("BERT_UMBRAL_KNN", "0.8"))
+        self.knn = None
+        if self.modo_clasificacion in MODOS_CLASIFICACION[1:]:
+            inicio = time.perf_counter()
+            self.knn = ClasificadorKNN(
+                self.embeddings,
+                self.intent_labels,
+                ruta=os.getenv("BERT_INDICE_KNN", "indice_ejemplos.npz"),
+                k=int(os.getenv("BERT_KNN_K", "5")),
+                firma=self._firma_modelo()
+            )
+            self.knn.cargar(self._cargar_ejemplos())
+            self.tiempos_carga["indice_knn"] = time.perf_counter() - inicio
+        
+        # Caché LRU de análisis por texto normalizado (sin caducidad: solo
+        # cambia al reentrenar el modelo)
+        max_analisis = int(os.getenv("BERT_CACHE_ANALISIS", "2048"))
+        self.cache_analisis = {
+            "intenciones": CacheTTL(ttl=0, max_entradas=max_analisis),
+            "entidades": CacheTTL(ttl=0, max_entradas=max_analisis)
+        }
+        
+        # Lista de países para reconocimiento de entidades (la lista completa
+        # de países y jugadores se añade con actualizar_entidades)
         self.paises = [
             "brasil", "alemania", "italia", "argentina", 
             "francia", "españa", "inglaterra", "uruguay"
         ]
+        self.gazetteer = Gazetteer(difuso=os.getenv("BERT_ENTIDADES_DIFUSAS", "false").lower() == "true")
+        for pais in self.paises:
+            self.gazetteer.agregar_pais(pais)
     
     def classify_intent(self, query: str) -> Dict[str, float]:
         """
         Clasifica la intención del usuario basada en su consulta
+        
+        La consulta pasa por la cola de inferencia, que la agrupa con las que
+        lleguen a la vez desde otras peticiones. Las consultas repetidas se
+        sirven de la caché de análisis sin pasar por el modelo.
+        """
+        intent_probs = self.cache_analisis["intenciones"].obtener(
+            self._normalizar(query), lambda: self.cola.enviar(" ".join(query.split()))
+        )
+        return dict(intent_probs)
+    
+    def classify_intents(self, queries: List[str]) -> List[Dict[str, float]]:
+        """
+        Clasifica un lote de consultas con un único forward (con padding)
         """
         # Preparar entrada para BERT
-        inputs = self.tokenizer(
-            query,
+        inputs = self.tokenizar(
+            queries,
             return_tensors="pt",
             padding=True,
             truncation=True,
             max_length=128
         )
         
-        # Mover inputs al dispositivo apropiado
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        if self.knn is not None:
+            return self._clasificar_con_knn(inputs)
         
-        # Obtener predicciones
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            
+        # Obtener predicciones con el backend configurado
+        return self._probabilidades(self.backend.logits(inputs))
+    
+    def _probabilidades(self, logits: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Convierte logits en un diccionario de probabilidades por intención
+        """
         # Convertir a probabilidades usando softmax
-        probs = torch.nn.functional.softmax(logits, dim=1).squeeze().cpu().numpy()
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp / exp.sum(axis=1, keepdims=True)
+        
+        # Crear diccionario de intenciones y sus probabilidades para cada consulta
+        return [
+            {self.intent_labels[i]: float(fila[i]) for i in range(len(self.intent_labels))}
+            for fila in probs
+        ]
+    
+    def _clasificar_con_knn(self, inputs: Dict[str, torch.Tensor]) -> List[Dict[str, float]]:
+        """
+        Clasificación con el índice kNN, sola o junto con la cabeza del modelo
+        
+        Los embeddings y los logits de la cabeza salen de la misma pasada por
+        el encoder del backend configurado (pytorch, int8 u onnx), así que
+        combinar ambos no cuesta un segundo forward.
+        """
+        embeddings, logits = self.backend.codificar(inputs)
+        
+        probs_knn = self.knn.clasificar(embeddings)
+        if self.modo_clasificacion == "knn":
+            return probs_knn
+        
+        probs_cabeza = self._probabilidades(logits)
+        if self.modo_clasificacion == "primero":
+            return [
+                knn if max(knn.values()) >= self.umbral_knn else cabeza
+                for knn, cabeza in zip(probs_knn, probs_cabeza)
+            ]
+        
+        return [
+            {intencion: (knn[intencion] + cabeza[intencion]) / 2 for intencion in self.intent_labels}
+            for knn, cabeza in zip(probs_knn, probs_cabeza)
+        ]
+    
+    def embeddings(self, textos: List[str]) -> np.ndarray:
+        """
+        Embedding de cada texto: media de los vectores de sus tokens en la
+        última capa del encoder
         
-        # Crear diccionario de intenciones y sus probabilidades
-        intent_probs = {self.intent_labels[i]: float(probs[i]) for i in range(len(self.intent_labels))}
+        Se calculan con el mismo backend que las consultas, para que el índice
+        y las consultas estén en el mismo espacio.
+        """
+        inputs = self.tokenizar(textos, return_tensors="pt", padding=True, truncation=True, max_length=128)
+        return self.backend.codificar(inputs)[0]
+    
+    def tokenizar(self, textos: List[str], **opciones) -> Dict[str, Any]:
+        """
+        Tokeniza como self.tokenizer, con los ids del vocabulario del modelo
         
-        return intent_probs
+        Con el vocabulario completo es lo mismo que llamar al tokenizador; con
+        uno reducido (modelo destilado), los tokens que el modelo no conserva
+        pasan a [UNK].
+        """
+        codificacion = self.tokenizer(textos, **opciones)
+        if self._mapa_tokens is not None:
+            ids = codificacion["input_ids"]
+            if isinstance(ids, torch.Tensor):
+                codificacion["input_ids"] = self._mapa_tokens[ids]
+            else:
+                codificacion["input_ids"] = [self._mapa_tokens[torch.tensor(fila, dtype=torch.long)].tolist() for fila in ids]
+        return codificacion
+    
+    def agregar_ejemplos(self, ejemplos: List[Dict[str, str]]) -> float:
+        """
+        Añade ejemplos al índice kNN sin reentrenar el modelo
+        
+        Returns:
+            Milisegundos que tardó la actualización del índice
+        
+        Raises:
+            ValueError: Si el clasificador kNN no está activado
+        """
+        if self.knn is None:
+            raise ValueError("El clasificador kNN no está activado (BERT_CLASIFICADOR=cabeza)")
+        
+        desconocidas = sorted({str(e.get("intencion")) for e in ejemplos} - set(self.intent_labels))
+        if desconocidas:
+            raise ValueError(f"Intenciones desconocidas: {', '.join(desconocidas)} "
+                             f"(opciones: {', '.join(self.intent_labels)})")
+        
+        milisegundos = self.knn.agregar(ejemplos)
+        self.invalidar_cache_analisis()
+        return milisegundos
+    
+    @staticmethod
+    def _resolver_ruta(model_path: Optional[str]) -> Optional[str]:
+        """
+        Archivo de pesos a cargar, o None para usar el modelo base
+        
+        Si la ruta configurada no existe pero sí el mismo modelo en el otro
+        formato (.safetensors o .pt), se carga ese.
+        """
+        if not model_path:
+            return None
+        if os.path.exists(model_path):
+            return model_path
+        
+        base = os.path.splitext(model_path)[0]
+        for alternativa in (f"{base}.safetensors", f"{base}.pt"):
+            if os.path.exists(alternativa):
+                print(f"No se encontró {model_path}; se carga {alternativa}")
+                return alternativa
+        
+        print(f"No se encontró {model_path}; se usa el modelo base sin ajustar")
+        return None
+    
+    def _ruta_guardado(self) -> str:
+        """
+        Archivo en el que fine_tune guarda los pesos: el que se cargó o, si no
+        existía, el configurado (BERT_MODEL_PATH), para que el siguiente
+        arranque use el modelo reentrenado. Sin ninguno, el nombre por defecto.
+        """
+        ruta = self.model_path or self.ruta_configurada or (RUTA_ESTUDIANTE if self.destilado else RUTA_MODELO)
+        if not es_safetensors(ruta):
+            # Los pesos se guardan siempre en safetensors (junto al .pt anterior)
+            ruta = f"{os.path.splitext(ruta)[0]}.safetensors"
+            print(f"El modelo se guarda en formato safetensors: define BERT_MODEL_PATH={ruta} para usarlo")
+        return ruta
+    
+    def _firma_modelo(self) -> str:
+        """
+        Identifica los pesos cargados y el backend, para saber si el índice kNN
+        es de este modelo (int8 y onnx dan embeddings algo distintos de pytorch)
+        """
+        if self.model_path and os.path.exists(self.model_path):
+            return f"{os.path.abspath(self.model_path)}:{os.path.getmtime(self.model_path)}:{self.backend_nombre}"
+        return f"bert-base-multilingual-cased:{self.backend_nombre}"
+    
+    @staticmethod
+    def _cargar_ejemplos() -> List[Dict[str, str]]:
+        """
+        Ejemplos con los que se construye el índice kNN la primera vez
+        """
+        ruta = os.getenv("BERT_EJEMPLOS", "ejemplos_entrenamiento.json")
+        if not os.path.exists(ruta):
+            return []
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def estadisticas_inferencia(self) -> Dict[str, Any]:
+        """
+        Profundidad de la cola de inferencia, tamaños de lote y uso de la caché de análisis
+        """
+        return {
+            "tiempos_carga": self.tiempos_carga,
+            "clasificador": self.modo_clasificacion,
+            "ejemplos_knn": len(self.knn) if self.knn is not None else 0,
+            "cola": self.cola.estadisticas(),
+            "cache_analisis": {nombre: cache.estadisticas() for nombre, cache in self.cache_analisis.items()}
+        }
+    
+    def invalidar_cache_analisis(self):
+        """
+        Vacía la caché de análisis (tras reentrenar el modelo)
+        """
+        for cache in self.cache_analisis.values():
+            cache.invalidar()
+    
+    @staticmethod
+    def _normalizar(query: str) -> str:
+        """
+        Clave de caché de una consulta: sin mayúsculas ni espacios sobrantes
+        """
+        return " ".join(query.casefold().split())
     
     def extract_entities(self, query: str) -> Dict[str, Any]:
         """
         Extrae entidades como años, países y nombres de jugadores
         usando reglas simples y listas predefinidas
         """
-        query = query.lower()
+        entities = self.cache_analisis["entidades"].obtener(
+            self._normalizar(query), lambda: self._extract_entities(query)
+        )
+        return dict(entities)
+    
+    def _extract_entities(self, query: str) -> Dict[str, Any]:
+        """
+        Extracción de entidades sin caché: el año con una expresión regular,
+        países y jugadores con una sola pasada del gazetteer
+        """
         entities = {
             "anio": None,
             "pais": None,
@@ -98,25 +444,33 @@ class BERTProcessor:
         if anio_match:
             entities["anio"] = int(anio_match.group(1))
         
-        # Extraer país
-        for pais in self.paises:
-            if pais in query:
-                entities["pais"] = pais.capitalize()
-                break
-        
-        # Extraer posible jugador (esto es muy básico, se podría mejorar)
-        # Aquí solo detectamos nombres propios que son capitalziados y no son países
-        palabras = query.split()
-        for palabra in palabras:
-            if (len(palabra) > 3 and 
-                palabra[0].isupper() and 
-                palabra.lower() not in self.paises and
-                palabra.lower() not in ["mundial", "copa", "mundo", "quien", "quién", "cuándo", "cuando"]):
-                entities["jugador"] = palabra
-                break
+        # Extraer país y jugador
+        entities.update(self.gazetteer.extraer(query))
         
         return entities
     
+    def actualizar_entidades(self, paises: List[str] = (), jugadores: List[str] = ()) -> int:
+        """
+        Añade al gazetteer los países y jugadores que aún no conoce
+        
+        Returns:
+            Número de nombres nuevos
+        """
+        nuevos = 0
+        for pais in paises:
+            if ("pais", pais.capitalize()) not in self.gazetteer:
+                self.gazetteer.agregar_pais(pais)
+                nuevos += 1
+        for jugador in jugadores:
+            if ("jugador", jugador) not in self.gazetteer:
+                self.gazetteer.agregar_jugador(jugador)
+                nuevos += 1
+        
+        # Las entidades cacheadas pueden haber cambiado
+        if nuevos:
+            self.cache_analisis["entidades"].invalidar()
+        return nuevos
+    
     def analyze_query(self, query: str) -> Dict[str, Any]:
         """
         Analiza una consulta y devuelve la intención y entidades detectadas
@@ -136,88 +490,165 @@ class BERTProcessor:
             "all_intents": intent_probs
         }
     
-    def fine_tune(self, training_data: List[Dict[str, str]], epochs: int = 3):
+    def fine_tune(self, training_data: List[Dict[str, str]], epochs: int = 3,
+                  progreso: Optional[Callable[[int, int, float], None]] = None,
+                  tamano_lote: Optional[int] = None, capas_congeladas: Optional[int] = None,
+                  bf16: Optional[bool] = None, acumulacion: Optional[int] = None,
+                  lr: float = 5e-5) -> List[Dict[str, float]]:
         """
         Realiza un fine-tuning del modelo con ejemplos específicos
         
+        Los lotes se forman con ejemplos de longitud parecida y se rellenan solo
+        hasta el más largo de cada lote. Opcionalmente se congelan los embeddings
+        y las primeras capas del encoder (menos gradientes que calcular), se usa
+        autocast bf16 y se acumulan gradientes de varios lotes por paso. Los
+        valores por defecto salen de las variables BERT_ENTRENAMIENTO_*.
+        
         Args:
             training_data: Lista de diccionarios con 'texto' e 'intencion'
             epochs: Número de épocas de entrenamiento
+            progreso: Función llamada al terminar cada época con
+                (época, total de épocas, pérdida media)
+            tamano_lote: Ejemplos por lote
+            capas_congeladas: Capas inferiores del encoder que no se actualizan
+            bf16: Si se usa autocast bfloat16 (en CPU solo acelera con soporte
+                AVX-512 BF16 o AMX)
+            acumulacion: Lotes cuyos gradientes se acumulan antes de cada paso
+                del optimizador
+            lr: Tasa de aprendizaje
+        
+        Returns:
+            Métricas de cada época (pérdida, segundos y ejemplos por segundo)
         """
+        tamano_lote = tamano_lote or int(os.getenv("BERT_ENTRENAMIENTO_LOTE", "8"))
+        if capas_congeladas is None:
+            capas_congeladas = int(os.getenv("BERT_ENTRENAMIENTO_CAPAS_CONGELADAS", "0"))
+        if bf16 is None:
+            bf16 = os.getenv("BERT_ENTRENAMIENTO_BF16", "false").lower() == "true"
+        acumulacion = max(1, acumulacion or int(os.getenv("BERT_ENTRENAMIENTO_ACUMULACION", "1")))
+        
         # Configurar para entrenamiento
+        device = self.device
+        self.model.to(device)
         self.model.train()
+        congelados = self._congelar_capas(capas_congeladas)
         
-        # Preparar optimizer
-        optimizer = torch.optim.AdamW(self.model.parameters(), lr=5e-5)
+        # Preparar optimizer (solo con los parámetros que se entrenan)
+        entrenables = [p for p in self.model.parameters() if p.requires_grad]
+        optimizer = torch.optim.AdamW(entrenables, lr=lr)
         
-        # Preparar datos
+        # Preparar datos: tokenizar sin relleno; cada lote se rellena al formarse
         texts = [item['texto'] for item in training_data]
         labels = [self.intent_labels.index(item['intencion']) for item in training_data]
+        encodings = self.tokenizar(texts, truncation=True, max_length=128)
+        longitudes = [len(ids) for ids in encodings['input_ids']]
         
-        # Tokenizar
-        encodings = self.tokenizer(
-            texts,
-            padding=True,
-            truncation=True,
-            max_length=128,
-            return_tensors="pt"
-        )
-        
-        # Preparar dataset
-        class IntentDataset(torch.utils.data.Dataset):
-            def __init__(self, encodings, labels):
-                self.encodings = encodings
-                self.labels = labels
-                
-            def __getitem__(self, idx):
-                item = {key: val[idx] for key, val in self.encodings.items()}
-                item['labels'] = torch.tensor(self.labels[idx])
-                return item
-            
-            def __len__(self):
-                return len(self.labels)
-        
-        dataset = IntentDataset(encodings, labels)
-        dataloader = torch.utils.data.DataLoader(dataset, batch_size=8, shuffle=True)
-        
-        # Entrenamiento
-        device = self.device
-        self.model.to(device)
+        print(f"Entrenando con {len(texts)} ejemplos: lotes de {tamano_lote}, acumulación {acumulacion}, "
+              f"{capas_congeladas} capas congeladas ({sum(p.numel() for p in entrenables) / 1e6:.1f}M "
+              f"parámetros entrenables), bf16 {'sí' if bf16 else 'no'}")
         
-        for epoch in range(epochs):
-            total_loss = 0
-            for batch in dataloader:
-                optimizer.zero_grad()
-                
-                # Mover batch al dispositivo
-                input_ids = batch['input_ids'].to(device)
-                attention_mask = batch['attention_mask'].to(device)
-                labels = batch['labels'].to(device)
-                
-                # Forward pass
-                outputs = self.model(
-                    input_ids=input_ids,
-                    attention_mask=attention_mask,
-                    labels=labels
-                )
+        metricas = []
+        try:
+            for epoch in range(epochs):
+                inicio = time.perf_counter()
+                total_loss = 0
+                lotes = lotes_por_longitud(longitudes, tamano_lote)
+                optimizer.zero_grad(set_to_none=True)
                 
-                loss = outputs.loss
-                total_loss += loss.item()
+                for paso, indices in enumerate(lotes, start=1):
+                    batch = self.tokenizer.pad(
+                        {'input_ids': [encodings['input_ids'][i] for i in indices],
+                         'attention_mask': [encodings['attention_mask'][i] for i in indices]},
+                        return_tensors="pt"
+                    )
+                    
+                    # Mover batch al dispositivo
+                    input_ids = batch['input_ids'].to(device)
+                    attention_mask = batch['attention_mask'].to(device)
+                    batch_labels = torch.tensor([labels[i] for i in indices], device=device)
+                    
+                    # Forward pass
+                    with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=bf16):
+                        outputs = self.model(
+                            input_ids=input_ids,
+                            attention_mask=attention_mask,
+                            labels=batch_labels
+                        )
+                    
+                    loss = outputs.loss
+                    total_loss += loss.item()
+                    
+                    # Backward pass (un paso del optimizador cada `acumulacion` lotes)
+                    (loss / acumulacion).backward()
+                    if paso % acumulacion == 0 or paso == len(lotes):
+                        optimizer.step()
+                        optimizer.zero_grad(set_to_none=True)
                 
-                # Backward pass
-                loss.backward()
-                optimizer.step()
-            
-            avg_loss = total_loss / len(dataloader)
-            print(f"Epoch {epoch+1}/{epochs} - Avg. Loss: {avg_loss:.4f}")
+                segundos = time.perf_counter() - inicio
+                avg_loss = total_loss / len(lotes)
+                metricas.append({
+                    'perdida': avg_loss,
+                    'segundos': segundos,
+                    'ejemplos_por_segundo': len(texts) / segundos
+                })
+                print(f"Epoch {epoch+1}/{epochs} - Avg. Loss: {avg_loss:.4f} - "
+                      f"{segundos:.1f}s ({len(texts) / segundos:.1f} ejemplos/s)")
+                if progreso:
+                    progreso(epoch + 1, epochs, avg_loss)
+        finally:
+            # Las capas congeladas vuelven a ser entrenables para el próximo fine-tuning
+            for parametro in congelados:
+                parametro.requires_grad = True
         
         # Guardar modelo entrenado
-        torch.save(self.model.state_dict(), 'mundiales_bert_model.pt')
-        print("Modelo guardado como: mundiales_bert_model.pt")
+        ruta = self._ruta_guardado()
+        guardar_modelo(self.model, ruta, destilado=self.destilado, metadatos={
+            "etiquetas": self.intent_labels,
+            "vocabulario": self.vocabulario,
+            "entrenamiento": {
+                "ejemplos": len(texts),
+                "epochs": epochs,
+                "perdida": metricas[-1]['perdida'] if metricas else None,
+                "segundos": sum(m['segundos'] for m in metricas)
+            }
+        })
+        print(f"Modelo guardado como: {ruta}")
+        
+        # Reconstruir el backend con los nuevos pesos; los análisis anteriores
+        # corresponden al modelo sin reentrenar
+        self.backend = crear_backend(self.backend_nombre, self.model, self.device,
+                                     ruta, reexportar=True)
+        self.invalidar_cache_analisis()
+        self.model_path = ruta
+        
+        # Los embeddings del índice kNN también cambian con los pesos
+        if self.knn is not None:
+            self.model.eval()
+            self.knn.firma = self._firma_modelo()
+            self.knn.construir(self.knn.ejemplos())
         
         # Volver a modo evaluación
         self.model.eval()
         
+        return metricas
+    
+    def _congelar_capas(self, capas: int) -> List[Any]:
+        """
+        Desactiva el gradiente de los embeddings y de las primeras capas del encoder
+        
+        Returns:
+            Parámetros congelados (para volver a activarlos al terminar)
+        """
+        if capas <= 0:
+            return []
+        
+        bert = self.model.bert
+        modulos = [bert.embeddings] + list(bert.encoder.layer[:capas])
+        congelados = [p for modulo in modulos for p in modulo.parameters() if p.requires_grad]
+        for parametro in congelados:
+            parametro.requires_grad = False
+        return congelados
+        
 # Ejemplo de uso
 if __name__ == "__main__":
     processor = BERTProcessor()
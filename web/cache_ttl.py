@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class CacheTTL:
+    """
+    Caché en memoria con caducidad por entrada (TTL), límite de tamaño con
+    expulsión LRU y contadores de aciertos/fallos.
+
+    Es segura entre hilos. Los valores None no se guardan, para que un error
+    puntual de la API no quede cacheado.
+    """
+
+    def __init__(self, ttl: float, max_entradas: Optional[int] = None):
+        """
+        Args:
+            ttl: Segundos de vida de cada entrada (None o 0 para no caducar)
+            max_entradas: Número máximo de entradas (None para no limitar)
+        """
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def get(self, clave: Hashable) -> Optional[Any]:
+        """
+        Devuelve el valor cacheado o None si no existe o caducó
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                guardado, valor = entrada
+                if not self.ttl or time.monotonic() - guardado < self.ttl:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+
+            self.fallos += 1
+            return None
+
+    def poner(self, clave: Hashable, valor: Any):
+        """
+        Guarda un valor, expulsando la entrada menos usada si se supera el límite
+        """
+        if valor is None:
+            return
+
+        with self._lock:
+            self._entradas[clave] = (time.monotonic(), valor)
+            self._entradas.move_to_end(clave)
+            if self.max_entradas is not None:
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.expulsiones += 1
+
+    def obtener(self, clave: Hashable, cargar: Callable[[], Any]) -> Optional[Any]:
+        """
+        Devuelve el valor cacheado o lo carga con `cargar` y lo guarda
+        """
+        valor = self.get(clave)
+        if valor is None:
+            valor = cargar()
+            self.poner(clave, valor)
+        return valor
+
+    def invalidar(self, clave: Optional[Hashable] = None):
+        """
+        Elimina una entrada, o todas si no se indica clave
+        """
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Contadores de uso de la caché
+        """
+        total = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "tasa_aciertos": self.aciertos / total if total else 0.0
+        }
+
+def crear_caches_agente() -> Dict[str, CacheTTL]:
+    """
+    Cachés por endpoint de los agentes de consulta, con TTL configurable por
+    variables de entorno y límite LRU para los detalles y las búsquedas
+    """
+    return {
+        "paises": CacheTTL(ttl=float(os.getenv("CACHE_TTL_LISTAS", "300"))),
+        "mundiales": CacheTTL(ttl=float(os.getenv("CACHE_TTL_LISTAS", "300"))),
+        "detalle": CacheTTL(ttl=float(os.getenv("CACHE_TTL_DETALLE", "600")),
+                            max_entradas=int(os.getenv("CACHE_MAX_DETALLES", "256"))),
+        "busqueda": CacheTTL(ttl=float(os.getenv("CACHE_TTL_BUSQUEDA", "120")),
+                             max_entradas=int(os.getenv("CACHE_MAX_BUSQUEDAS", "1024")))
+    }
@@ -0,0 +1,172 @@
+"""
+Clasificador de intenciones por vecinos más cercanos sobre embeddings.
+
+Cada ejemplo de entrenamiento se convierte una sola vez en un vector
+normalizado y la matriz resultante se guarda en disco (.npz). Para
+clasificar, la similitud coseno con todos los ejemplos es un único producto
+matricial de NumPy, y añadir ejemplos solo requiere calcular el embedding de
+los nuevos, sin reentrenar el modelo.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+class ClasificadorKNN:
+    """
+    Índice de embeddings de ejemplos etiquetados con clasificación kNN por coseno
+    """
+
+    def __init__(self, embeder: Callable[[List[str]], np.ndarray], intent_labels: List[str],
+                 ruta: str = "indice_ejemplos.npz", k: int = 5, firma: str = ""):
+        """
+        Args:
+            embeder: Función que convierte una lista de textos en una matriz de embeddings
+            intent_labels: Intenciones posibles (orden de las probabilidades)
+            ruta: Archivo donde se guarda el índice
+            k: Número de vecinos que votan
+            firma: Identifica el modelo que genera los embeddings; si el índice
+                guardado tiene otra firma se recalcula
+        """
+        self.embeder = embeder
+        self.intent_labels = list(intent_labels)
+        self.ruta = ruta
+        self.k = k
+        self.firma = firma
+
+        self.matriz = np.zeros((0, 0), dtype=np.float32)
+        self.etiquetas = np.zeros(0, dtype=np.int64)
+        self.textos: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+    def cargar(self, ejemplos: Optional[List[Dict[str, str]]] = None) -> bool:
+        """
+        Carga el índice de disco; si no existe o es de otro modelo, lo construye
+
+        Args:
+            ejemplos: Ejemplos con 'texto' e 'intencion' para construirlo si no existe
+
+        Returns:
+            True si el índice tiene ejemplos
+        """
+        if os.path.exists(self.ruta):
+            try:
+                with np.load(self.ruta, allow_pickle=False) as datos:
+                    if str(datos["firma"]) == self.firma:
+                        self.matriz = datos["matriz"]
+                        self.etiquetas = datos["etiquetas"]
+                        self.textos = [str(texto) for texto in datos["textos"]]
+                        print(f"Índice kNN cargado de {self.ruta}: {len(self)} ejemplos")
+                        return len(self) > 0
+
+                    # Mismos ejemplos (incluidos los añadidos después), embeddings de otro modelo
+                    ejemplos = [
+                        {"texto": str(texto), "intencion": self.intent_labels[int(etiqueta)]}
+                        for texto, etiqueta in zip(datos["textos"], datos["etiquetas"])
+                    ]
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Error al leer el índice kNN, se reconstruye: {e}")
+
+        if ejemplos:
+            self.construir(ejemplos)
+        return len(self) > 0
+
+    def construir(self, ejemplos: List[Dict[str, str]]):
+        """
+        Calcula los embeddings de todos los ejemplos y guarda el índice
+        """
+        inicio = time.perf_counter()
+        self.matriz = np.zeros((0, 0), dtype=np.float32)
+        self.etiquetas = np.zeros(0, dtype=np.int64)
+        self.textos = []
+        self._anadir(ejemplos)
+        self.guardar()
+        print(f"Índice kNN construido con {len(self)} ejemplos en {time.perf_counter() - inicio:.2f}s")
+
+    def agregar(self, ejemplos: List[Dict[str, str]]) -> float:
+        """
+        Añade ejemplos al índice (solo se calculan sus embeddings) y lo guarda
+
+        Returns:
+            Milisegundos que tardó la actualización
+        """
+        inicio = time.perf_counter()
+        self._anadir(ejemplos)
+        self.guardar()
+        return (time.perf_counter() - inicio) * 1000
+
+    def _anadir(self, ejemplos: List[Dict[str, str]]):
+        """
+        Calcula y normaliza los embeddings de los ejemplos y los apila al índice
+        """
+        ejemplos = [e for e in ejemplos if e.get("intencion") in self.intent_labels and e.get("texto")]
+        if not ejemplos:
+            return
+
+        vectores = self._normalizar(np.asarray(self.embeder([e["texto"] for e in ejemplos]), dtype=np.float32))
+        etiquetas = np.array([self.intent_labels.index(e["intencion"]) for e in ejemplos], dtype=np.int64)
+
+        with self._lock:
+            self.matriz = vectores if not len(self) else np.vstack([self.matriz, vectores])
+            self.etiquetas = np.concatenate([self.etiquetas, etiquetas])
+            self.textos.extend(e["texto"] for e in ejemplos)
+
+    def ejemplos(self) -> List[Dict[str, str]]:
+        """
+        Ejemplos del índice, en el formato de ejemplos_entrenamiento.json
+        """
+        with self._lock:
+            return [{"texto": texto, "intencion": self.intent_labels[int(etiqueta)]}
+                    for texto, etiqueta in zip(self.textos, self.etiquetas)]
+
+    def guardar(self):
+        """
+        Guarda el índice en disco de forma atómica
+        """
+        temporal = f"{self.ruta}.tmp.npz"
+        try:
+            with self._lock:
+                np.savez(temporal, matriz=self.matriz, etiquetas=self.etiquetas,
+                         textos=np.array(self.textos, dtype=str), firma=np.array(self.firma))
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            print(f"Error al guardar el índice kNN: {e}")
+
+    def clasificar(self, embeddings: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Probabilidades de cada intención según los k vecinos más similares
+
+        Cada vecino vota por su intención con un peso exp(similitud / 0.1), de
+        modo que los ejemplos casi idénticos a la consulta dominan la votación.
+        """
+        with self._lock:
+            matriz, etiquetas = self.matriz, self.etiquetas
+
+        if not len(etiquetas):
+            return [{etiqueta: 1.0 / len(self.intent_labels) for etiqueta in self.intent_labels}
+                    for _ in range(len(embeddings))]
+
+        similitudes = self._normalizar(np.asarray(embeddings, dtype=np.float32)) @ matriz.T
+        k = min(self.k, len(etiquetas))
+        vecinos = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+
+        resultados = []
+        for fila, indices in zip(similitudes, vecinos):
+            pesos = np.exp((fila[indices] - fila[indices].max()) / 0.1)
+            votos = np.bincount(etiquetas[indices], weights=pesos, minlength=len(self.intent_labels))
+            votos /= votos.sum()
+            resultados.append({etiqueta: float(votos[i]) for i, etiqueta in enumerate(self.intent_labels)})
+        return resultados
+
+    @staticmethod
+    def _normalizar(vectores: np.ndarray) -> np.ndarray:
+        """
+        Normaliza cada fila a norma 1 (el producto escalar pasa a ser el coseno)
+        """
+        normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+        return vectores / np.maximum(normas, 1e-12)
@@ -0,0 +1,175 @@
+"""
+Cliente HTTP compartido para la API de mundiales.
+
+Todos los agentes usan el mismo cliente por URL base, con:
+
+- Una sesión con conexiones persistentes (keep-alive) y un pool acotado.
+- Timeouts de conexión y de lectura, para que una llamada colgada no
+  bloquee indefinidamente un worker de Flask.
+- Reintentos con espera exponencial solo para las peticiones idempotentes
+  (GET/HEAD) y los errores transitorios (conexión, 502/503/504).
+- Estadísticas de latencia y errores por endpoint.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Latencias que se guardan por endpoint para calcular los percentiles
+MUESTRAS_LATENCIA = 1000
+
+class ClienteAPI:
+    """
+    Sesión HTTP con pool de conexiones, timeouts, reintentos y estadísticas
+    """
+
+    def __init__(self, base_url: str, timeout_conexion: Optional[float] = None,
+                 timeout_lectura: Optional[float] = None, reintentos: Optional[int] = None,
+                 max_conexiones: Optional[int] = None, backoff: float = 0.3):
+        """
+        Args:
+            base_url: URL base de la API (por ejemplo http://localhost:3000/api)
+            timeout_conexion: Segundos para establecer la conexión (API_TIMEOUT_CONEXION)
+            timeout_lectura: Segundos de espera de la respuesta (API_TIMEOUT_LECTURA)
+            reintentos: Reintentos de las peticiones GET (API_REINTENTOS)
+            max_conexiones: Conexiones abiertas a la vez por host (API_MAX_CONEXIONES)
+            backoff: Factor de la espera exponencial entre reintentos (0.3, 0.6, 1.2 s...)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (
+            timeout_conexion or float(os.getenv("API_TIMEOUT_CONEXION", "3")),
+            timeout_lectura or float(os.getenv("API_TIMEOUT_LECTURA", "10"))
+        )
+        if reintentos is None:
+            reintentos = int(os.getenv("API_REINTENTOS", "2"))
+        max_conexiones = max_conexiones or int(os.getenv("API_MAX_CONEXIONES", "16"))
+
+        reintento = Retry(
+            total=reintentos,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_conexiones, max_retries=reintento)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._latencias: Dict[str, deque] = {}
+        self._contadores: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Petición GET (con reintentos); lanza RequestException si falla
+        """
+        return self._peticion("GET", endpoint, **kwargs)
+
+    def post(self, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Petición POST (sin reintentos: no es idempotente); lanza RequestException si falla
+        """
+        return self._peticion("POST", endpoint, **kwargs)
+
+    def get_json(self, endpoint: str) -> Any:
+        """
+        GET que devuelve el JSON de la respuesta, o None si la petición falla
+        """
+        try:
+            response = self.get(endpoint)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error al obtener datos de la API: {e}")
+            return None
+
+    def post_json(self, endpoint: str, data: Any) -> Any:
+        """
+        POST de un JSON que devuelve el JSON de la respuesta, o None si falla
+        """
+        try:
+            response = self.post(endpoint, json=data)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error al enviar datos a la API: {e}")
+            return None
+
+    def _peticion(self, metodo: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Ejecuta la petición con el timeout por defecto y registra su latencia
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        clave = f"{metodo} {self._plantilla(endpoint)}"
+        inicio = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(metodo, f"{self.base_url}/{endpoint}", **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            self._registrar(clave, (time.perf_counter() - inicio) * 1000, error)
+
+    @staticmethod
+    def _plantilla(endpoint: str) -> str:
+        """
+        Agrupa los endpoints con parámetros ("mundiales/3?x=1" -> "mundiales/:id")
+        """
+        return re.sub(r"/\d+(?=/|$)", "/:id", endpoint.split("?")[0])
+
+    def _registrar(self, clave: str, milisegundos: float, error: bool):
+        with self._lock:
+            if clave not in self._latencias:
+                self._latencias[clave] = deque(maxlen=MUESTRAS_LATENCIA)
+                self._contadores[clave] = {"peticiones": 0, "errores": 0}
+            self._latencias[clave].append(milisegundos)
+            self._contadores[clave]["peticiones"] += 1
+            self._contadores[clave]["errores"] += error
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        """
+        Peticiones, errores y latencia (p50, p95 y máxima, en ms) por endpoint
+        """
+        with self._lock:
+            resultado = {}
+            for clave, latencias in self._latencias.items():
+                ordenadas = sorted(latencias)
+                resultado[clave] = dict(
+                    self._contadores[clave],
+                    p50_ms=round(ordenadas[len(ordenadas) // 2], 2),
+                    p95_ms=round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))], 2),
+                    max_ms=round(ordenadas[-1], 2)
+                )
+            return resultado
+
+# Un cliente por URL base, compartido por todos los agentes
+_clientes: Dict[str, ClienteAPI] = {}
+_lock_clientes = threading.Lock()
+
+def obtener_cliente(base_url: str) -> ClienteAPI:
+    """
+    Cliente compartido para una URL base (se crea en el primer uso)
+    """
+    with _lock_clientes:
+        if base_url not in _clientes:
+            _clientes[base_url] = ClienteAPI(base_url)
+        return _clientes[base_url]
+
+def estadisticas_clientes() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Estadísticas de todos los clientes, por URL base
+    """
+    with _lock_clientes:
+        clientes = dict(_clientes)
+    return {base_url: cliente.estadisticas() for base_url, cliente in clientes.items()}
@@ -0,0 +1,157 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Marca para detener el hilo de la cola
+_DETENER = object()
+
+class ColaInferencia:
+    """
+    Cola de inferencia con micro-lotes.
+
+    Las peticiones concurrentes se encolan y un único hilo las agrupa: tras
+    recibir la primera, espera como mucho `ventana_ms` milisegundos (o hasta
+    reunir `max_lote` elementos) y procesa todas juntas con una sola llamada
+    a `procesar_lote`. Cada llamador espera solo su resultado.
+
+    Una vez detenida, las entradas que aún lleguen se procesan en el hilo del
+    llamador, sin lote: nunca se encola nada detrás de la marca de parada.
+    """
+
+    def __init__(self, procesar_lote: Callable[[List[Any]], List[Any]], ventana_ms: float = 5, max_lote: int = 16,
+                 timeout: Optional[float] = 30):
+        """
+        Args:
+            procesar_lote: Función que recibe una lista de entradas y devuelve
+                la lista de resultados en el mismo orden
+            ventana_ms: Milisegundos que se espera a más entradas tras la primera
+            max_lote: Tamaño máximo de cada lote
+            timeout: Segundos que enviar() espera su resultado por defecto
+                (None: sin límite)
+        """
+        self.procesar_lote = procesar_lote
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max(1, max_lote)
+        self.timeout = timeout
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo = None
+        self._detenida = False
+        self._lock = threading.Lock()
+
+        # Estadísticas de uso
+        self.lotes = 0
+        self.elementos = 0
+        self.lote_maximo = 0
+        self.tamanos: Dict[int, int] = {}
+
+    def enviar(self, entrada: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Encola una entrada y espera su resultado
+
+        Args:
+            entrada: Entrada para `procesar_lote`
+            timeout: Segundos de espera (por defecto, los de la cola)
+
+        Raises:
+            concurrent.futures.TimeoutError: Si el resultado no llega a tiempo
+            La excepción que lance `procesar_lote` para el lote de la entrada
+        """
+        # Arrancar y encolar bajo el lock: detener() no puede colar la marca
+        # de parada entre las dos cosas
+        with self._lock:
+            encolada = not self._detenida
+            if encolada:
+                futuro = Future()
+                self._arrancar()
+                self._cola.put((entrada, futuro))
+        if not encolada:
+            return self.procesar_lote([entrada])[0]
+        return futuro.result(timeout=self.timeout if timeout is None else timeout)
+
+    def detener(self):
+        """
+        Termina el hilo de la cola cuando acabe de procesar lo pendiente
+        """
+        with self._lock:
+            self._detenida = True
+            if self._hilo is not None:
+                self._cola.put(_DETENER)
+                self._hilo = None
+
+    def _arrancar(self):
+        """
+        Arranca el hilo de la cola la primera vez que se usa (con el lock tomado)
+        """
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        """
+        Reúne entradas en lotes y los procesa hasta recibir la marca de parada
+        """
+        while True:
+            primero = self._cola.get()
+            if primero is _DETENER:
+                return
+
+            lote = [primero]
+            limite = time.monotonic() + self.ventana
+            detener = False
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if siguiente is _DETENER:
+                    detener = True
+                    break
+                lote.append(siguiente)
+
+            self._procesar(lote)
+            if detener:
+                return
+
+    def _procesar(self, lote: List[tuple]):
+        """
+        Ejecuta un lote y entrega a cada llamador su resultado (o el error)
+        """
+        entradas = [entrada for entrada, _ in lote]
+        try:
+            resultados = list(self.procesar_lote(entradas))
+            if len(resultados) != len(lote):
+                # Con zip, los llamadores sobrantes se quedarían esperando
+                raise RuntimeError(f"procesar_lote devolvió {len(resultados)} resultados para {len(lote)} entradas")
+        except Exception as e:
+            for _, futuro in lote:
+                futuro.set_exception(e)
+        else:
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+
+        with self._lock:
+            self.lotes += 1
+            self.elementos += len(lote)
+            self.lote_maximo = max(self.lote_maximo, len(lote))
+            self.tamanos[len(lote)] = self.tamanos.get(len(lote), 0) + 1
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Profundidad actual de la cola y tamaños de los lotes procesados
+        """
+        with self._lock:
+            return {
+                "en_cola": self._cola.qsize(),
+                "lotes": self.lotes,
+                "consultas": self.elementos,
+                "lote_medio": self.elementos / self.lotes if self.lotes else 0.0,
+                "lote_maximo": self.lote_maximo,
+                "tamanos_lote": dict(sorted(self.tamanos.items())),
+                "ventana_ms": self.ventana * 1000,
+                "max_lote": self.max_lote
+            }
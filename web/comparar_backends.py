@@ -0,0 +1,81 @@
+"""
+Script para comparar los backends de inferencia del clasificador BERT.
+
+Para cada backend (pytorch, int8, onnx) construido a partir de
+mundiales_bert_model.safetensors, clasifica los ejemplos de ejemplos_entrenamiento.json
+de uno en uno y muestra:
+
+- La precisión frente a la intención etiquetada (con los ejemplos por
+  defecto, también los del índice kNN si está activado).
+- La coincidencia de predicciones con el backend pytorch (paridad).
+- La latencia por consulta (p50 y p99).
+
+Uso:
+    python comparar_backends.py [--backends pytorch int8 onnx] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import numpy as np
+from dotenv import load_dotenv
+from backends_bert import BACKENDS
+from bert_processor import BERTProcessor, RUTA_MODELO
+from train_bert import cargar_ejemplos, aviso_conjunto_entrenamiento, medir_clasificacion
+
+# Cargar variables de entorno
+load_dotenv()
+
+def evaluar_backend(nombre, ejemplos, model_path, repeticiones=3):
+    """
+    Clasifica los ejemplos con un backend y mide su latencia
+
+    Returns:
+        (intenciones predichas, latencias en milisegundos)
+    """
+    processor = BERTProcessor(model_path=model_path, backend=nombre)
+    return medir_clasificacion(processor, ejemplos, repeticiones)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara precisión y latencia de los backends BERT")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--ejemplos", default="ejemplos_entrenamiento.json",
+                        help="Ejemplos etiquetados (por defecto los del entrenamiento)")
+    parser.add_argument("--modelo", default=os.getenv("BERT_MODEL_PATH", RUTA_MODELO))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    ejemplos = cargar_ejemplos(args.ejemplos)
+    if not ejemplos:
+        return
+
+    etiquetas = [ejemplo["intencion"] for ejemplo in ejemplos]
+    referencia = None
+    nombre_referencia = None
+    resultados = []
+
+    for nombre in args.backends:
+        print(f"\n=== Backend: {nombre} ===")
+        try:
+            predicciones, latencias = evaluar_backend(nombre, ejemplos, args.modelo, args.repeticiones)
+        except ImportError as e:
+            print(f"Backend {nombre} no disponible: {e}")
+            continue
+
+        if referencia is None:
+            referencia, nombre_referencia = predicciones, nombre
+
+        precision = np.mean([p == e for p, e in zip(predicciones, etiquetas)])
+        paridad = np.mean([p == r for p, r in zip(predicciones, referencia)])
+        resultados.append((nombre, precision, paridad, np.percentile(latencias, 50), np.percentile(latencias, 99)))
+
+    aviso = aviso_conjunto_entrenamiento(args.ejemplos)
+    columna = "Prec. entren." if aviso else "Precisión"
+    print(f"\n{'Backend':<10}{columna:>15}{'Paridad':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for nombre, precision, paridad, p50, p99 in resultados:
+        print(f"{nombre:<10}{precision:>15.1%}{paridad:>10.1%}{p50:>12.2f}{p99:>12.2f}")
+    print(f"\nParidad: coincidencia con el primer backend evaluado ({nombre_referencia})")
+    if aviso:
+        print(aviso)
+
+if __name__ == "__main__":
+    main()
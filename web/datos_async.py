@@ -0,0 +1,64 @@
+"""
+Capa de datos concurrente de los agentes de consulta.
+
+Cuando una respuesta necesita varios detalles de mundiales (por ejemplo todos
+los títulos de un país), las peticiones se lanzan a la vez en lugar de una
+tras otra, así que la latencia total es la de la más lenta y no la suma de
+todas. Las peticiones del repositorio son bloqueantes (con la API, el cliente
+HTTP compartido con su pool de conexiones), así que se reparten entre los
+hilos de un ThreadPoolExecutor que vive lo mismo que el agente; su número de
+hilos limita cuántas hay en vuelo.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from cache_ttl import CacheTTL
+from repositorio import Repositorio
+
+class DatosAsync:
+    """
+    Peticiones concurrentes de detalles de mundiales, con la caché del agente
+    """
+
+    def __init__(self, repositorio: Repositorio, cache_detalle: CacheTTL, max_concurrencia: Optional[int] = None):
+        """
+        Args:
+            repositorio: Origen de los datos (API o SQLite)
+            cache_detalle: Caché de detalles del agente (se consulta y se rellena)
+            max_concurrencia: Peticiones en vuelo a la vez (API_MAX_CONCURRENCIA)
+        """
+        self.repositorio = repositorio
+        self.cache_detalle = cache_detalle
+        self.max_concurrencia = max_concurrencia or int(os.getenv("API_MAX_CONCURRENCIA", "8"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrencia, thread_name_prefix="datos")
+
+    def mundial_detalle(self, mundial_id: int) -> Optional[Dict]:
+        """
+        Detalle de un mundial, de la caché o del repositorio
+
+        Returns:
+            El detalle, o None si no existe o no se pudo obtener
+        """
+        detalle = self.cache_detalle.get(mundial_id)
+        if detalle is None:
+            try:
+                detalle = self.repositorio.mundial(mundial_id)
+            except Exception as e:
+                print(f"Error al obtener el detalle del mundial {mundial_id}: {e}")
+                return None
+            self.cache_detalle.poner(mundial_id, detalle)
+        return detalle
+
+    def mundiales_detalle(self, ids: List[int]) -> List[Dict]:
+        """
+        Detalles de varios mundiales a la vez, en el mismo orden que los ids
+
+        Los que no se pudieron obtener se omiten, así que la lista puede ser
+        más corta que ids (vacía si falló todo).
+        """
+        if len(ids) <= 1:
+            detalles = [self.mundial_detalle(mundial_id) for mundial_id in ids]
+        else:
+            detalles = self._executor.map(self.mundial_detalle, ids)
+        return [detalle for detalle in detalles if detalle is not None]
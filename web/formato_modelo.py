@@ -0,0 +1,108 @@
+"""
+Formato de los pesos del modelo BERT: safetensors con metadatos.
+
+Un archivo safetensors es una cabecera JSON (nombre, tipo, forma y posición
+de cada tensor, más un diccionario "__metadata__") seguida de los datos en
+bruto. Aquí se guardan en los metadatos las etiquetas de intención, la
+configuración del modelo y las estadísticas del entrenamiento, de modo que:
+
+- La cabecera se puede leer sin cargar los pesos (ni importar torch).
+- Los pesos se cargan mapeando el archivo en memoria (mmap) en lugar de
+  deserializar un pickle: no se copian al arrancar, y varios procesos que
+  cargan el mismo archivo comparten sus páginas en la caché del sistema.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Versión de los metadatos que escribe guardar_pesos
+VERSION_FORMATO = "1"
+
+# Tipos de safetensors y su nombre en torch
+_TIPOS = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool"
+}
+
+def es_safetensors(ruta: str) -> bool:
+    """
+    Si el archivo de pesos está en formato safetensors (por su extensión)
+    """
+    return ruta.endswith(".safetensors")
+
+def leer_cabecera(ruta: str) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
+    """
+    Lee la cabecera de un archivo safetensors sin tocar los pesos
+
+    Returns:
+        (metadatos decodificados, descripción de los tensores, posición donde
+        empiezan los datos)
+    """
+    with open(ruta, "rb") as archivo:
+        (longitud,) = struct.unpack("<Q", archivo.read(8))
+        cabecera = json.loads(archivo.read(longitud))
+
+    metadatos = {}
+    for clave, valor in cabecera.pop("__metadata__", {}).items():
+        # Los metadatos de safetensors son cadenas; los nuestros van en JSON
+        try:
+            metadatos[clave] = json.loads(valor)
+        except ValueError:
+            metadatos[clave] = valor
+    return metadatos, cabecera, 8 + longitud
+
+def guardar_pesos(model, ruta: str, metadatos: Optional[Dict[str, Any]] = None):
+    """
+    Guarda el state_dict del modelo como safetensors, de forma atómica
+
+    Args:
+        model: Modelo de transformers (se guarda también su configuración)
+        ruta: Archivo .safetensors de destino
+        metadatos: Datos adicionales para la cabecera (etiquetas, entrenamiento...)
+    """
+    from safetensors.torch import save_file
+
+    cabecera = {
+        "formato": VERSION_FORMATO,
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": model.config.to_dict()
+    }
+    cabecera.update(metadatos or {})
+
+    pesos = {nombre: tensor.detach().cpu().contiguous() for nombre, tensor in model.state_dict().items()}
+    temporal = f"{ruta}.tmp"
+    save_file(pesos, temporal, metadata={clave: json.dumps(valor) for clave, valor in cabecera.items()})
+    os.replace(temporal, ruta)
+
+def cargar_pesos(ruta: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Carga los pesos mapeando el archivo en memoria, sin copiarlos
+
+    El mapeo es copy-on-write: las páginas se comparten entre procesos hasta
+    que alguno modifica un peso (por ejemplo al reentrenar), y entonces solo
+    ese proceso obtiene su copia de la página.
+
+    Returns:
+        (state_dict con tensores de CPU sobre el mmap, metadatos)
+    """
+    import torch
+
+    metadatos, tensores, inicio_datos = leer_cabecera(ruta)
+    with open(ruta, "rb") as archivo:
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    state_dict = {}
+    for nombre, info in tensores.items():
+        tipo = getattr(torch, _TIPOS[info["dtype"]])
+        desde, hasta = info["data_offsets"]
+        if hasta == desde:
+            state_dict[nombre] = torch.empty(info["shape"], dtype=tipo)
+            continue
+        tensor = torch.frombuffer(mapa, dtype=tipo, count=(hasta - desde) // tipo.itemsize,
+                                  offset=inicio_datos + desde)
+        state_dict[nombre] = tensor.view(info["shape"])
+    return state_dict, metadatos
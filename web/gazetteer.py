@@ -0,0 +1,210 @@
+"""
+Extractor de entidades por diccionario (gazetteer) con un autómata de
+Aho-Corasick.
+
+Los nombres de países y jugadores se normalizan (sin tildes ni mayúsculas) y
+se insertan en un trie. Con los enlaces de fallo del autómata, todas las
+apariciones de todos los nombres se encuentran en una sola pasada por la
+consulta, sin importar cuántos nombres haya. Añadir un nombre solo inserta su
+camino en el trie; los enlaces de fallo se recalculan al siguiente uso.
+"""
+
+import difflib
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+def normalizar(texto: str) -> str:
+    """
+    Texto sin tildes ni mayúsculas ("Pelé" -> "pele", "ESPAÑA" -> "espana")
+    """
+    descompuesto = unicodedata.normalize("NFD", texto)
+    return "".join(c for c in descompuesto if unicodedata.category(c) != "Mn").casefold()
+
+def clave_nombre(nombre: str) -> str:
+    """
+    Clave con la que se detectan nombres repetidos al registrarlos, la misma
+    que claveJugador en api/app.js: sin espacios finales, mayúsculas ni
+    tildes, pero distinguiendo la ñ ("Álvarez " -> "alvarez", "Muñoz" -> "muñoz")
+    """
+    descompuesto = unicodedata.normalize("NFD", nombre.rstrip().lower()).replace("n\u0303", "ñ")
+    return "".join(c for c in descompuesto if not "\u0300" <= c <= "\u036f")
+
+class Gazetteer:
+    """
+    Diccionario de entidades (tipo y valor canónico) buscado con Aho-Corasick
+    """
+
+    def __init__(self, difuso: bool = False, umbral_difuso: float = 0.8):
+        """
+        Args:
+            difuso: Si se buscan también palabras parecidas (errores de escritura)
+                cuando no hay coincidencia exacta
+            umbral_difuso: Similitud mínima (0-1) para aceptar una palabra parecida
+        """
+        self.difuso = difuso
+        self.umbral_difuso = umbral_difuso
+
+        # Trie: hijos, enlace de fallo, salidas propias y enlace a la siguiente salida
+        self._hijos: List[Dict[str, int]] = [{}]
+        self._fallo: List[int] = [0]
+        self._salidas: List[Set[Tuple[int, str, str]]] = [set()]
+        self._enlace_salida: List[int] = [0]
+        self._desactualizado = False
+        self._lock = threading.Lock()
+
+        # Palabras sueltas de los nombres, para la búsqueda difusa
+        self._palabras: Dict[str, Tuple[str, str]] = {}
+        self._valores: Set[Tuple[str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def __contains__(self, entidad: Tuple[str, str]) -> bool:
+        return entidad in self._valores
+
+    def agregar(self, texto: str, tipo: str, valor: Optional[str] = None):
+        """
+        Añade un nombre al diccionario
+
+        Args:
+            texto: Nombre tal como puede aparecer en la consulta
+            tipo: Tipo de entidad ("pais", "jugador")
+            valor: Valor que se devuelve al encontrarlo (por defecto el propio texto)
+        """
+        patron = normalizar(texto).strip()
+        if not patron:
+            return
+        valor = valor or texto
+
+        with self._lock:
+            nodo = 0
+            for caracter in patron:
+                siguiente = self._hijos[nodo].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self._hijos)
+                    self._hijos.append({})
+                    self._fallo.append(0)
+                    self._salidas.append(set())
+                    self._enlace_salida.append(0)
+                    self._hijos[nodo][caracter] = siguiente
+                nodo = siguiente
+
+            self._salidas[nodo].add((len(patron), tipo, valor))
+            self._valores.add((tipo, valor))
+            if " " not in patron:
+                self._palabras.setdefault(patron, (tipo, valor))
+            self._desactualizado = True
+
+    def agregar_pais(self, nombre: str):
+        """
+        Añade un país; el valor es el nombre con mayúscula inicial ("Brasil")
+        """
+        self.agregar(nombre, "pais", nombre.capitalize())
+
+    def agregar_jugador(self, nombre: str):
+        """
+        Añade un jugador por su nombre completo y por su apellido
+        ("Lionel Messi" también se encuentra como "Messi")
+        """
+        self.agregar(nombre, "jugador", nombre)
+        partes = nombre.split()
+        if len(partes) > 1 and len(partes[-1]) > 3:
+            self.agregar(partes[-1], "jugador", partes[-1])
+
+    def _construir_enlaces(self):
+        """
+        Calcula los enlaces de fallo y de salida recorriendo el trie por niveles
+        """
+        cola = deque()
+        for hijo in self._hijos[0].values():
+            self._fallo[hijo] = 0
+            self._enlace_salida[hijo] = 0
+            cola.append(hijo)
+
+        while cola:
+            nodo = cola.popleft()
+            for caracter, hijo in self._hijos[nodo].items():
+                fallo = self._fallo[nodo]
+                while fallo and caracter not in self._hijos[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._hijos[fallo].get(caracter, 0)
+                self._fallo[hijo] = destino if destino != hijo else 0
+                self._enlace_salida[hijo] = (
+                    self._fallo[hijo] if self._salidas[self._fallo[hijo]] else self._enlace_salida[self._fallo[hijo]]
+                )
+                cola.append(hijo)
+
+        self._desactualizado = False
+
+    def buscar(self, texto: str) -> List[Tuple[int, int, str, str]]:
+        """
+        Todas las apariciones de nombres completos (entre límites de palabra)
+
+        Returns:
+            Lista de (inicio, fin, tipo, valor) sobre el texto normalizado
+        """
+        with self._lock:
+            if self._desactualizado:
+                self._construir_enlaces()
+
+            texto = normalizar(texto)
+            encontrados = []
+            nodo = 0
+            for posicion, caracter in enumerate(texto):
+                while nodo and caracter not in self._hijos[nodo]:
+                    nodo = self._fallo[nodo]
+                nodo = self._hijos[nodo].get(caracter, 0)
+
+                salida = nodo if self._salidas[nodo] else self._enlace_salida[nodo]
+                while salida:
+                    for longitud, tipo, valor in self._salidas[salida]:
+                        inicio = posicion - longitud + 1
+                        if self._es_limite(texto, inicio - 1) and self._es_limite(texto, posicion + 1):
+                            encontrados.append((inicio, posicion + 1, tipo, valor))
+                    salida = self._enlace_salida[salida]
+
+        return encontrados
+
+    def extraer(self, texto: str) -> Dict[str, Optional[str]]:
+        """
+        Primera entidad de cada tipo en el texto
+
+        Si varias coincidencias se solapan gana la más larga ("Lionel Messi"
+        frente a "Messi"). Si falta algún tipo y la búsqueda difusa está
+        activa, se prueban las palabras del texto contra las de los nombres
+        conocidos (esto sí depende del número de nombres).
+        """
+        coincidencias = sorted(self.buscar(texto), key=lambda c: (-(c[1] - c[0]), c[0]))
+        ocupado = set()
+        elegidas = []
+        for inicio, fin, tipo, valor in coincidencias:
+            if not ocupado.intersection(range(inicio, fin)):
+                ocupado.update(range(inicio, fin))
+                elegidas.append((inicio, tipo, valor))
+
+        entidades: Dict[str, Optional[str]] = {"pais": None, "jugador": None}
+        for _, tipo, valor in sorted(elegidas):
+            if entidades.get(tipo) is None:
+                entidades[tipo] = valor
+
+        if self.difuso and (entidades["pais"] is None or entidades["jugador"] is None):
+            for palabra in normalizar(texto).split():
+                palabra = palabra.strip("¿?¡!.,;:\"'()")
+                if len(palabra) < 4:
+                    continue
+                parecidas = difflib.get_close_matches(palabra, self._palabras.keys(), n=1, cutoff=self.umbral_difuso)
+                if parecidas:
+                    tipo, valor = self._palabras[parecidas[0]]
+                    if entidades.get(tipo) is None:
+                        entidades[tipo] = valor
+
+        return entidades
+
+    @staticmethod
+    def _es_limite(texto: str, posicion: int) -> bool:
+        """
+        Si la posición está fuera del texto o no es parte de una palabra
+        """
+        return posicion < 0 or posicion >= len(texto) or not texto[posicion].isalnum()
@@ -0,0 +1,101 @@
+"""
+Importa una plantilla de jugadores desde un archivo CSV o JSON.
+
+Valida el archivo completo y lo registra con MundialesAkinator.registrar_lote:
+los países y mundiales que falten se crean una vez y los jugadores se
+escriben por lotes, en lugar de una petición por jugador.
+
+Columnas (CSV con cabecera, separado por comas, punto y coma o tabuladores):
+    nombre, pais, anio, posicion (id, nombre o abreviatura), titular
+
+El JSON puede ser una lista de jugadores o {"jugadores": [...]}.
+
+Uso:
+    python importar_jugadores.py plantilla.csv [--lote 500] [--api-url URL]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from typing import Dict, List
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Columnas sin las que no se puede leer un CSV (la posición puede ser posicion o posicion_id)
+COLUMNAS_OBLIGATORIAS = ["nombre", "pais", "anio"]
+
+def leer_filas(contenido: str, formato: str) -> List[Dict]:
+    """
+    Convierte el contenido de un archivo en una lista de filas
+
+    Args:
+        contenido: Texto del archivo
+        formato: "csv" o "json"
+
+    Raises:
+        ValueError: Si el formato no es válido o el contenido no se puede leer
+    """
+    if formato == "json":
+        datos = json.loads(contenido)
+        if isinstance(datos, dict):
+            datos = datos.get("jugadores")
+        if not isinstance(datos, list):
+            raise ValueError("El JSON debe ser una lista de jugadores o {\"jugadores\": [...]}")
+        return datos
+
+    if formato == "csv":
+        contenido = contenido.lstrip("\ufeff")
+        try:
+            dialecto = csv.Sniffer().sniff(contenido.split("\n", 1)[0], delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(io.StringIO(contenido), dialect=dialecto)
+        faltan = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in (lector.fieldnames or [])]
+        if faltan:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltan)}")
+        return [{clave.strip(): (valor or "").strip() for clave, valor in fila.items() if clave} for fila in lector]
+
+    raise ValueError(f"Formato desconocido: {formato} (opciones: csv, json)")
+
+def leer_archivo(ruta: str) -> List[Dict]:
+    """
+    Lee un archivo de jugadores; el formato se deduce de la extensión
+    """
+    formato = os.path.splitext(ruta)[1].lower().lstrip(".")
+    with open(ruta, encoding="utf-8") as f:
+        return leer_filas(f.read(), formato)
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa jugadores desde un archivo CSV o JSON")
+    parser.add_argument("archivo", help="Archivo .csv o .json con los jugadores")
+    parser.add_argument("--lote", type=int, default=None, help="Jugadores por escritura (REGISTRO_TAMANO_LOTE)")
+    parser.add_argument("--api-url", default=None, help="URL de la API (API_BASE_URL)")
+    args = parser.parse_args()
+
+    # Importación diferida: cargar el Akinator no es necesario para leer el archivo
+    from mundiales_akinator import MundialesAkinator
+
+    try:
+        filas = leer_archivo(args.archivo)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer {args.archivo}: {e}")
+        sys.exit(1)
+
+    akinator = MundialesAkinator(api_url=args.api_url)
+    akinator.cargar_datos()
+    resumen = akinator.registrar_lote(filas, tamano_lote=args.lote)
+
+    for error in resumen["errores"]:
+        print(error)
+    print(f"{resumen['filas']} filas en {resumen['segundos']:.3f}s ({resumen['filas_por_segundo']} filas/s): "
+          f"{resumen['insertados']} insertadas, {resumen['existentes']} ya existían, "
+          f"{resumen['mundiales_creados']} mundiales nuevos")
+    sys.exit(1 if resumen["errores"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict, List, Optional
+
+class IndiceCandidatos:
+    """
+    Índice de bits por atributo sobre una lista de candidatos.
+
+    Cada candidato ocupa una posición fija (su índice en la lista) y cada par
+    atributo/valor se compila en un entero cuyo bit i está encendido si el
+    candidato i tiene ese valor. Un conjunto de candidatos se representa con
+    una máscara, de modo que filtrar por una respuesta es un AND o un AND NOT.
+    """
+
+    def __init__(self, candidatos: List[Dict], atributos: Dict[str, Callable[[Dict], Any]]):
+        """
+        Args:
+            candidatos: Lista de candidatos (su orden define la posición de cada bit)
+            atributos: Nombre del atributo -> función que extrae su valor de un candidato
+        """
+        self.candidatos = list(candidatos)
+        self.todos = (1 << len(self.candidatos)) - 1
+        self.bitmaps: Dict[str, Dict[Any, int]] = {nombre: {} for nombre in atributos}
+
+        for posicion, candidato in enumerate(self.candidatos):
+            bit = 1 << posicion
+            for nombre, extraer in atributos.items():
+                valor = extraer(candidato)
+                self.bitmaps[nombre][valor] = self.bitmaps[nombre].get(valor, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self.candidatos)
+
+    def mascara(self, atributo: str, valor: Any) -> int:
+        """
+        Máscara de los candidatos cuyo atributo es igual al valor
+        """
+        return self.bitmaps.get(atributo, {}).get(valor, 0)
+
+    def valores(self, atributo: str, mascara: int) -> List[Any]:
+        """
+        Valores del atributo presentes en al menos un candidato de la máscara
+        """
+        return [valor for valor, bits in self.bitmaps.get(atributo, {}).items() if bits & mascara]
+
+    @staticmethod
+    def contar(mascara: int) -> int:
+        """
+        Número de candidatos en la máscara
+        """
+        return mascara.bit_count()
+
+    def primero(self, mascara: int) -> Optional[Dict]:
+        """
+        Primer candidato de la máscara (o None si está vacía)
+        """
+        if not mascara:
+            return None
+        return self.candidatos[(mascara & -mascara).bit_length() - 1]
+
+    @staticmethod
+    def posiciones(mascara: int) -> List[int]:
+        """
+        Posiciones de los candidatos contenidos en la máscara
+        """
+        resultado = []
+        while mascara:
+            bit = mascara & -mascara
+            resultado.append(bit.bit_length() - 1)
+            mascara ^= bit
+        return resultado
+
+    def candidatos_de(self, mascara: int) -> List[Dict]:
+        """
+        Lista de candidatos contenidos en la máscara
+        """
+        return [self.candidatos[posicion] for posicion in self.posiciones(mascara)]
@@ -0,0 +1,136 @@
+"""
+Índice local de búsqueda de jugadores por n-gramas.
+
+Sustituye a la búsqueda de la API (`LIKE '%q%'`, que no puede usar índices y
+cuesta un viaje de red por consulta). Cada nombre se normaliza (sin tildes ni
+mayúsculas) y se descompone en trigramas; un índice invertido asocia cada
+trigrama con los jugadores que lo contienen. Una búsqueda solo intersecta las
+listas de los trigramas de la consulta y comprueba los pocos candidatos que
+quedan, así que no recorre todos los jugadores.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+from gazetteer import normalizar
+
+# Campos de cada resultado (los mismos que devuelve /api/jugadores/buscar)
+CAMPOS_RESULTADO = ["id", "nombre", "posicion", "pais", "anio", "titular"]
+
+def limpiar(texto: str) -> str:
+    """
+    Texto normalizado con la puntuación como separador ("¿Pelé?" -> "pele")
+    """
+    return " ".join("".join(c if c.isalnum() else " " for c in normalizar(texto)).split())
+
+class IndiceJugadores:
+    """
+    Índice invertido de trigramas sobre los nombres de los jugadores
+    """
+
+    def __init__(self, n: int = 3):
+        """
+        Args:
+            n: Longitud de los n-gramas (las consultas más cortas no se indexan)
+        """
+        self.n = n
+        self._jugadores: List[Dict] = []
+        self._nombres: List[str] = []
+        self._claves: Set[Tuple] = set()
+        self._ngramas: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._jugadores)
+
+    @staticmethod
+    def _clave(jugador: Dict) -> Tuple:
+        """
+        Identifica un jugador por su id, nombre y mundial
+        """
+        return (jugador.get("id"), jugador.get("nombre"), jugador.get("mundial_id"), jugador.get("anio"))
+
+    def _ngramas_de(self, texto: str) -> Set[str]:
+        return {texto[i:i + self.n] for i in range(len(texto) - self.n + 1)}
+
+    def agregar(self, jugadores: Iterable[Dict]) -> int:
+        """
+        Añade jugadores al índice (los ya indexados se ignoran)
+
+        Returns:
+            Número de jugadores nuevos
+        """
+        nuevos = 0
+        with self._lock:
+            for jugador in jugadores:
+                clave = self._clave(jugador)
+                if clave in self._claves or not jugador.get("nombre"):
+                    continue
+
+                posicion = len(self._jugadores)
+                nombre = limpiar(jugador["nombre"])
+                self._claves.add(clave)
+                self._jugadores.append({campo: jugador.get(campo) for campo in CAMPOS_RESULTADO})
+                self._nombres.append(nombre)
+                for ngrama in self._ngramas_de(nombre):
+                    self._ngramas.setdefault(ngrama, set()).add(posicion)
+                nuevos += 1
+        return nuevos
+
+    def sincronizar(self, jugadores: List[Dict]) -> int:
+        """
+        Pone el índice al día con la lista completa de jugadores
+
+        Si la lista solo tiene jugadores nuevos (el caso de un registro) se
+        indexan únicamente esos; si falta alguno de los indexados, se
+        reconstruye desde cero.
+
+        Returns:
+            Número de jugadores indexados en esta llamada
+        """
+        claves = {self._clave(jugador) for jugador in jugadores}
+        with self._lock:
+            completo = self._claves <= claves
+            if not completo:
+                self._jugadores, self._nombres, self._claves, self._ngramas = [], [], set(), {}
+        return self.agregar(jugadores)
+
+    def buscar(self, consulta: str, limite: int = 0) -> List[Dict]:
+        """
+        Jugadores cuyo nombre contiene la consulta, sin distinguir tildes ni mayúsculas
+
+        Se ordenan por relevancia: primero el nombre exacto, luego los que
+        tienen una palabra que empieza por la consulta y después el resto;
+        dentro de cada grupo, del mundial más reciente al más antiguo y por
+        nombre (el orden de la API).
+
+        Args:
+            consulta: Texto a buscar (al menos n caracteres)
+            limite: Máximo de resultados (0 = sin límite)
+        """
+        consulta = limpiar(consulta)
+        if len(consulta) < self.n:
+            return []
+
+        with self._lock:
+            # Intersectar las listas de los trigramas, de la más corta a la más larga
+            listas = sorted((self._ngramas.get(ngrama, set()) for ngrama in self._ngramas_de(consulta)), key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:]) if listas else set()
+
+            resultados = []
+            for posicion in candidatos:
+                nombre = self._nombres[posicion]
+                inicio = nombre.find(consulta)
+                if inicio < 0:
+                    continue
+                if nombre == consulta:
+                    relevancia = 0
+                elif inicio == 0 or not nombre[inicio - 1].isalnum():
+                    relevancia = 1
+                else:
+                    relevancia = 2
+                resultados.append((relevancia, self._jugadores[posicion]))
+
+        resultados.sort(key=lambda r: (r[0], -int(r[1]["anio"] or 0), r[1]["nombre"]))
+        if limite:
+            resultados = resultados[:limite]
+        return [dict(jugador) for _, jugador in resultados]
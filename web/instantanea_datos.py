@@ -0,0 +1,72 @@
+"""
+Instantánea local de los datos de mundiales (países, mundiales, posiciones
+y jugadores aplanados) para arrancar sin depender de la latencia de la API.
+
+Se guarda con pickle en un único archivo junto con una cabecera que indica
+la versión del formato, la fecha de creación y los ETag de cada endpoint,
+que se usan después para revalidar contra la API con peticiones condicionales.
+"""
+
+import os
+import pickle
+import time
+from typing import Dict, Optional
+
+# Versión del formato del archivo; si cambia, las instantáneas antiguas se ignoran
+FORMATO_VERSION = 1
+
+# Ruta por defecto de la instantánea
+RUTA_INSTANTANEA = os.getenv("DATOS_INSTANTANEA", "mundiales_datos.pkl")
+
+# Endpoints incluidos en la instantánea
+ENDPOINTS = ["paises", "mundiales", "posiciones", "jugadores"]
+
+def guardar_instantanea(datos: Dict, etags: Dict[str, Optional[str]], ruta: str = RUTA_INSTANTANEA) -> bool:
+    """
+    Guarda los datos y sus ETag en disco de forma atómica
+
+    Args:
+        datos: Diccionario con las claves de ENDPOINTS
+        etags: ETag devuelto por la API para cada endpoint (o None)
+        ruta: Archivo de destino
+    """
+    contenido = {
+        "formato": FORMATO_VERSION,
+        "creada": time.time(),
+        "etags": {endpoint: etags.get(endpoint) for endpoint in ENDPOINTS},
+        "datos": {endpoint: datos.get(endpoint) or [] for endpoint in ENDPOINTS}
+    }
+
+    try:
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(contenido, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        return True
+    except OSError as e:
+        print(f"Error al guardar la instantánea de datos: {e}")
+        return False
+
+def cargar_instantanea(ruta: str = RUTA_INSTANTANEA) -> Optional[Dict]:
+    """
+    Carga la instantánea de disco
+
+    Returns:
+        Diccionario con "datos", "etags" y "creada", o None si no existe
+        o su formato no es compatible
+    """
+    if not os.path.exists(ruta):
+        return None
+
+    try:
+        with open(ruta, "rb") as f:
+            contenido = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"Error al leer la instantánea de datos: {e}")
+        return None
+
+    if not isinstance(contenido, dict) or contenido.get("formato") != FORMATO_VERSION:
+        print(f"Instantánea de datos con formato incompatible, se ignora: {ruta}")
+        return None
+
+    return contenido
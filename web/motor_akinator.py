@@ -0,0 +1,365 @@
+import hashlib
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+from arbol_preguntas import ArbolPreguntas
+from indice_candidatos import IndiceCandidatos
+from preguntas import RegistroPreguntas
+
+# Respuestas reconocidas
+AFIRMATIVAS = ['sí', 'si', 's', 'yes', 'y']
+NO_SE = ['no sé', 'nose', 'no se', 'ns']
+
+# Respuesta cuando una partida no se puede continuar con los datos actuales
+DATOS_CAMBIADOS = "Los datos han cambiado y no puedo continuar esta partida. ¿Quieres intentar de nuevo?"
+
+class MotorAkinator:
+    """
+    Motor de juego del Akinator sin estado propio.
+
+    Se construye a partir de una instantánea de los datos (mundiales y
+    jugadores) que no se modifica después, así que una misma instancia se
+    puede compartir entre hilos o peticiones concurrentes sin locks. Cada
+    partida se representa con un diccionario de estado que el motor nunca
+    modifica: todas las operaciones devuelven un estado nuevo.
+
+    El estado que reciben y devuelven los métodos públicos nombra a los
+    candidatos por su id, no por su posición en la lista de este motor: así
+    una partida se puede continuar con otro motor (datos recargados en otro
+    orden, registros nuevos...). Por dentro, cada llamada lo convierte en la
+    máscara de bits sobre sus propios candidatos (_importar/_exportar).
+    Lo único que depende de los datos concretos es el nodo del árbol de
+    preguntas, y solo se sigue usando si la huella de los datos del estado
+    coincide con la del motor: así cualquier proceso con los mismos datos
+    puede continuar la partida (AlmacenPartidasSQLite con varios workers).
+    """
+
+    # Si se precompila el árbol de preguntas de cada modo
+    usa_arbol = True
+
+    def __init__(self, mundiales: List[Dict], jugadores: List[Dict], version: int = 0):
+        """
+        Args:
+            mundiales: Candidatos del modo "equipo"
+            jugadores: Candidatos del modo "jugador"
+            version: Versión de los datos (solo informativa, para los logs)
+        """
+        self.version = version
+
+        # Huella de los datos, igual en todos los procesos que los carguen iguales
+        self.huella = hashlib.sha1(
+            json.dumps([mundiales, jugadores], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+        # Registros de preguntas e índices de candidatos por modo (inmutables)
+        self.registros: Dict[str, RegistroPreguntas] = {
+            "equipo": RegistroPreguntas("equipo", list(mundiales)),
+            "jugador": RegistroPreguntas("jugador", list(jugadores))
+        }
+
+        # Posición de cada candidato por su id, para leer los estados
+        self._posiciones: Dict[str, Dict[Any, int]] = {
+            modo: {candidato.get("id"): posicion for posicion, candidato in enumerate(registro.indice.candidatos)}
+            for modo, registro in self.registros.items()
+        }
+
+        # Árboles de preguntas precompilados: cada turno es una consulta a un nodo
+        self.arboles: Dict[str, ArbolPreguntas] = {
+            modo: ArbolPreguntas(registro) for modo, registro in self.registros.items()
+        } if self.usa_arbol else {}
+        for modo, arbol in self.arboles.items():
+            print(f"Árbol de preguntas v{version} ({modo}): {arbol.estadisticas()}")
+
+    def iniciar(self, modo: str = "equipo") -> Tuple[Dict, str]:
+        """
+        Crea el estado de una partida nueva
+
+        Args:
+            modo: "equipo" para adivinar equipos/mundiales, "jugador" para adivinar jugadores
+
+        Returns:
+            (estado inicial, mensaje de bienvenida)
+        """
+        estado = self._estado_inicial(modo)
+        print(f"Juego iniciado en modo {modo} con {len(self.registros[modo].indice)} candidatos iniciales")
+
+        if modo == "equipo":
+            return self._exportar(estado), "¡Piensa en un equipo campeón del mundo! Intentaré adivinarlo. Responde con 'sí', 'no' o 'no sé'."
+        else:
+            return self._exportar(estado), "¡Piensa en un jugador campeón del mundo! Intentaré adivinarlo. Responde con 'sí', 'no' o 'no sé'."
+
+    def hacer_pregunta(self, estado: Dict) -> Tuple[Dict, str]:
+        """
+        Genera una pregunta estratégica para reducir los candidatos
+
+        Returns:
+            (nuevo estado, pregunta)
+        """
+        interno = self._importar(estado)
+        if interno is None:
+            return estado, DATOS_CAMBIADOS
+        interno, pregunta = self._hacer_pregunta(interno)
+        return self._exportar(interno), pregunta
+
+    def step(self, estado: Dict, respuesta: str) -> Tuple[Dict, str]:
+        """
+        Aplica la respuesta del usuario a la última pregunta del estado
+
+        Args:
+            estado: Estado actual de la partida (no se modifica)
+            respuesta: Respuesta del usuario ('sí', 'no', 'no sé')
+
+        Returns:
+            (nuevo estado, siguiente pregunta o resultado)
+        """
+        interno = self._importar(estado)
+        if interno is None:
+            return estado, DATOS_CAMBIADOS
+        interno, resultado = self._step(interno, respuesta)
+        return self._exportar(interno), resultado
+
+    def _estado_inicial(self, modo: str) -> Dict:
+        """
+        Estado interno (por posiciones) de una partida nueva
+        """
+        indice = self.registros[modo].indice
+        return {
+            "modo": modo,
+            "huella": self.huella,
+            "nodo": self.arboles[modo].raiz if self.usa_arbol else None,
+            "mascara": indice.todos,
+            "preguntas_hechas": [],
+            "filtros": {},
+            "intentos": 0,
+            "max_intentos": 15 if modo == "jugador" else 8,
+            "ultima_pregunta": "",
+            "ultimo_tipo": "",
+            "candidato_propuesto": None
+        }
+
+    def _hacer_pregunta(self, estado: Dict) -> Tuple[Dict, str]:
+        """
+        hacer_pregunta sobre el estado interno
+        """
+        estado = self._copiar(estado)
+        modo = estado["modo"]
+        mascara = estado["mascara"]
+        indice = self.registros[modo].indice
+        estado["intentos"] += 1
+
+        # Si no hay candidatos, rendirse
+        if not mascara:
+            return estado, "No tengo más candidatos. ¿Quieres intentar otra vez?"
+
+        # Si quedan pocos candidatos o se alcanzó el máximo de intentos
+        if indice.contar(mascara) <= 2 or estado["intentos"] >= estado["max_intentos"]:
+            estado["candidato_propuesto"] = (mascara & -mascara).bit_length() - 1
+            pregunta = self._texto_adivinanza(modo, indice.candidatos[estado["candidato_propuesto"]])
+            estado["ultimo_tipo"] = "adivinanza"
+            estado["ultima_pregunta"] = pregunta
+            return estado, pregunta
+
+        return estado, self._elegir_pregunta(estado)
+
+    def _step(self, estado: Dict, respuesta: str) -> Tuple[Dict, str]:
+        """
+        step sobre el estado interno
+        """
+        estado = self._copiar(estado)
+        respuesta = respuesta.lower().strip()
+        registro = self.registros[estado["modo"]]
+        indice = registro.indice
+        mascara = estado["mascara"]
+
+        if not mascara:
+            return estado, "No pude adivinar en qué estabas pensando. ¿Quieres intentar de nuevo?"
+
+        # Si la última pregunta fue un intento de adivinar, verificar si acertamos
+        if estado.get("ultimo_tipo") == "adivinanza" or indice.contar(mascara) == 1:
+            propuesto = estado.get("candidato_propuesto")
+            if propuesto is None:
+                propuesto = (mascara & -mascara).bit_length() - 1
+            if respuesta in AFIRMATIVAS:
+                return estado, self._texto_acierto(estado["modo"], indice.candidatos[propuesto])
+            elif indice.contar(mascara) == 1 or estado["intentos"] >= estado["max_intentos"]:
+                # No adivinamos, informar que necesitamos información
+                return estado, "No pude adivinar. ¿Quieres proporcionar los datos correctos?"
+            else:
+                # Descartar el candidato propuesto y seguir preguntando
+                estado["mascara"] = mascara & ~(1 << propuesto)
+                estado["candidato_propuesto"] = None
+                estado["nodo"] = None
+                return self._hacer_pregunta(estado)
+
+        # Si se alcanzó el máximo de intentos
+        if estado["intentos"] >= estado["max_intentos"]:
+            # En lugar de manejar el fracaso directamente, indicamos que no pudimos adivinar
+            return estado, "No pude adivinar en qué estabas pensando. ¿Quieres intentar de nuevo?"
+
+        # Si el usuario no sabe, no filtramos (y se sigue fuera del árbol)
+        if respuesta in NO_SE:
+            estado["nodo"] = None
+            return self._hacer_pregunta(estado)
+
+        afirmativo = respuesta in AFIRMATIVAS
+
+        pregunta = registro.get(estado.get("ultima_pregunta", ""))
+        if pregunta is None:
+            # Si no reconocemos la pregunta, mantenemos a todos los candidatos
+            return self._hacer_pregunta(estado)
+
+        # Un único AND (respuesta "sí") o AND NOT (respuesta "no") sobre la máscara
+        nueva_mascara = mascara & pregunta.mascara if afirmativo else mascara & ~pregunta.mascara
+
+        # Avanzar en el árbol si la pregunta salió de él
+        nodo = self._nodo_actual(estado)
+        if nodo is not None and self.arboles[estado["modo"]].pregunta(nodo) == pregunta.id:
+            estado["nodo"] = self.arboles[estado["modo"]].siguiente(nodo, afirmativo)
+        else:
+            estado["nodo"] = None
+
+        # Actualizar candidatos
+        if nueva_mascara:
+            estado["mascara"] = nueva_mascara
+            print(f"Candidatos restantes: {indice.contar(nueva_mascara)}")
+        else:  # Si no quedan candidatos pero teníamos algunos
+            # Conservar algunos aleatoriamente para evitar quedarnos sin opciones
+            posiciones = indice.posiciones(mascara)
+            conservadas = random.sample(posiciones, max(1, min(3, len(posiciones))))
+            estado["mascara"] = sum(1 << posicion for posicion in conservadas)
+            estado["nodo"] = None
+            print(f"Sin candidatos después del filtro, manteniendo {len(conservadas)} al azar")
+
+        # Generar siguiente pregunta
+        return self._hacer_pregunta(estado)
+
+    @staticmethod
+    def _texto_adivinanza(modo: str, candidato: Dict) -> str:
+        """
+        Pregunta con la que se propone un candidato
+        """
+        if modo == "equipo":
+            return f"¿Estás pensando en {candidato['pais']} del Mundial {candidato['anio']}?"
+
+        # Manejar de forma segura las posibles claves faltantes
+        nombre = candidato.get('nombre', "Jugador desconocido")
+        pais = candidato.get('pais', "país desconocido")
+        anio = candidato.get('anio', "año desconocido")
+        return f"¿Estás pensando en {nombre} que jugó con {pais} en {anio}?"
+
+    @staticmethod
+    def _texto_acierto(modo: str, candidato: Dict) -> str:
+        """
+        Mensaje final cuando el usuario confirma el candidato propuesto
+        """
+        if modo == "equipo":
+            return f"¡Lo adiviné! Estabas pensando en {candidato['pais']} del Mundial {candidato['anio']}. ¿Quieres jugar de nuevo?"
+
+        nombre = candidato.get('nombre', "Jugador desconocido")
+        pais = candidato.get('pais', "país desconocido")
+        anio = candidato.get('anio', "año desconocido")
+        return f"¡Lo adiviné! Estabas pensando en {nombre} de {pais} ({anio}). ¿Quieres jugar de nuevo?"
+
+    @staticmethod
+    def _copiar(estado: Dict) -> Dict:
+        """
+        Copia el estado para no modificar el del llamador
+        """
+        return dict(estado, preguntas_hechas=list(estado.get("preguntas_hechas", [])))
+
+    def _exportar(self, estado: Dict) -> Dict:
+        """
+        Estado interno -> estado por ids de candidato (el que se guarda)
+        """
+        candidatos = self.registros[estado["modo"]].indice.candidatos
+        portable = self._copiar(estado)
+        portable["candidatos"] = [candidatos[p].get("id") for p in IndiceCandidatos.posiciones(portable.pop("mascara"))]
+        propuesto = portable.get("candidato_propuesto")
+        portable["candidato_propuesto"] = candidatos[propuesto].get("id") if propuesto is not None else None
+        return portable
+
+    def _importar(self, estado: Dict) -> Optional[Dict]:
+        """
+        Estado por ids de candidato -> estado interno sobre los candidatos de este motor
+
+        Los candidatos que ya no existen se descartan y los que no estaban en
+        la partida (registrados después) no entran en ella.
+
+        Returns:
+            El estado interno, o None si la partida no se puede continuar
+            (estado de otro formato o ninguno de sus candidatos existe ya)
+        """
+        if "candidatos" not in estado:
+            return None
+        posiciones = self._posiciones[estado["modo"]]
+        encontradas = [posiciones[c] for c in estado["candidatos"] if c in posiciones]
+        if estado["candidatos"] and not encontradas:
+            return None
+
+        interno = self._copiar(estado)
+        del interno["candidatos"]
+        self._revisar_huella(interno)
+        interno["mascara"] = self._mascara_de(encontradas, len(posiciones))
+        interno["candidato_propuesto"] = posiciones.get(estado.get("candidato_propuesto"))
+        if interno["ultimo_tipo"] == "adivinanza" and interno["candidato_propuesto"] is None:
+            # El candidato propuesto ya no existe: seguir preguntando
+            interno["ultimo_tipo"] = ""
+        return interno
+
+    def _revisar_huella(self, estado: Dict):
+        """
+        Saca del árbol las partidas empezadas con otros datos: sus nodos no
+        corresponden a los árboles de este motor
+        """
+        if estado.get("huella") != self.huella:
+            estado["huella"] = self.huella
+            estado["nodo"] = None
+
+    @staticmethod
+    def _mascara_de(posiciones: List[int], total: int) -> int:
+        """
+        Máscara con los bits de las posiciones dadas (en tiempo lineal)
+        """
+        bits = bytearray((total + 7) // 8)
+        for posicion in posiciones:
+            bits[posicion >> 3] |= 1 << (posicion & 7)
+        return int.from_bytes(bits, "little")
+
+    def _nodo_actual(self, estado: Dict) -> Optional[int]:
+        """
+        Nodo del árbol en el que está la partida, si sigue en él
+        """
+        if not self.usa_arbol:
+            return None
+        return estado.get("nodo")
+
+    def _elegir_pregunta(self, estado: Dict) -> str:
+        """
+        Elige la siguiente pregunta y la registra en el estado (ya copiado por el llamador)
+
+        Mientras la partida siga el árbol precompilado, la pregunta es la del
+        nodo actual. Si se salió del árbol (respuestas "no sé", partida empezada
+        con otros datos...), se elige la de mayor ganancia de información al momento.
+        """
+        registro = self.registros[estado["modo"]]
+        mascara = estado["mascara"]
+
+        nodo = self._nodo_actual(estado)
+        mejor = registro.get(self.arboles[estado["modo"]].pregunta(nodo)) if nodo is not None else None
+        if mejor is None or mejor.id in estado["preguntas_hechas"]:
+            estado["nodo"] = None
+            mejor = registro.mejor_pregunta(mascara, excluidas=estado["preguntas_hechas"])
+
+        if mejor is None:
+            # Ninguna pregunta distingue a los candidatos: preguntar directamente por uno
+            candidato = registro.indice.primero(mascara)
+            if estado["modo"] == "equipo":
+                mejor = registro.get(f"pais={candidato['pais']}")
+            else:
+                mejor = registro.get(f"nombre={candidato.get('nombre', '')}")
+
+        # Guardar la pregunta (por su identificador; el texto es solo para mostrar)
+        estado["preguntas_hechas"].append(mejor.id)
+        estado["ultimo_tipo"] = mejor.atributo
+        estado["ultima_pregunta"] = mejor.id
+        return mejor.texto()
@@ -0,0 +1,227 @@
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from motor_akinator import MotorAkinator, AFIRMATIVAS, DATOS_CAMBIADOS, NO_SE
+from preguntas import RegistroPreguntas
+
+# Probabilidad de que el usuario se equivoque al responder "sí" o "no"
+PROB_ERROR = float(os.getenv("AKINATOR_PROB_ERROR", "0.05"))
+
+# Probabilidad de responder "no sé" cuando la respuesta real es "sí" / "no".
+# Quien piensa en un candidato suele conocer sus rasgos afirmativos, así que
+# un "no sé" inclina un poco la balanza hacia los candidatos del "no".
+PROB_NO_SE_SI = 0.4
+PROB_NO_SE_NO = 0.6
+
+# Probabilidad a posteriori a partir de la cual se propone el mejor candidato
+UMBRAL_POSTERIOR = float(os.getenv("AKINATOR_UMBRAL_POSTERIOR", "0.5"))
+
+def _entropia(p: np.ndarray) -> np.ndarray:
+    """
+    Entropía binaria (en bits) elemento a elemento
+    """
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+
+class MatrizPreguntas:
+    """
+    Respuestas esperadas de todos los candidatos a todas las preguntas de un
+    modo, como matriz densa (preguntas x candidatos) para operar con NumPy
+    """
+
+    def __init__(self, registro: RegistroPreguntas):
+        total = len(registro.indice)
+        num_bytes = max(1, (total + 7) // 8)
+
+        self.ids: List[str] = list(registro.preguntas)
+        self.posicion: Dict[str, int] = {pregunta_id: i for i, pregunta_id in enumerate(self.ids)}
+
+        # Desempaquetar las máscaras de bits precompiladas en filas booleanas
+        filas = [
+            np.unpackbits(np.frombuffer(pregunta.mascara.to_bytes(num_bytes, "little"), dtype=np.uint8),
+                          bitorder="little")[:total]
+            for pregunta in registro.preguntas.values()
+        ]
+        self.respuestas = np.array(filas, dtype=np.float64).reshape(len(self.ids), total)
+
+class MotorProbabilistico(MotorAkinator):
+    """
+    Variante del motor que no descarta candidatos con cada respuesta.
+
+    Cada candidato tiene una probabilidad a posteriori (un vector de NumPy
+    durante el turno; en el estado guardado, un diccionario id -> probabilidad
+    de los candidatos que no se han descartado) que se actualiza con la verosimilitud de cada
+    respuesta, suponiendo que el usuario puede equivocarse con probabilidad
+    PROB_ERROR. Así una respuesta errónea baja la probabilidad del candidato
+    correcto pero no lo elimina, y "no sé" es una señal débil en lugar de
+    ignorarse. Se propone un candidato en cuanto su probabilidad supera
+    UMBRAL_POSTERIOR.
+    """
+
+    usa_arbol = False
+
+    def __init__(self, mundiales: List[Dict], jugadores: List[Dict], version: int = 0,
+                 prob_error: float = PROB_ERROR, umbral: float = UMBRAL_POSTERIOR):
+        super().__init__(mundiales, jugadores, version)
+        self.prob_error = prob_error
+        self.umbral = umbral
+        self.matrices: Dict[str, MatrizPreguntas] = {
+            modo: MatrizPreguntas(registro) for modo, registro in self.registros.items()
+        }
+
+    def _estado_inicial(self, modo: str) -> Dict:
+        estado = super()._estado_inicial(modo)
+        del estado["mascara"]
+        total = len(self.registros[modo].indice)
+        estado["probabilidades"] = np.full(total, 1.0 / total) if total else np.zeros(0)
+        return estado
+
+    def _hacer_pregunta(self, estado: Dict) -> Tuple[Dict, str]:
+        """
+        Propone el candidato más probable si supera el umbral; si no, hace la
+        pregunta con mayor información mutua esperada
+        """
+        estado = self._copiar(estado)
+        modo = estado["modo"]
+        probabilidades = estado["probabilidades"]
+        estado["intentos"] += 1
+
+        if not probabilidades.size or not probabilidades.any():
+            return estado, "No tengo más candidatos. ¿Quieres intentar otra vez?"
+
+        mejor_candidato = int(np.argmax(probabilidades))
+        pregunta_id = None
+        if probabilidades[mejor_candidato] < self.umbral and estado["intentos"] < estado["max_intentos"]:
+            pregunta_id = self._elegir_pregunta_probabilistica(estado)
+
+        if pregunta_id is None:
+            estado["candidato_propuesto"] = mejor_candidato
+            estado["ultimo_tipo"] = "adivinanza"
+            pregunta = self._texto_adivinanza(modo, self.registros[modo].indice.candidatos[mejor_candidato])
+            estado["ultima_pregunta"] = pregunta
+            return estado, pregunta
+
+        pregunta = self.registros[modo].get(pregunta_id)
+        estado["preguntas_hechas"].append(pregunta.id)
+        estado["ultimo_tipo"] = pregunta.atributo
+        estado["ultima_pregunta"] = pregunta.id
+        return estado, pregunta.texto()
+
+    def _step(self, estado: Dict, respuesta: str) -> Tuple[Dict, str]:
+        """
+        Actualiza las probabilidades con la respuesta a la última pregunta
+        """
+        estado = self._copiar(estado)
+        respuesta = respuesta.lower().strip()
+        modo = estado["modo"]
+        probabilidades = estado["probabilidades"]
+
+        if not probabilidades.size or not probabilidades.any():
+            return estado, "No pude adivinar en qué estabas pensando. ¿Quieres intentar de nuevo?"
+
+        # Si la última pregunta fue un intento de adivinar, verificar si acertamos
+        if estado.get("ultimo_tipo") == "adivinanza":
+            propuesto = estado["candidato_propuesto"]
+            if respuesta in AFIRMATIVAS:
+                return estado, self._texto_acierto(modo, self.registros[modo].indice.candidatos[propuesto])
+
+            # Descartar el candidato propuesto (sin modificar el vector del estado anterior)
+            probabilidades = probabilidades.copy()
+            probabilidades[propuesto] = 0.0
+            if not probabilidades.any() or estado["intentos"] >= estado["max_intentos"]:
+                return estado, "No pude adivinar. ¿Quieres proporcionar los datos correctos?"
+
+            estado["probabilidades"] = probabilidades / probabilidades.sum()
+            return self._hacer_pregunta(estado)
+
+        # Si se alcanzó el máximo de intentos
+        if estado["intentos"] >= estado["max_intentos"]:
+            return estado, "No pude adivinar en qué estabas pensando. ¿Quieres intentar de nuevo?"
+
+        matriz = self.matrices[modo]
+        fila = matriz.posicion.get(estado.get("ultima_pregunta", ""))
+        if fila is None:
+            # Si no reconocemos la pregunta, mantenemos las probabilidades
+            return self._hacer_pregunta(estado)
+
+        # Verosimilitud de la respuesta para los candidatos del "sí" y del "no"
+        if respuesta in NO_SE:
+            si, no = PROB_NO_SE_SI, PROB_NO_SE_NO
+        elif respuesta in AFIRMATIVAS:
+            si, no = 1 - self.prob_error, self.prob_error
+        else:
+            si, no = self.prob_error, 1 - self.prob_error
+
+        respuestas = matriz.respuestas[fila]
+        posterior = probabilidades * (respuestas * si + (1 - respuestas) * no)
+        estado["probabilidades"] = posterior / posterior.sum()
+
+        return self._hacer_pregunta(estado)
+
+    def _exportar(self, estado: Dict) -> Dict:
+        """
+        Estado interno -> estado con las probabilidades por id de candidato
+        """
+        candidatos = self.registros[estado["modo"]].indice.candidatos
+        portable = self._copiar(estado)
+        probabilidades = portable["probabilidades"]
+        portable["probabilidades"] = {
+            candidatos[posicion].get("id"): float(probabilidades[posicion])
+            for posicion in np.flatnonzero(probabilidades)
+        }
+        propuesto = portable.get("candidato_propuesto")
+        portable["candidato_propuesto"] = candidatos[propuesto].get("id") if propuesto is not None else None
+        return portable
+
+    def _importar(self, estado: Dict) -> Optional[Dict]:
+        """
+        Estado por ids de candidato -> vector de probabilidades de este motor
+
+        Los candidatos que ya no existen se descartan (y se renormaliza) y los
+        registrados después de empezar la partida quedan con probabilidad 0.
+
+        Returns:
+            El estado interno, o None si la partida no se puede continuar
+        """
+        probabilidades_por_id = estado.get("probabilidades")
+        if not isinstance(probabilidades_por_id, dict):
+            return None
+        posiciones = self._posiciones[estado["modo"]]
+        probabilidades = np.zeros(len(posiciones))
+        for candidato_id, probabilidad in probabilidades_por_id.items():
+            posicion = posiciones.get(candidato_id)
+            if posicion is not None:
+                probabilidades[posicion] = probabilidad
+        if probabilidades_por_id and not probabilidades.any():
+            return None
+
+        interno = self._copiar(estado)
+        self._revisar_huella(interno)
+        interno["probabilidades"] = probabilidades / probabilidades.sum() if probabilidades.any() else probabilidades
+        interno["candidato_propuesto"] = posiciones.get(estado.get("candidato_propuesto"))
+        if interno["ultimo_tipo"] == "adivinanza" and interno["candidato_propuesto"] is None:
+            # El candidato propuesto ya no existe: seguir preguntando
+            interno["ultimo_tipo"] = ""
+        return interno
+
+    def _elegir_pregunta_probabilistica(self, estado: Dict):
+        """
+        Identificador de la pregunta con mayor información mutua entre la
+        respuesta (con ruido) y el candidato, o None si ninguna aporta
+        """
+        matriz = self.matrices[estado["modo"]]
+
+        # Probabilidad de que la respuesta real sea "sí" y de que el usuario diga "sí"
+        prob_si = matriz.respuestas @ estado["probabilidades"]
+        prob_respuesta_si = prob_si * (1 - self.prob_error) + (1 - prob_si) * self.prob_error
+        ganancia = _entropia(prob_respuesta_si) - _entropia(np.array(self.prob_error))
+
+        for pregunta_id in estado["preguntas_hechas"]:
+            posicion = matriz.posicion.get(pregunta_id)
+            if posicion is not None:
+                ganancia[posicion] = -np.inf
+
+        mejor = int(np.argmax(ganancia))
+        if ganancia[mejor] <= 1e-9:
+            return None
+        return matriz.ids[mejor]
@@ -1,9 +1,13 @@
-import requests
 import json
 import os
 import re
 from dotenv import load_dotenv
 from typing import Dict, List, Any, Union, Optional
+from cache_ttl import crear_caches_agente
+from repositorio import obtener_repositorio
+from datos_async import DatosAsync
+from indice_jugadores import IndiceJugadores
+from instantanea_datos import cargar_instantanea
 
 # Cargar variables de entorno
 load_dotenv()
@@ -18,54 +22,91 @@ class MundialesAgent:
     
     def __init__(self):
         self.api_url = API_BASE_URL
-        self.cache = {
-            "paises": None,
-            "mundiales": None
-        }
-    
-    def _fetch_data(self, endpoint: str) -> Union[Dict, List, None]:
-        """
-        Realiza una petición GET a la API
-        """
-        try:
-            response = requests.get(f"{self.api_url}/{endpoint}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error al obtener datos de la API: {e}")
-            return None
+        self.repositorio = obtener_repositorio(self.api_url)
+        self.cache = crear_caches_agente()
+        
+        # Peticiones concurrentes de detalles (varios mundiales de un país)
+        self.datos_async = DatosAsync(self.repositorio, self.cache["detalle"])
+        
+        # Índice local para buscar jugadores sin ir al repositorio
+        self.indice_jugadores = IndiceJugadores()
+        self._indice_intentado = False
+        
+        # Partir de la instantánea local si existe (la comparte con el Akinator)
+        instantanea = cargar_instantanea()
+        if instantanea and self.repositorio.remoto:
+            self.cache["paises"].poner("paises", instantanea["datos"]["paises"])
+            self.cache["mundiales"].poner("mundiales", instantanea["datos"]["mundiales"])
+            self.indice_jugadores.sincronizar(instantanea["datos"]["jugadores"])
     
     def get_paises(self, refresh: bool = False) -> List[Dict]:
         """
         Obtiene la lista de países campeones
         """
-        if self.cache["paises"] is None or refresh:
-            self.cache["paises"] = self._fetch_data("paises")
-        return self.cache["paises"] or []
+        if refresh:
+            self.cache["paises"].invalidar()
+        return self.cache["paises"].obtener("paises", self.repositorio.paises) or []
     
     def get_mundiales(self, refresh: bool = False) -> List[Dict]:
         """
         Obtiene la lista de mundiales
         """
-        if self.cache["mundiales"] is None or refresh:
-            self.cache["mundiales"] = self._fetch_data("mundiales")
-        return self.cache["mundiales"] or []
+        if refresh:
+            self.cache["mundiales"].invalidar()
+        return self.cache["mundiales"].obtener("mundiales", self.repositorio.mundiales) or []
     
     def get_mundial_detalle(self, mundial_id: int) -> Optional[Dict]:
         """
         Obtiene los detalles de un mundial específico
         """
-        return self._fetch_data(f"mundiales/{mundial_id}")
+        return self.cache["detalle"].obtener(mundial_id, lambda: self.repositorio.mundial(mundial_id))
     
     def buscar_jugador(self, nombre: str) -> List[Dict]:
         """
-        Busca jugadores por nombre
+        Busca jugadores por nombre (sin distinguir tildes ni mayúsculas)
+        
+        Se resuelve con el índice local de jugadores; solo si no se pudo
+        obtener la lista de jugadores se consulta la búsqueda del repositorio.
         """
         if len(nombre) < 3:
             print("El nombre debe tener al menos 3 caracteres")
             return []
         
-        return self._fetch_data(f"jugadores/buscar?q={nombre}") or []
+        if not self.indice_jugadores and not self._indice_intentado:
+            self._indice_intentado = True
+            self.sincronizar_jugadores()
+        if self.indice_jugadores:
+            return self.indice_jugadores.buscar(nombre)
+        
+        clave = nombre.strip().lower()
+        return self.cache["busqueda"].obtener(clave, lambda: self.repositorio.buscar_jugadores(nombre)) or []
+    
+    def sincronizar_jugadores(self, jugadores: Optional[List[Dict]] = None):
+        """
+        Pone al día el índice de búsqueda de jugadores
+        
+        Args:
+            jugadores: Lista completa de jugadores ya disponible (por ejemplo
+                la caché del Akinator); si no se indica se pide al repositorio
+        """
+        if jugadores is None:
+            jugadores = self.repositorio.jugadores() or []
+        nuevos = self.indice_jugadores.sincronizar(jugadores)
+        if nuevos:
+            print(f"Índice de jugadores actualizado: {nuevos} nuevos, {len(self.indice_jugadores)} en total")
+    
+    def invalidar_cache(self):
+        """
+        Vacía todas las cachés (se llama cuando se registran datos nuevos)
+        """
+        for cache in self.cache.values():
+            cache.invalidar()
+    
+    def estadisticas_cache(self) -> Dict[str, Dict]:
+        """
+        Aciertos, fallos y tamaño de cada caché
+        """
+        return {nombre: cache.estadisticas() for nombre, cache in self.cache.items()}
     
     def get_mundial_por_anio_pais(self, anio: int = None, pais: str = None) -> Optional[Dict]:
         """
@@ -82,11 +123,9 @@ class MundialesAgent:
                 if mundial["anio"] == anio:
                     return self.get_mundial_detalle(mundial["id"])
         elif pais:
-            resultados = []
-            for mundial in mundiales:
-                if mundial["pais"].upper() == pais.upper():
-                    resultados.append(self.get_mundial_detalle(mundial["id"]))
-            return resultados
+            # Todos los detalles del país a la vez, no uno tras otro
+            ids = [mundial["id"] for mundial in mundiales if mundial["pais"].upper() == pais.upper()]
+            return self.datos_async.mundiales_detalle(ids)
         
         return None
     
@@ -0,0 +1,364 @@
+import os
+import threading
+import time
+from typing import Dict, List, Any, Union, Optional
+from cache_ttl import crear_caches_agente
+from repositorio import obtener_repositorio
+from datos_async import DatosAsync
+from indice_jugadores import IndiceJugadores
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+class MundialesAgentBERT:
+    """
+    Agente para consultar información sobre los campeones de mundiales de fútbol
+    con capacidades avanzadas de NLP usando BERT
+    """
+    
+    def __init__(self, api_url=None):
+        # Configuración de la API
+        self.api_url = api_url or os.getenv("API_BASE_URL", "http://localhost:3000/api")
+        self.repositorio = obtener_repositorio(self.api_url)
+        
+        # Caché de datos por endpoint (con TTL y límite LRU)
+        self.cache = crear_caches_agente()
+        
+        # Peticiones concurrentes de detalles (varios mundiales de un país)
+        self.datos_async = DatosAsync(self.repositorio, self.cache["detalle"])
+        
+        # Índice local para buscar jugadores sin ir al repositorio
+        self.indice_jugadores = IndiceJugadores()
+        self._indice_intentado = False
+        
+        # Procesador BERT: se carga al primer uso (o en segundo plano con
+        # precargar), para no pagar torch y el modelo al arrancar
+        self.model_path = os.getenv("BERT_MODEL_PATH", None)
+        self._nlp = None
+        self._lock_nlp = threading.Lock()
+        self.tiempo_carga_nlp: Optional[float] = None
+        
+        # Ejemplos para entrenar el modelo (opcional)
+        self.training_examples = [
+            {"texto": "¿Quién ganó el mundial de 1970?", "intencion": "buscar_mundial_por_anio"},
+            {"texto": "¿Qué selección ganó en 1990?", "intencion": "buscar_mundial_por_anio"},
+            {"texto": "¿Quién fue campeón en 2006?", "intencion": "buscar_mundial_por_anio"},
+            {"texto": "¿Cuántos mundiales ha ganado Brasil?", "intencion": "buscar_mundiales_por_pais"},
+            {"texto": "¿En qué años ganó Alemania?", "intencion": "buscar_mundiales_por_pais"},
+            {"texto": "Dime los mundiales que ganó Argentina", "intencion": "buscar_mundiales_por_pais"},
+            {"texto": "¿Jugó Pelé en el mundial de 1958?", "intencion": "buscar_jugador"},
+            {"texto": "¿Maradona fue parte del equipo de 1986?", "intencion": "buscar_jugador"},
+            {"texto": "¿En qué posición jugaba Ronaldo en 2002?", "intencion": "buscar_jugador"},
+            {"texto": "¿Quiénes fueron los jugadores de Alemania en 2014?", "intencion": "consultar_equipo_completo"},
+            {"texto": "Muéstrame el equipo de Brasil de 1970", "intencion": "consultar_equipo_completo"},
+            {"texto": "¿Cuál fue la alineación de España en 2010?", "intencion": "consultar_equipo_completo"},
+            {"texto": "Háblame de los mundiales", "intencion": "consulta_general"},
+            {"texto": "¿Cuántos mundiales hay en la base de datos?", "intencion": "consulta_general"},
+            {"texto": "¿Qué países han ganado más mundiales?", "intencion": "consulta_general"}
+        ]
+    
+    @property
+    def nlp(self):
+        """
+        Procesador BERT, cargado la primera vez que se necesita
+        """
+        if self._nlp is None:
+            with self._lock_nlp:
+                if self._nlp is None:
+                    inicio = time.perf_counter()
+                    from bert_processor import BERTProcessor
+                    self._nlp = BERTProcessor(model_path=self.model_path)
+                    self.tiempo_carga_nlp = time.perf_counter() - inicio
+                    print(f"Procesador BERT cargado en {self.tiempo_carga_nlp:.2f}s")
+                    self.sincronizar_entidades()
+        return self._nlp
+    
+    def sincronizar_entidades(self, jugadores: Optional[List[Dict]] = None):
+        """
+        Añade al extractor de entidades los países y jugadores nuevos
+        
+        Args:
+            jugadores: Lista de jugadores ya disponible (por ejemplo la caché
+                del Akinator); si no se indica se pide al repositorio
+        """
+        if self._nlp is None:
+            return
+        
+        if jugadores is None:
+            jugadores = self.repositorio.jugadores() or []
+        paises = [pais["nombre"] for pais in self.get_paises() if pais.get("nombre")]
+        
+        nuevos = self._nlp.actualizar_entidades(paises, [j["nombre"] for j in jugadores if j.get("nombre")])
+        if nuevos:
+            print(f"Extractor de entidades actualizado con {nuevos} nombres nuevos")
+    
+    @property
+    def nlp_cargado(self) -> bool:
+        """
+        Si el procesador BERT ya está cargado
+        """
+        return self._nlp is not None
+    
+    def precargar(self) -> threading.Thread:
+        """
+        Carga el procesador BERT en un hilo en segundo plano
+        """
+        hilo = threading.Thread(target=lambda: self.nlp, daemon=True)
+        hilo.start()
+        return hilo
+    
+    def cerrar(self):
+        """
+        Libera el hilo de la cola de inferencia, si el procesador está cargado
+        """
+        if self._nlp is not None:
+            self._nlp.cola.detener()
+    
+    def get_paises(self, refresh: bool = False) -> List[Dict]:
+        """
+        Obtiene la lista de países campeones
+        """
+        if refresh:
+            self.cache["paises"].invalidar()
+        return self.cache["paises"].obtener("paises", self.repositorio.paises) or []
+    
+    def get_mundiales(self, refresh: bool = False) -> List[Dict]:
+        """
+        Obtiene la lista de mundiales
+        """
+        if refresh:
+            self.cache["mundiales"].invalidar()
+        return self.cache["mundiales"].obtener("mundiales", self.repositorio.mundiales) or []
+    
+    def get_mundial_detalle(self, mundial_id: int) -> Optional[Dict]:
+        """
+        Obtiene los detalles de un mundial específico
+        """
+        return self.cache["detalle"].obtener(mundial_id, lambda: self.repositorio.mundial(mundial_id))
+    
+    def buscar_jugador(self, nombre: str) -> List[Dict]:
+        """
+        Busca jugadores por nombre (sin distinguir tildes ni mayúsculas)
+        
+        Se resuelve con el índice local de jugadores; solo si no se pudo
+        obtener la lista de jugadores se consulta la búsqueda del repositorio.
+        """
+        if len(nombre) < 3:
+            print("El nombre debe tener al menos 3 caracteres")
+            return []
+        
+        if not self.indice_jugadores and not self._indice_intentado:
+            self._indice_intentado = True
+            self.sincronizar_jugadores()
+        if self.indice_jugadores:
+            return self.indice_jugadores.buscar(nombre)
+        
+        clave = nombre.strip().lower()
+        return self.cache["busqueda"].obtener(clave, lambda: self.repositorio.buscar_jugadores(nombre)) or []
+    
+    def sincronizar_jugadores(self, jugadores: Optional[List[Dict]] = None):
+        """
+        Pone al día el índice de búsqueda de jugadores
+        
+        Args:
+            jugadores: Lista completa de jugadores ya disponible (por ejemplo
+                la caché del Akinator); si no se indica se pide al repositorio
+        """
+        if jugadores is None:
+            jugadores = self.repositorio.jugadores() or []
+        nuevos = self.indice_jugadores.sincronizar(jugadores)
+        if nuevos:
+            print(f"Índice de jugadores actualizado: {nuevos} nuevos, {len(self.indice_jugadores)} en total")
+    
+    def invalidar_cache(self):
+        """
+        Vacía todas las cachés (se llama cuando se registran datos nuevos)
+        """
+        for cache in self.cache.values():
+            cache.invalidar()
+    
+    def estadisticas_cache(self) -> Dict[str, Dict]:
+        """
+        Aciertos, fallos y tamaño de cada caché
+        """
+        return {nombre: cache.estadisticas() for nombre, cache in self.cache.items()}
+    
+    def get_mundial_por_anio_pais(self, anio: int = None, pais: str = None) -> Optional[Union[Dict, List[Dict]]]:
+        """
+        Obtiene un mundial por año y/o país
+        """
+        mundiales = self.get_mundiales()
+        
+        if anio and pais:
+            for mundial in mundiales:
+                if mundial["anio"] == anio and mundial["pais"].upper() == pais.upper():
+                    return self.get_mundial_detalle(mundial["id"])
+        elif anio:
+            for mundial in mundiales:
+                if mundial["anio"] == anio:
+                    return self.get_mundial_detalle(mundial["id"])
+        elif pais:
+            # Todos los detalles del país a la vez, no uno tras otro
+            ids = [mundial["id"] for mundial in mundiales if mundial["pais"].upper() == pais.upper()]
+            return self.datos_async.mundiales_detalle(ids)
+        
+        return None
+    
+    def entrenar_modelo(self, epochs=3, progreso=None):
+        """
+        Entrena el modelo BERT con ejemplos específicos
+        
+        Args:
+            epochs: Número de épocas
+            progreso: Función opcional llamada al terminar cada época
+        
+        Returns:
+            Métricas de cada época (pérdida, segundos y ejemplos por segundo)
+        """
+        print("Iniciando entrenamiento del modelo BERT...")
+        metricas = self.nlp.fine_tune(self.training_examples, epochs=epochs, progreso=progreso)
+        segundos = sum(m['segundos'] for m in metricas)
+        print(f"Entrenamiento completado en {segundos:.1f}s.")
+        return metricas
+    
+    def procesar_consulta(self, consulta: str) -> str:
+        """
+        Procesa una consulta utilizando BERT para análisis avanzado
+        """
+        # Analizar la consulta con BERT
+        analisis = self.nlp.analyze_query(consulta)
+        
+        print(f"Análisis BERT: {analisis}")
+        
+        # Extraer información del análisis
+        intencion = analisis["intent"]
+        entidades = analisis["entities"]
+        
+        anio = entidades.get("anio")
+        pais = entidades.get("pais")
+        jugador = entidades.get("jugador")
+        
+        # Responder según la intención y entidades detectadas
+        if intencion == "buscar_mundial_por_anio" and anio:
+            mundial = self.get_mundial_por_anio_pais(anio=anio)
+            if mundial:
+                return f"El Mundial de {mundial['anio']} fue ganado por {mundial['pais']}."
+            else:
+                return f"No tengo información sobre el Mundial de {anio}."
+        
+        elif intencion == "buscar_mundiales_por_pais" and pais:
+            mundiales = self.get_mundial_por_anio_pais(pais=pais)
+            if mundiales:
+                if isinstance(mundiales, list):
+                    anios = [str(m["anio"]) for m in mundiales]
+                    return f"{pais} ha ganado {len(anios)} Mundiales en los años: {', '.join(anios)}."
+                else:
+                    return f"{pais} ganó el Mundial de {mundiales['anio']}."
+            else:
+                return f"No tengo información sobre mundiales ganados por {pais}."
+        
+        elif intencion == "buscar_jugador":
+            if jugador:
+                resultados = self.buscar_jugador(jugador)
+                if resultados:
+                    jugador_info = resultados[0]  # Tomamos el primer resultado
+                    return f"{jugador_info['nombre']} jugó con {jugador_info['pais']} en el Mundial de {jugador_info['anio']} como {jugador_info['posicion']}. Era {'titular' if jugador_info['titular'] else 'suplente'}."
+                else:
+                    return f"No encontré información sobre {jugador}."
+            else:
+                # Intentar encontrar el jugador por contexto
+                palabras = consulta.split()
+                palabras_comunes = ["quien", "quién", "como", "cómo", "cuando", "cuándo", "donde", "dónde", 
+                                  "jugador", "jugó", "participó", "equipo", "mundial", "copa", "mundo", 
+                                  "selección", "ganó", "ganador", "campeón", "campeon"]
+                
+                nombres_potenciales = [palabra for palabra in palabras 
+                                      if len(palabra) > 3 and palabra.lower() not in palabras_comunes]
+                
+                for nombre in nombres_potenciales:
+                    resultados = self.buscar_jugador(nombre)
+                    if resultados:
+                        jugador_info = resultados[0]
+                        return f"{jugador_info['nombre']} jugó con {jugador_info['pais']} en el Mundial de {jugador_info['anio']} como {jugador_info['posicion']}. Era {'titular' if jugador_info['titular'] else 'suplente'}."
+                
+                return "No pude identificar a qué jugador te refieres."
+        
+        elif intencion == "consultar_equipo_completo":
+            if anio and pais:
+                mundial = self.get_mundial_por_anio_pais(anio=anio, pais=pais)
+                if mundial:
+                    titulares = mundial.get("jugadores", {}).get("titulares", [])
+                    if titulares:
+                        titulares_str = ", ".join([f"{j['nombre']} ({j['posicion_abr']})" for j in titulares[:5]]) + "..."
+                        return f"El equipo de {mundial['pais']} que ganó el Mundial de {mundial['anio']} incluía a jugadores como: {titulares_str}"
+                    else:
+                        return f"Tengo registrado que {pais} ganó el Mundial de {anio}, pero no tengo detalles de los jugadores."
+                else:
+                    return f"{pais} no ganó el Mundial de {anio} según mis datos."
+            elif anio:
+                mundial = self.get_mundial_por_anio_pais(anio=anio)
+                if mundial:
+                    titulares = mundial.get("jugadores", {}).get("titulares", [])
+                    titulares_str = ", ".join([f"{j['nombre']}" for j in titulares[:5]]) + "..."
+                    return f"El equipo de {mundial['pais']} ganó el Mundial de {anio} con jugadores como: {titulares_str}"
+                else:
+                    return f"No tengo información sobre el Mundial de {anio}."
+            elif pais:
+                mundiales = self.get_mundial_por_anio_pais(pais=pais)
+                if mundiales and isinstance(mundiales, list):
+                    ultimo_mundial = mundiales[-1]  # El más reciente
+                    titulares = ultimo_mundial.get("jugadores", {}).get("titulares", [])
+                    titulares_str = ", ".join([f"{j['nombre']}" for j in titulares[:5]]) + "..."
+                    return f"En su último título ({ultimo_mundial['anio']}), {pais} contó con jugadores como: {titulares_str}"
+                else:
+                    return f"No tengo información detallada sobre los equipos de {pais}."
+            else:
+                return "Necesito saber de qué país o año quieres conocer el equipo."
+        
+        elif intencion == "consulta_general":
+            if "cuantos" in consulta.lower() or "cuántos" in consulta.lower():
+                if pais:
+                    mundiales = self.get_mundial_por_anio_pais(pais=pais)
+                    if mundiales and isinstance(mundiales, list):
+                        return f"{pais} ha ganado {len(mundiales)} Mundiales."
+                    elif mundiales:
+                        return f"{pais} ha ganado 1 Mundial."
+                    else:
+                        return f"No tengo información sobre mundiales ganados por {pais}."
+                else:
+                    paises = self.get_paises()
+                    return f"Tengo información sobre {len(self.get_mundiales())} Mundiales ganados por {len(paises)} países diferentes."
+            
+            # Otras consultas generales
+            paises = self.get_paises()
+            paises_str = ", ".join([p["nombre"] for p in paises[:5]]) + "..." if len(paises) > 5 else ", ".join([p["nombre"] for p in paises])
+            return f"Tengo información sobre {len(self.get_mundiales())} Mundiales ganados por países como {paises_str}. Puedes preguntarme sobre un país, un año o un jugador específico."
+        
+        # Si no pudimos procesar la consulta
+        return "No pude entender tu consulta. Intenta preguntar sobre un país específico, un año de Mundial, o un jugador."
+
+    def chat(self):
+        """
+        Inicia un chat interactivo con el agente
+        """
+        print("¡Bienvenido al Agente de Mundiales con BERT!")
+        print("Puedes preguntarme sobre equipos campeones del mundo, jugadores y más.")
+        print("Escribe 'salir' para terminar.")
+        
+        while True:
+            consulta = input("\nTu pregunta: ")
+            if consulta.lower() in ["salir", "exit", "quit"]:
+                print("¡Hasta luego!")
+                break
+                
+            respuesta = self.procesar_consulta(consulta)
+            print(f"\nAgente: {respuesta}")
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    agente = MundialesAgentBERT()
+    # Descomenta la siguiente línea si quieres entrenar el modelo
+    # agente.entrenar_modelo()
+    agente.chat()
\ No newline at end of file
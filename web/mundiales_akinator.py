@@ -1,10 +1,15 @@
 # Modificación de mundiales_agent.py para funcionar como Akinator
-import requests
 import os
-from typing import Dict, List, Any, Union, Optional
+from typing import Callable, Dict, List, Any, Union, Optional, Tuple
 from dotenv import load_dotenv
-import random
-import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from repositorio import obtener_repositorio
+from gazetteer import clave_nombre, normalizar
+from motor_akinator import MotorAkinator
+from motor_probabilistico import MotorProbabilistico
+from instantanea_datos import RUTA_INSTANTANEA, cargar_instantanea, guardar_instantanea
 
 # Cargar variables de entorno
 load_dotenv()
@@ -14,10 +19,26 @@ class MundialesAkinator:
     Agente tipo Akinator para adivinar equipos campeones del mundo
     """
     
-    def __init__(self, api_url=None):
+    def __init__(self, api_url=None, max_hilos=None, ruta_instantanea=None, puntuacion=None):
         # Configuración de la API
         self.api_url = api_url or os.getenv("API_BASE_URL", "http://localhost:3000/api")
         
+        # "estricta" descarta candidatos con cada respuesta; "probabilistica"
+        # los puntúa y tolera respuestas equivocadas
+        self.puntuacion = puntuacion or os.getenv("AKINATOR_PUNTUACION", "estricta")
+        
+        # Instantánea local de los datos y ETag de la última respuesta de cada endpoint
+        self.ruta_instantanea = ruta_instantanea or RUTA_INSTANTANEA
+        self._etags: Dict[str, Optional[str]] = {}
+        
+        # Origen de los datos (la API o la base SQLite local, según DATOS_BACKEND)
+        self.max_hilos = max_hilos or int(os.getenv("AKINATOR_HILOS_CARGA", "8"))
+        self.repositorio = obtener_repositorio(self.api_url)
+        self.estadisticas_carga = {}
+        
+        # Jugadores por escritura en los registros por lotes
+        self.tamano_lote = int(os.getenv("REGISTRO_TAMANO_LOTE", "500"))
+        
         # Caché de datos
         self.cache = {
             "paises": None,
@@ -26,7 +47,19 @@ class MundialesAkinator:
             "posiciones": None
         }
         
-        # Estado del juego
+        # Motor de juego sobre una instantánea inmutable de los datos (bajo demanda)
+        self._motor: Optional[MotorAkinator] = None
+        
+        # Número de motores construidos (para los logs)
+        self._version = 0
+        
+        # Serializa las escrituras en la caché (registros nuevos)
+        self._lock_escritura = threading.RLock()
+        
+        # Funciones a llamar cuando se registran datos nuevos
+        self._observadores: List[Callable[[], None]] = []
+        
+        # Estado del juego de consola (la web guarda el estado de cada partida aparte)
         self.estado = {
             "modo": None,  # "equipo" o "jugador"
             "candidatos": [],
@@ -38,64 +71,79 @@ class MundialesAkinator:
             "ultimo_tipo": ""
         }
     
-    def _fetch_data(self, endpoint: str) -> Union[Dict, List, None]:
-        """
-        Realiza una petición GET a la API
-        """
-        try:
-            response = requests.get(f"{self.api_url}/{endpoint}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error al obtener datos de la API: {e}")
-            return None
-    
-    def _post_data(self, endpoint: str, data: Dict) -> Union[Dict, None]:
-        """
-        Realiza una petición POST a la API
-        """
-        try:
-            response = requests.post(f"{self.api_url}/{endpoint}", json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error al enviar datos a la API: {e}")
-            return None
-    
-    def cargar_datos(self):
+    def cargar_datos(self, usar_instantanea: bool = True):
         """
         Carga todos los datos necesarios para el juego
-        """
-        # Cargar países/equipos
-        self.cache["paises"] = self._fetch_data("paises") or []
         
-        # Cargar mundiales
-        self.cache["mundiales"] = self._fetch_data("mundiales") or []
+        Si existe una instantánea local se carga de disco y se revalida contra
+        la API en segundo plano. Si no, las listas base y el volcado masivo de
+        jugadores se piden en paralelo; si la API no ofrece el volcado de
+        jugadores, se piden los detalles de cada mundial de forma concurrente
+        con un número acotado de hilos.
         
-        # Cargar posiciones
-        self.cache["posiciones"] = self._fetch_data("posiciones") or []
+        Con el repositorio SQLite local no se usa la instantánea: leer la base
+        es igual de rápido y siempre está al día.
         
-        # Cargar jugadores (esto podría ser bajo demanda según necesidad)
-        self.cache["jugadores"] = []
+        Args:
+            usar_instantanea: False para forzar la carga desde la API
+        """
+        inicio = time.perf_counter()
+        
+        if usar_instantanea and self.repositorio.remoto:
+            instantanea = cargar_instantanea(self.ruta_instantanea)
+            if instantanea:
+                for clave, valor in instantanea["datos"].items():
+                    self.cache[clave] = list(valor)
+                self._etags = dict(instantanea["etags"])
+                self._motor = None
+                self.estadisticas_carga = {
+                    "modo": "instantanea",
+                    "segundos": time.perf_counter() - inicio
+                }
+                print(f"Datos cargados de {self.ruta_instantanea}: {len(self.cache['mundiales'])} mundiales, "
+                      f"{len(self.cache['jugadores'])} jugadores (en {self.estadisticas_carga['segundos'] * 1000:.1f} ms)")
+                
+                threading.Thread(target=self._revalidar_instantanea, daemon=True).start()
+                return
+        
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as executor:
+            # Cargar países/equipos, mundiales, posiciones y jugadores a la vez
+            futuros = {
+                clave: executor.submit(self.repositorio.listado, clave)
+                for clave in ["paises", "mundiales", "posiciones", "jugadores"]
+            }
+            self.cache["paises"] = futuros["paises"].result() or []
+            self.cache["mundiales"] = futuros["mundiales"].result() or []
+            self.cache["posiciones"] = futuros["posiciones"].result() or []
+            jugadores = futuros["jugadores"].result()
+            
+            if jugadores is not None:
+                modo_carga = "masivo"
+                self.cache["jugadores"] = [self._jugador_completo(j) for j in jugadores]
+            else:
+                # Alternativa: un detalle por mundial, en paralelo
+                modo_carga = "concurrente"
+                self.cache["jugadores"] = []
+                detalles = executor.map(lambda m: self.repositorio.mundial(m["id"]), self.cache["mundiales"])
+                for mundial, detalle in zip(self.cache["mundiales"], detalles):
+                    if detalle and "jugadores" in detalle:
+                        for jugador in detalle["jugadores"].get("titulares", []) + detalle["jugadores"].get("suplentes", []):
+                            self.cache["jugadores"].append(self._jugador_completo(jugador, mundial))
+        
+        self.estadisticas_carga = {
+            "modo": modo_carga,
+            "segundos": time.perf_counter() - inicio
+        }
         
-        for mundial in self.cache["mundiales"]:
-            detalles = self._fetch_data(f"mundiales/{mundial['id']}")
-            if detalles and "jugadores" in detalles:
-                for jugador in detalles["jugadores"].get("titulares", []) + detalles["jugadores"].get("suplentes", []):
-                    # Asegurarse de que cada jugador tenga todas las claves necesarias
-                    jugador_completo = {
-                        "mundial_id": mundial["id"],
-                        "anio": mundial["anio"],
-                        "pais": mundial["pais"],
-                        "nombre": jugador.get("nombre", "Jugador desconocido"),
-                        "posicion": jugador.get("posicion", "Desconocida"),
-                        "titular": jugador.get("titular", False),
-                        "posicion_abr": jugador.get("posicion_abr", ""),
-                        "posicion_id": jugador.get("posicion_id", None)
-                    }
-                    self.cache["jugadores"].append(jugador_completo)
+        # El motor se reconstruye con los nuevos datos
+        self._motor = None
+        
+        if self.repositorio.remoto:
+            self._etags = dict(self.repositorio.etags)
+            guardar_instantanea(self.cache, self._etags, self.ruta_instantanea)
         
-        print(f"Datos cargados: {len(self.cache['paises'])} países, {len(self.cache['mundiales'])} mundiales, {len(self.cache['jugadores'])} jugadores")
+        print(f"Datos cargados: {len(self.cache['paises'])} países, {len(self.cache['mundiales'])} mundiales, {len(self.cache['jugadores'])} jugadores "
+              f"(carga {modo_carga} en {self.estadisticas_carga['segundos']:.2f}s)")
         
         # Verificar que tenemos datos válidos para trabajar
         if not self.cache["jugadores"]:
@@ -103,6 +151,90 @@ class MundialesAkinator:
         else:
             print(f"Ejemplo de jugador cargado: {self.cache['jugadores'][0]}")
     
+    def _revalidar_instantanea(self):
+        """
+        Comprueba con peticiones condicionales (If-None-Match) si los datos de
+        la API cambiaron desde la instantánea y, en ese caso, los recarga
+
+        Tras recargar avisa a los observadores, igual que un registro nuevo:
+        los agentes de consulta siguen con la instantánea hasta ese momento.
+        """
+        try:
+            endpoint = self.repositorio.endpoint_modificado(self._etags)
+            if endpoint:
+                print(f"La instantánea de datos está desactualizada ({endpoint}), recargando desde la API")
+                with self._lock_escritura:
+                    self.cargar_datos(usar_instantanea=False)
+                    self._notificar_cambio()
+        except Exception as e:
+            print(f"No se pudo revalidar la instantánea de datos: {e}")
+    
+    @staticmethod
+    def _jugador_completo(jugador: Dict, mundial: Optional[Dict] = None) -> Dict:
+        """
+        Normaliza un jugador de la API al formato de la caché
+        
+        Args:
+            jugador: Jugador tal como lo devuelve la API
+            mundial: Mundial al que pertenece, si el jugador no trae sus datos
+        """
+        mundial = mundial or {"id": jugador.get("mundial_id"), "anio": jugador.get("anio"), "pais": jugador.get("pais")}
+        
+        # Asegurarse de que cada jugador tenga todas las claves necesarias
+        return {
+            "id": jugador.get("id"),
+            "mundial_id": mundial["id"],
+            "anio": mundial["anio"],
+            "pais": mundial["pais"],
+            "nombre": jugador.get("nombre", "Jugador desconocido"),
+            "posicion": jugador.get("posicion", "Desconocida"),
+            "titular": jugador.get("titular", False),
+            "posicion_abr": jugador.get("posicion_abr", ""),
+            "posicion_id": jugador.get("posicion_id", None)
+        }
+    
+    def motor(self) -> MotorAkinator:
+        """
+        Devuelve el motor de juego sobre la instantánea actual de los datos
+        
+        El motor es inmutable y puede compartirse entre peticiones concurrentes.
+        Cuando cambian los datos (registros nuevos o una recarga) se construye
+        uno nuevo, con su árbol de preguntas recompilado, y se reemplaza la
+        referencia. Las partidas en curso continúan con el motor nuevo: su
+        estado nombra a los candidatos por id, y si los datos cambiaron siguen
+        fuera del árbol (o terminan si ya no queda ninguno de sus candidatos).
+        """
+        motor = self._motor
+        if motor is None:
+            with self._lock_escritura:
+                motor = self._motor
+                if motor is None:
+                    if not self.cache["paises"]:
+                        self.cargar_datos()
+                    self._version += 1
+                    clase = MotorProbabilistico if self.puntuacion == "probabilistica" else MotorAkinator
+                    motor = clase(self.cache["mundiales"] or [], self.cache["jugadores"] or [], self._version)
+                    self._motor = motor
+        return motor
+    
+    def al_cambiar_datos(self, callback: Callable[[], None]):
+        """
+        Registra una función que se llamará tras cada registro de datos nuevos
+        (por ejemplo, para invalidar las cachés de otros agentes)
+        """
+        self._observadores.append(callback)
+    
+    def _notificar_cambio(self):
+        """
+        Invalida el motor y avisa a los observadores de que los datos cambiaron
+        """
+        self._motor = None
+        for callback in self._observadores:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error al notificar cambio de datos: {e}")
+    
     def iniciar_juego(self, modo="equipo"):
         """
         Inicia un nuevo juego de adivinanzas
@@ -110,197 +242,14 @@ class MundialesAkinator:
         Args:
             modo: "equipo" para adivinar equipos/mundiales, "jugador" para adivinar jugadores
         """
-        if not self.cache["paises"]:
-            self.cargar_datos()
-        
-        self.estado = {
-            "modo": modo,
-            "candidatos": [],
-            "preguntas_hechas": [],
-            "filtros": {},
-            "intentos": 0,
-            "max_intentos": 15 if modo == "jugador" else 8,
-            "ultima_pregunta": "",
-            "ultimo_tipo": ""
-        }
-        
-        # Establecer candidatos iniciales según el modo
-        if modo == "equipo":
-            self.estado["candidatos"] = [m for m in self.cache["mundiales"]]
-        else:  # modo == "jugador"
-            self.estado["candidatos"] = [j for j in self.cache["jugadores"]]
-        
-        print(f"Juego iniciado en modo {modo} con {len(self.estado['candidatos'])} candidatos iniciales")
-        
-        # Devolver mensaje inicial
-        if modo == "equipo":
-            return "¡Piensa en un equipo campeón del mundo! Intentaré adivinarlo. Responde con 'sí', 'no' o 'no sé'."
-        else:
-            return "¡Piensa en un jugador campeón del mundo! Intentaré adivinarlo. Responde con 'sí', 'no' o 'no sé'."
+        self.estado, mensaje = self.motor().iniciar(modo)
+        return mensaje
     
     def hacer_pregunta(self) -> str:
         """
         Genera una pregunta estratégica para reducir los candidatos
         """
-        modo = self.estado["modo"]
-        candidatos = self.estado["candidatos"]
-        self.estado["intentos"] += 1
-        
-        # Si no hay candidatos, rendirse
-        if not candidatos:
-            return "No tengo más candidatos. ¿Quieres intentar otra vez?"
-        
-        # Si quedan pocos candidatos o se alcanzó el máximo de intentos
-        if len(candidatos) <= 2 or self.estado["intentos"] >= self.estado["max_intentos"]:
-            candidato = candidatos[0]
-            if modo == "equipo":
-                return f"¿Estás pensando en {candidato['pais']} del Mundial {candidato['anio']}?"
-            else:
-                # Manejar de forma segura las posibles claves faltantes
-                nombre = candidato.get('nombre', "Jugador desconocido")
-                pais = candidato.get('pais', "país desconocido")
-                anio = candidato.get('anio', "año desconocido")
-                return f"¿Estás pensando en {nombre} que jugó con {pais} en {anio}?"
-        
-        # Generar preguntas según el modo
-        if modo == "equipo":
-            return self._generar_pregunta_equipo()
-        else:
-            return self._generar_pregunta_jugador()
-    
-    def _generar_pregunta_equipo(self) -> str:
-        """
-        Genera una pregunta sobre equipos/mundiales
-        """
-        candidatos = self.estado["candidatos"]
-        preguntas_hechas = self.estado["preguntas_hechas"]
-        
-        # Posibles tipos de preguntas
-        tipos_preguntas = [
-            "epoca",
-            "continente",
-            "titulos"
-        ]
-        
-        # Filtrar los tipos ya preguntados
-        tipos_disponibles = [t for t in tipos_preguntas if t not in preguntas_hechas]
-        if not tipos_disponibles:
-            tipos_disponibles = tipos_preguntas
-        
-        # Elegir tipo de pregunta aleatoriamente
-        tipo_elegido = random.choice(tipos_disponibles)
-        self.estado["preguntas_hechas"].append(tipo_elegido)
-        self.estado["ultimo_tipo"] = tipo_elegido
-        
-        # Formular pregunta según el tipo
-        if tipo_elegido == "epoca":
-            # Determinar punto medio de los años
-            años = [c["anio"] for c in candidatos]
-            año_medio = sorted(años)[len(años)//2]
-            pregunta = f"¿El equipo ganó el mundial después del año {año_medio}?"
-        
-        elif tipo_elegido == "continente":
-            # Preguntar por continente (simplificado)
-            equipos_sudamericanos = ["Brasil", "Argentina", "Uruguay"]
-            paises = set(c["pais"] for c in candidatos)
-            if any(p in equipos_sudamericanos for p in paises):
-                pregunta = "¿El equipo es de Sudamérica?"
-            else:
-                pregunta = "¿El equipo es de Europa?"
-        
-        elif tipo_elegido == "titulos":
-            # Preguntar por cantidad de títulos
-            paises_multiples = ["Brasil", "Alemania", "Italia"]
-            paises = set(c["pais"] for c in candidatos)
-            if any(p in paises_multiples for p in paises):
-                pregunta = "¿El país ha ganado más de 2 mundiales?"
-            else:
-                pregunta = "¿El país ha ganado solo un mundial?"
-        
-        else:
-            # Pregunta de respaldo
-            equipos = list(set(c["pais"] for c in candidatos))
-            equipo_aleatorio = random.choice(equipos)
-            pregunta = f"¿El equipo es {equipo_aleatorio}?"
-            self.estado["ultimo_tipo"] = "pais_directo"
-        
-        # Guardar la pregunta
-        self.estado["ultima_pregunta"] = pregunta
-        return pregunta
-    
-    def _generar_pregunta_jugador(self) -> str:
-        """
-        Genera una pregunta sobre jugadores
-        """
-        candidatos = self.estado["candidatos"]
-        preguntas_hechas = self.estado["preguntas_hechas"]
-        
-        # Posibles tipos de preguntas
-        tipos_preguntas = [
-            "posicion",
-            "epoca",
-            "pais",
-            "titular"
-        ]
-        
-        # Filtrar los tipos ya preguntados (evitar repetir consecutivamente)
-        tipos_disponibles = [t for t in tipos_preguntas if t != self.estado.get("ultimo_tipo", "")]
-        if not tipos_disponibles:
-            tipos_disponibles = tipos_preguntas
-        
-        # Elegir tipo de pregunta
-        tipo_elegido = random.choice(tipos_disponibles)
-        self.estado["ultimo_tipo"] = tipo_elegido
-        
-        # Formular pregunta según el tipo
-        if tipo_elegido == "posicion":
-            posiciones = [c.get("posicion", "Desconocida") for c in candidatos]
-            posiciones_unicas = list(set(posiciones))
-            
-            if "Portero" in posiciones_unicas:
-                pregunta = "¿El jugador es portero?"
-            elif "Defensa" in posiciones_unicas:
-                pregunta = "¿El jugador es defensa?"
-            elif "Mediocampista" in posiciones_unicas:
-                pregunta = "¿El jugador es mediocampista?"
-            else:
-                pregunta = "¿El jugador es delantero?"
-        
-        elif tipo_elegido == "epoca":
-            # Determinar punto medio de los años
-            años = [c.get("anio", 2000) for c in candidatos]
-            año_medio = sorted(años)[len(años)//2]
-            pregunta = f"¿El jugador ganó el mundial después del año {año_medio}?"
-        
-        elif tipo_elegido == "pais":
-            paises = [c.get("pais", "Desconocido") for c in candidatos]
-            paises_unicos = list(set(paises))
-            if paises_unicos:
-                pais_aleatorio = random.choice(paises_unicos)
-                pregunta = f"¿El jugador es de {pais_aleatorio}?"
-            else:
-                pregunta = "¿El jugador es de Brasil?" # Pregunta por defecto
-        
-        elif tipo_elegido == "titular":
-            titulares = [c for c in candidatos if c.get("titular", False)]
-            if titulares and len(titulares) < len(candidatos):
-                pregunta = "¿El jugador era titular?"
-            else:
-                pregunta = "¿El jugador era suplente?"
-        
-        else:
-            # Si todo lo demás falla, hacer una pregunta sobre un jugador específico
-            nombres = [c.get("nombre", "Desconocido") for c in candidatos if c.get("nombre") != "Jugador desconocido"]
-            if nombres:
-                jugador_aleatorio = random.choice(nombres)
-                pregunta = f"¿El jugador es {jugador_aleatorio}?"
-                self.estado["ultimo_tipo"] = "jugador_directo"
-            else:
-                pregunta = "¿El jugador ganó más de un mundial?"
-                self.estado["ultimo_tipo"] = "multiple_campeon"
-        
-        # Guardar la pregunta
-        self.estado["ultima_pregunta"] = pregunta
+        self.estado, pregunta = self.motor().hacer_pregunta(self.estado)
         return pregunta
     
     def procesar_respuesta(self, respuesta: str) -> str:
@@ -313,243 +262,96 @@ class MundialesAkinator:
         Returns:
             Siguiente pregunta o resultado
         """
-        respuesta = respuesta.lower().strip()
-        candidatos = self.estado["candidatos"]
-        
-        # Si no hay candidatos o se alcanzó el máximo de intentos
-        if not candidatos or self.estado["intentos"] >= self.estado["max_intentos"]:
-            # En lugar de manejar el fracaso directamente, indicamos que no pudimos adivinar
-            return "No pude adivinar en qué estabas pensando. ¿Quieres intentar de nuevo?"
-        
-        # Si solo queda un candidato, verificar si hemos adivinado
-        if len(candidatos) == 1:
-            candidato = candidatos[0]
-            if respuesta in ['sí', 'si', 's', 'yes', 'y']:
-                if self.estado["modo"] == "equipo":
-                    return f"¡Lo adiviné! Estabas pensando en {candidato['pais']} del Mundial {candidato['anio']}. ¿Quieres jugar de nuevo?"
-                else:
-                    nombre = candidato.get('nombre', "Jugador desconocido")
-                    pais = candidato.get('pais', "país desconocido")
-                    anio = candidato.get('anio', "año desconocido")
-                    return f"¡Lo adiviné! Estabas pensando en {nombre} de {pais} ({anio}). ¿Quieres jugar de nuevo?"
-            else:
-                # No adivinamos, informar que necesitamos información
-                return "No pude adivinar. ¿Quieres proporcionar los datos correctos?"
-        
-        # Filtrar candidatos según la respuesta y la última pregunta
-        nuevos_candidatos = []
-        tipo_pregunta = self.estado.get("ultimo_tipo", "")
-        pregunta = self.estado.get("ultima_pregunta", "")
-        
-        # Si el usuario no sabe, no filtramos
-        if respuesta in ['no sé', 'nose', 'no se', 'ns']:
-            return self.hacer_pregunta()
-        
-        afirmativo = respuesta in ['sí', 'si', 's', 'yes', 'y']
-        
-        if self.estado["modo"] == "equipo":
-            for candidato in candidatos:
-                mantener = False
-                
-                if tipo_pregunta == "epoca":
-                    año_pregunta = int(pregunta.split()[-1].rstrip("?"))
-                    if (candidato["anio"] > año_pregunta and afirmativo) or (candidato["anio"] <= año_pregunta and not afirmativo):
-                        mantener = True
-                
-                elif tipo_pregunta == "continente":
-                    equipos_sudamericanos = ["Brasil", "Argentina", "Uruguay"]
-                    es_sudamericano = candidato["pais"] in equipos_sudamericanos
-                    es_pregunta_sudamericana = "sudamérica" in pregunta.lower()
-                    
-                    if (es_sudamericano and es_pregunta_sudamericana and afirmativo) or \
-                       (not es_sudamericano and es_pregunta_sudamericana and not afirmativo) or \
-                       (es_sudamericano and not es_pregunta_sudamericana and not afirmativo) or \
-                       (not es_sudamericano and not es_pregunta_sudamericana and afirmativo):
-                        mantener = True
-                
-                elif tipo_pregunta == "titulos":
-                    paises_multiples = ["Brasil", "Alemania", "Italia"]
-                    tiene_multiples = candidato["pais"] in paises_multiples
-                    es_pregunta_multiples = "más de 2" in pregunta.lower()
-                    
-                    if (tiene_multiples and es_pregunta_multiples and afirmativo) or \
-                       (not tiene_multiples and es_pregunta_multiples and not afirmativo) or \
-                       (not tiene_multiples and not es_pregunta_multiples and afirmativo) or \
-                       (tiene_multiples and not es_pregunta_multiples and not afirmativo):
-                        mantener = True
-                
-                elif tipo_pregunta == "pais_directo":
-                    pais_preguntado = pregunta.split("es ")[-1].rstrip("?")
-                    if (candidato["pais"] == pais_preguntado and afirmativo) or \
-                       (candidato["pais"] != pais_preguntado and not afirmativo):
-                        mantener = True
-                
-                else:
-                    # Si no entendemos la pregunta, mantenemos al candidato
-                    mantener = True
-                
-                if mantener:
-                    nuevos_candidatos.append(candidato)
-        
-        else:  # Modo jugador
-            for candidato in candidatos:
-                mantener = False
-                
-                if tipo_pregunta == "posicion":
-                    posicion_candidato = candidato.get("posicion", "Desconocida")
-                    es_portero = "portero" in pregunta.lower() and posicion_candidato == "Portero"
-                    es_defensa = "defensa" in pregunta.lower() and posicion_candidato == "Defensa"
-                    es_mediocampista = "mediocampista" in pregunta.lower() and posicion_candidato
-                    
-                elif tipo_pregunta == "epoca":
-                    try:
-                        año_pregunta = int(re.search(r'después del año (\d+)', pregunta).group(1))
-                        if (candidato.get("anio", 0) > año_pregunta and afirmativo) or \
-                           (candidato.get("anio", 0) <= año_pregunta and not afirmativo):
-                            mantener = True
-                    except (AttributeError, ValueError):
-                        # Si hay error en el regex o conversión, mantenemos el candidato
-                        mantener = True
-                
-                elif tipo_pregunta == "pais":
-                    try:
-                        pais_preguntado = pregunta.split("es de ")[-1].rstrip("?")
-                        if (candidato.get("pais", "") == pais_preguntado and afirmativo) or \
-                           (candidato.get("pais", "") != pais_preguntado and not afirmativo):
-                            mantener = True
-                    except:
-                        mantener = True
-                
-                elif tipo_pregunta == "titular":
-                    es_titular = candidato.get("titular", False)
-                    es_pregunta_titular = "titular" in pregunta.lower()
-                    
-                    if (es_titular and es_pregunta_titular and afirmativo) or \
-                       (not es_titular and not es_pregunta_titular and afirmativo) or \
-                       (es_titular and es_pregunta_titular and not afirmativo) or \
-                       (not es_titular and not es_pregunta_titular and not afirmativo):
-                        mantener = True
-                
-                elif tipo_pregunta == "jugador_directo":
-                    try:
-                        nombre_preguntado = pregunta.split("es ")[-1].rstrip("?")
-                        if (candidato.get("nombre", "") == nombre_preguntado and afirmativo) or \
-                           (candidato.get("nombre", "") != nombre_preguntado and not afirmativo):
-                            mantener = True
-                    except:
-                        mantener = True
-                
-                else:
-                    # Si no entendemos la pregunta, mantenemos al candidato
-                    mantener = True
-                
-                if mantener:
-                    nuevos_candidatos.append(candidato)
-        
-        # Actualizar candidatos
-        if nuevos_candidatos:
-            self.estado["candidatos"] = nuevos_candidatos
-            print(f"Candidatos restantes: {len(nuevos_candidatos)}")
-        elif candidatos:  # Si no quedan candidatos pero teníamos algunos
-            # Conservar algunos aleatoriamente para evitar quedarnos sin opciones
-            self.estado["candidatos"] = random.sample(candidatos, max(1, min(3, len(candidatos))))
-            print(f"Sin candidatos después del filtro, manteniendo {len(self.estado['candidatos'])} al azar")
-        
-        # Generar siguiente pregunta
-        return self.hacer_pregunta()
+        self.estado, resultado = self.motor().step(self.estado, respuesta)
+        return resultado
     
     def registrar_nuevo_jugador(self, nombre: str, pais: str, anio: str, posicion_id: int, titular: bool) -> bool:
         """
         Registra un nuevo jugador en la base de datos
         """
         try:
-            # Buscar o crear mundial
-            mundial_id = None
-            for mundial in self.cache.get("mundiales", []):
-                if mundial["pais"] == pais and str(mundial["anio"]) == str(anio):
-                    mundial_id = mundial["id"]
-                    break
-            
-            if not mundial_id:
-                # Crear nuevo mundial
-                mundial_id = self._registrar_nuevo_mundial(pais, str(anio))
-                if not mundial_id:
-                    return False
-            
-            # Crear nuevo jugador
-            nuevo_jugador = {
-                "nombre": nombre,
-                "mundial_id": mundial_id,
-                "posicion_id": posicion_id,
-                "titular": titular
-            }
-            
-            resultado = self._post_data("jugadores", nuevo_jugador)
-            if resultado:
-                # Actualizar caché
-                posicion_nombre = "Desconocida"
-                for pos in self.cache.get("posiciones", []):
-                    if pos["id"] == posicion_id:
-                        posicion_nombre = pos["nombre"]
+            with self._lock_escritura:
+                # Buscar o crear mundial
+                mundial_id = None
+                for mundial in self.cache.get("mundiales", []):
+                    if mundial["pais"] == pais and str(mundial["anio"]) == str(anio):
+                        mundial_id = mundial["id"]
                         break
-                    
-                jugador_completo = {
-                    "id": resultado.get("id"),
-                    "nombre": nombre,
-                    "mundial_id": mundial_id,
-                    "anio": int(anio),
-                    "pais": pais,
-                    "posicion": posicion_nombre,
-                    "posicion_id": posicion_id,
-                    "titular": titular
-                }
-                self.cache["jugadores"].append(jugador_completo)
-                return True
-            
-            return False
+                
+                if not mundial_id:
+                    # Crear nuevo mundial
+                    mundial_id = self._registrar_nuevo_mundial(pais, str(anio))
+                    if not mundial_id:
+                        return False
+                
+                # Crear nuevo jugador
+                resultado = self.repositorio.crear_jugador(nombre, mundial_id, posicion_id, titular)
+                if resultado:
+                    # Actualizar caché
+                    posicion_nombre = "Desconocida"
+                    for pos in self.cache.get("posiciones", []):
+                        if pos["id"] == posicion_id:
+                            posicion_nombre = pos["nombre"]
+                            break
+                        
+                    jugador_completo = {
+                        "id": resultado.get("id"),
+                        "nombre": nombre,
+                        "mundial_id": mundial_id,
+                        "anio": int(anio),
+                        "pais": pais,
+                        "posicion": posicion_nombre,
+                        "posicion_id": posicion_id,
+                        "titular": titular
+                    }
+                    self.cache["jugadores"].append(jugador_completo)
+                    self._notificar_cambio()
+                    return True
+                
+                return False
         except Exception as e:
             print(f"Error al registrar jugador: {e}")
             return False
     
-    def _registrar_nuevo_mundial(self, pais: str, año: str) -> Optional[int]:
+    def _registrar_nuevo_mundial(self, pais: str, año: str, notificar: bool = True) -> Optional[int]:
         """
         Registra un nuevo mundial y devuelve su ID
+        
+        Args:
+            notificar: Avisar a los observadores (los lotes lo hacen una vez al final)
         """
         try:
-            # Buscar o crear país
-            pais_id = None
-            for p in self.cache["paises"]:
-                if p["nombre"] == pais:
-                    pais_id = p["id"]
-                    break
-            
-            if not pais_id:
-                # Crear nuevo país
-                nuevo_pais = {"nombre": pais}
-                resultado = self._post_data("paises", nuevo_pais)
+            with self._lock_escritura:
+                # Buscar o crear país
+                pais_id = None
+                for p in self.cache["paises"]:
+                    if p["nombre"] == pais:
+                        pais_id = p["id"]
+                        break
+                
+                if not pais_id:
+                    # Crear nuevo país
+                    resultado = self.repositorio.crear_pais(pais)
+                    if resultado:
+                        pais_id = resultado.get("id")
+                        print(f"País {pais} registrado correctamente.")
+                        # Actualizar caché
+                        self.cache["paises"].append(resultado)
+                    else:
+                        print("Error al registrar el país.")
+                        return None
+                
+                # Crear nuevo mundial
+                resultado = self.repositorio.crear_mundial(int(año), pais_id)
                 if resultado:
-                    pais_id = resultado.get("id")
-                    print(f"País {pais} registrado correctamente.")
                     # Actualizar caché
-                    self.cache["paises"].append(resultado)
+                    resultado["pais"] = pais  # Añadir el nombre del país para facilitar el uso
+                    self.cache["mundiales"].append(resultado)
+                    if notificar:
+                        self._notificar_cambio()
+                    return resultado.get("id")
                 else:
-                    print("Error al registrar el país.")
                     return None
-            
-            # Crear nuevo mundial
-            nuevo_mundial = {
-                "anio": int(año),
-                "pais_id": pais_id
-            }
-            
-            resultado = self._post_data("mundiales", nuevo_mundial)
-            if resultado:
-                # Actualizar caché
-                resultado["pais"] = pais  # Añadir el nombre del país para facilitar el uso
-                self.cache["mundiales"].append(resultado)
-                return resultado.get("id")
-            else:
-                return None
         except Exception as e:
             print(f"Error al registrar mundial: {e}")
             return None
@@ -565,6 +367,189 @@ class MundialesAkinator:
             print(f"Error al registrar equipo: {e}")
             return False
     
+    @staticmethod
+    def _es_titular(valor: Any) -> Optional[bool]:
+        """
+        Interpreta la columna titular (True/False, 1/0, "sí"/"no"...); None si no es válida
+        """
+        if isinstance(valor, bool):
+            return valor
+        texto = normalizar(str(valor if valor is not None else "")).strip()
+        if texto in ("1", "true", "si", "s", "x", "titular"):
+            return True
+        if texto in ("", "0", "false", "no", "n", "suplente"):
+            return False
+        return None
+    
+    def _validar_lote(self, filas: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Valida y normaliza las filas de un lote contra los datos en caché
+        
+        Returns:
+            (filas normalizadas con nombre, pais, anio, posicion_id y titular;
+            errores con su número de fila)
+        """
+        paises = {normalizar(p["nombre"]): p["nombre"] for p in self.cache["paises"] or []}
+        mundial_por_anio = {int(m["anio"]): m["pais"] for m in self.cache["mundiales"] or []}
+        posiciones = {}
+        for pos in self.cache["posiciones"] or []:
+            posiciones[str(pos["id"])] = pos["id"]
+            posiciones[normalizar(pos["nombre"])] = pos["id"]
+            if pos.get("abreviatura"):
+                posiciones[normalizar(pos["abreviatura"])] = pos["id"]
+        
+        validas, errores = [], []
+        for numero, fila in enumerate(filas, start=1):
+            if not isinstance(fila, dict):
+                errores.append(f"Fila {numero}: formato no válido")
+                continue
+            
+            nombre = str(fila.get("nombre") or "").strip()
+            pais = str(fila.get("pais") or "").strip()
+            posicion = fila.get("posicion_id", fila.get("posicion"))
+            posicion_id = posiciones.get(normalizar(str(posicion if posicion is not None else "")).strip())
+            titular = self._es_titular(fila.get("titular", False))
+            try:
+                anio = int(fila.get("anio"))
+            except (TypeError, ValueError):
+                anio = None
+            
+            if not nombre or not pais:
+                errores.append(f"Fila {numero}: faltan el nombre o el país")
+            elif anio is None or anio < 1930:
+                errores.append(f"Fila {numero}: año no válido ({fila.get('anio')})")
+            elif posicion_id is None:
+                errores.append(f"Fila {numero}: posición desconocida ({posicion})")
+            elif titular is None:
+                errores.append(f"Fila {numero}: valor de titular no válido ({fila.get('titular')})")
+            else:
+                # Los países se escriben como en la base ("brasil" -> "BRASIL"), y
+                # los nuevos como en su primera fila
+                pais = paises.setdefault(normalizar(pais), pais)
+                campeon = mundial_por_anio.setdefault(anio, pais)
+                if campeon != pais:
+                    errores.append(f"Fila {numero}: el mundial de {anio} ya lo ganó {campeon}")
+                else:
+                    validas.append({"nombre": nombre, "pais": pais, "anio": anio,
+                                    "posicion_id": posicion_id, "titular": titular})
+        return validas, errores
+    
+    def registrar_lote(self, filas: List[Dict], tamano_lote: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Registra una lista de jugadores (por ejemplo una plantilla completa)
+        
+        Se validan todas las filas antes de escribir nada: si alguna tiene
+        errores no se registra ninguna. Después se crean una sola vez los
+        países y mundiales que falten y los jugadores se envían en lotes de
+        tamano_lote (una petición o transacción por lote, en lugar de una por
+        jugador). Las cachés se actualizan y se avisa a los observadores una
+        única vez al final.
+        
+        Args:
+            filas: Diccionarios con nombre, pais, anio, posicion (id, nombre o
+                abreviatura; también posicion_id) y titular
+            tamano_lote: Jugadores por escritura (por defecto REGISTRO_TAMANO_LOTE)
+        
+        Returns:
+            Resumen con filas, validas (si pasaron la validación), insertados,
+            existentes, mundiales_creados, errores, segundos y filas_por_segundo
+        """
+        inicio = time.perf_counter()
+        tamano_lote = tamano_lote or self.tamano_lote
+        resumen = {"filas": len(filas), "validas": False, "insertados": 0, "existentes": 0,
+                   "mundiales_creados": 0, "errores": []}
+        
+        def terminar():
+            resumen["segundos"] = round(time.perf_counter() - inicio, 3)
+            resumen["filas_por_segundo"] = round(len(filas) / max(time.perf_counter() - inicio, 1e-9), 1)
+            return resumen
+        
+        if not self.cache["paises"]:
+            self.cargar_datos()
+        
+        with self._lock_escritura:
+            validas, resumen["errores"] = self._validar_lote(filas)
+            if resumen["errores"]:
+                return terminar()
+            resumen["validas"] = True
+            
+            # Índices sobre la caché para no recorrerla por cada fila. Los nombres
+            # se comparan con la misma clave que la API y la base (clave_nombre)
+            mundiales = {(m["pais"], int(m["anio"])): m["id"] for m in self.cache["mundiales"]}
+            registrados = {(clave_nombre(j["nombre"]), j["pais"], int(j["anio"])) for j in self.cache["jugadores"]}
+            ids_cache = {j["id"] for j in self.cache["jugadores"]}
+            posiciones = {pos["id"]: pos for pos in self.cache["posiciones"]}
+            cambios = False
+            
+            # Las filas ya registradas o repetidas en el mismo lote cuentan como existentes
+            pendientes = []
+            for fila in validas:
+                clave = (clave_nombre(fila["nombre"]), fila["pais"], fila["anio"])
+                if clave in registrados:
+                    resumen["existentes"] += 1
+                    continue
+                registrados.add(clave)
+                pendientes.append(fila)
+            
+            try:
+                # Países y mundiales nuevos: uno por cada combinación, no por jugador
+                for pais, anio in dict.fromkeys((f["pais"], f["anio"]) for f in pendientes):
+                    if (pais, anio) not in mundiales:
+                        mundial_id = self._registrar_nuevo_mundial(pais, str(anio), notificar=False)
+                        if not mundial_id:
+                            resumen["errores"].append(f"Error al registrar el mundial de {pais} en {anio}")
+                            return terminar()
+                        mundiales[(pais, anio)] = mundial_id
+                        resumen["mundiales_creados"] += 1
+                
+                for desde in range(0, len(pendientes), tamano_lote):
+                    lote = pendientes[desde:desde + tamano_lote]
+                    creados = self.repositorio.crear_jugadores([{
+                        "nombre": f["nombre"],
+                        "mundial_id": mundiales[(f["pais"], f["anio"])],
+                        "posicion_id": f["posicion_id"],
+                        "titular": f["titular"]
+                    } for f in lote])
+                    if not creados or any(creado is None for creado in creados):
+                        resumen["errores"].append(f"Error al registrar las filas {desde + 1}-{desde + len(lote)} pendientes")
+                        return terminar()
+                    
+                    for fila, creado in zip(lote, creados):
+                        # El repositorio puede devolver un jugador que ya existía (por
+                        # ejemplo con otras mayúsculas): solo cuentan los que crea
+                        if creado["id"] in ids_cache:
+                            resumen["existentes"] += 1
+                            continue
+                        if creado.get("nuevo", True):
+                            resumen["insertados"] += 1
+                        else:
+                            resumen["existentes"] += 1
+                        
+                        # Con los datos guardados en la base, no los de la fila
+                        posicion_id = creado.get("posicion_id", fila["posicion_id"])
+                        posicion = posiciones.get(posicion_id, {})
+                        ids_cache.add(creado["id"])
+                        self.cache["jugadores"].append({
+                            "id": creado["id"],
+                            "nombre": creado.get("nombre", fila["nombre"]),
+                            "mundial_id": mundiales[(fila["pais"], fila["anio"])],
+                            "anio": fila["anio"],
+                            "pais": fila["pais"],
+                            "posicion": posicion.get("nombre", "Desconocida"),
+                            "posicion_id": posicion_id,
+                            "posicion_abr": posicion.get("abreviatura", ""),
+                            "titular": 1 if creado.get("titular", fila["titular"]) else 0
+                        })
+                        cambios = True
+            finally:
+                if cambios or resumen["mundiales_creados"]:
+                    self._notificar_cambio()
+        
+        terminar()
+        print(f"Lote registrado: {resumen['insertados']} jugadores nuevos, {resumen['existentes']} existentes, "
+              f"{resumen['mundiales_creados']} mundiales nuevos ({resumen['filas_por_segundo']} filas/s)")
+        return resumen
+    
     def jugar(self):
         """
         Inicia el juego interactivo en consola
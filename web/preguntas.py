@@ -0,0 +1,159 @@
+import math
+import operator
+from collections import Counter
+from functools import reduce
+from typing import Any, Callable, Collection, Dict, List, Optional
+from indice_candidatos import IndiceCandidatos
+
+# Operadores soportados por las preguntas (valor del candidato, valor de la pregunta)
+OPERADORES: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    ">": operator.gt
+}
+
+# Países considerados sudamericanos para la pregunta de continente
+PAISES_SUDAMERICANOS = ["brasil", "argentina", "uruguay"]
+
+# Catálogo de preguntas por modo: (atributo, operador, plantilla, valores fijos).
+# Si no se indican valores fijos, se genera una pregunta por cada valor del atributo.
+CATALOGO = {
+    "equipo": [
+        ("anio", ">", "¿El equipo ganó el mundial después del año {valor}?", None),
+        ("sudamericano", "=", "¿El equipo es de Sudamérica?", [True]),
+        ("titulos", ">", "¿El país ha ganado más de 2 mundiales?", [2]),
+        ("titulos", "=", "¿El país ha ganado solo un mundial?", [1]),
+        ("pais", "=", "¿El equipo es {valor}?", None)
+    ],
+    "jugador": [
+        ("posicion", "=", "¿El jugador es {valor}?", None),
+        ("anio", ">", "¿El jugador ganó el mundial después del año {valor}?", None),
+        ("pais", "=", "¿El jugador es de {valor}?", None),
+        ("titular", "=", "¿El jugador era titular?", [True]),
+        ("nombre", "=", "¿El jugador es {valor}?", None)
+    ]
+}
+
+def atributos_equipo(mundiales: List[Dict]) -> Dict[str, Callable[[Dict], Any]]:
+    """
+    Funciones que extraen los atributos preguntables de un mundial
+    """
+    titulos = Counter(m["pais"] for m in mundiales)
+    return {
+        "anio": lambda m: m["anio"],
+        "pais": lambda m: m["pais"],
+        "sudamericano": lambda m: m["pais"].lower() in PAISES_SUDAMERICANOS,
+        "titulos": lambda m: titulos[m["pais"]]
+    }
+
+def atributos_jugador(jugadores: List[Dict]) -> Dict[str, Callable[[Dict], Any]]:
+    """
+    Funciones que extraen los atributos preguntables de un jugador
+    """
+    return {
+        "anio": lambda j: j.get("anio", 0),
+        "pais": lambda j: j.get("pais", ""),
+        "posicion": lambda j: j.get("posicion", "Desconocida").lower(),
+        "titular": lambda j: bool(j.get("titular", False)),
+        "nombre": lambda j: j.get("nombre", "")
+    }
+
+def entropia(proporcion: float) -> float:
+    """
+    Entropía binaria (en bits) de una división sí/no
+    """
+    if proporcion <= 0 or proporcion >= 1:
+        return 0.0
+    return -(proporcion * math.log2(proporcion) + (1 - proporcion) * math.log2(1 - proporcion))
+
+class Pregunta:
+    """
+    Pregunta tipada sobre un atributo de los candidatos.
+
+    El filtrado no depende del texto: se usa el atributo, el operador y el
+    valor, y la máscara de candidatos que responderían "sí" se compila una
+    sola vez al construir el registro.
+    """
+
+    def __init__(self, atributo: str, operador: str, valor: Any, plantilla: str):
+        self.atributo = atributo
+        self.operador = operador
+        self.valor = valor
+        self.plantilla = plantilla
+        self.id = f"{atributo}{operador}{valor}"
+        self.mascara = 0
+
+        comparar = OPERADORES[operador]
+        self.predicado: Callable[[Any], bool] = lambda valor_candidato: comparar(valor_candidato, valor)
+
+    def texto(self) -> str:
+        """
+        Texto de la pregunta para mostrar al usuario
+        """
+        return self.plantilla.format(valor=self.valor)
+
+    def __repr__(self) -> str:
+        return f"Pregunta({self.id!r})"
+
+class RegistroPreguntas:
+    """
+    Registro de todas las preguntas posibles de un modo de juego, con su
+    máscara de candidatos precompilada sobre el índice de bits
+    """
+
+    def __init__(self, modo: str, candidatos: List[Dict]):
+        atributos = atributos_equipo(candidatos) if modo == "equipo" else atributos_jugador(candidatos)
+
+        self.modo = modo
+        self.indice = IndiceCandidatos(candidatos, atributos)
+        self.preguntas: Dict[str, Pregunta] = {}
+
+        for atributo, operador, plantilla, valores in CATALOGO[modo]:
+            for valor in valores if valores is not None else sorted(self.indice.bitmaps[atributo]):
+                pregunta = Pregunta(atributo, operador, valor, plantilla)
+                # Evaluar el predicado una vez por valor distinto, no por candidato
+                pregunta.mascara = reduce(operator.or_, (
+                    bits for valor_candidato, bits in self.indice.bitmaps[atributo].items()
+                    if pregunta.predicado(valor_candidato)
+                ), 0)
+                self.preguntas[pregunta.id] = pregunta
+
+    def mejor_pregunta(self, mascara: int, excluidas: Optional[Collection[str]] = None) -> Optional[Pregunta]:
+        """
+        Pregunta con mayor reducción esperada de entropía sobre los candidatos
+
+        Con candidatos equiprobables, la ganancia de información de una pregunta
+        sí/no es la entropía binaria de la proporción de candidatos que responderían "sí".
+
+        Args:
+            mascara: Candidatos que siguen siendo posibles
+            excluidas: Identificadores de preguntas que no se deben repetir
+
+        Returns:
+            La mejor pregunta, o None si ninguna distingue a los candidatos
+        """
+        total = self.indice.contar(mascara)
+        if not total:
+            return None
+
+        mejor = None
+        mejor_ganancia = 0.0
+
+        for pregunta in self.preguntas.values():
+            if excluidas and pregunta.id in excluidas:
+                continue
+
+            ganancia = entropia(self.indice.contar(mascara & pregunta.mascara) / total)
+            if ganancia > mejor_ganancia:
+                mejor = pregunta
+                mejor_ganancia = ganancia
+
+        return mejor
+
+    def get(self, pregunta_id: str) -> Optional[Pregunta]:
+        """
+        Devuelve la pregunta registrada con ese identificador
+        """
+        return self.preguntas.get(pregunta_id)
+
+    def __iter__(self):
+        return iter(self.preguntas.values())
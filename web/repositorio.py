@@ -0,0 +1,433 @@
+"""
+Repositorio de datos de mundiales con dos implementaciones intercambiables.
+
+- RepositorioAPI: la API Node/Express (api/app.js) a través del cliente HTTP
+  compartido. Es la opción por defecto.
+- RepositorioSQLite: una base SQLite local importada del volcado
+  agenteadivinador.sql, con los índices que usan las consultas. Para
+  despliegues de un solo nodo, pruebas y benchmarks sin ningún salto de red.
+
+Ambas devuelven los mismos diccionarios que los endpoints de la API, así que
+los agentes no distinguen cuál están usando. Se elige con DATOS_BACKEND
+("api" o "sqlite").
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from urllib.parse import quote
+import requests
+from dotenv import load_dotenv
+from cliente_api import obtener_cliente
+from gazetteer import clave_nombre, normalizar
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Listados completos que se pueden pedir con listado()
+LISTADOS = ["paises", "mundiales", "posiciones", "jugadores"]
+
+class Repositorio(ABC):
+    """
+    Operaciones de datos que usan los agentes (mismo formato que la API)
+
+    Las lecturas devuelven None si los datos no están disponibles.
+    """
+
+    # Si los datos vienen de otro servicio (tiene sentido cachearlos en disco)
+    remoto = False
+
+    @abstractmethod
+    def paises(self) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def mundiales(self) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def mundial(self, mundial_id: int) -> Optional[Dict]:
+        """
+        Mundial con sus jugadores ({"titulares": [...], "suplentes": [...]})
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def posiciones(self) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def jugadores(self) -> Optional[List[Dict]]:
+        """
+        Todos los jugadores con su mundial, país y posición
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def buscar_jugadores(self, texto: str) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def crear_pais(self, nombre: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def crear_mundial(self, anio: int, pais_id: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def crear_jugador(self, nombre: str, mundial_id: int, posicion_id: int, titular: bool) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def crear_jugadores(self, jugadores: List[Dict]) -> Optional[List[Dict]]:
+        """
+        Crea varios jugadores de una vez (los existentes se devuelven sin duplicarlos)
+
+        Args:
+            jugadores: Diccionarios con nombre, mundial_id, posicion_id y titular
+
+        Returns:
+            Los jugadores en el mismo orden, o None si falla alguno. Si el
+            repositorio lo sabe, cada uno lleva "nuevo" (False si ya existía)
+        """
+        creados = []
+        for jugador in jugadores:
+            creado = self.crear_jugador(jugador["nombre"], jugador["mundial_id"], jugador["posicion_id"], jugador["titular"])
+            if not creado:
+                return None
+            creados.append(creado)
+        return creados
+
+    def listado(self, nombre: str) -> Optional[List[Dict]]:
+        """
+        Uno de los LISTADOS por su nombre
+        """
+        return getattr(self, nombre)()
+
+    def endpoint_modificado(self, etags: Dict[str, Optional[str]]) -> Optional[str]:
+        """
+        Primer listado que cambió respecto a los ETag indicados, o None
+
+        Solo aplica a repositorios remotos; lanza RequestException si no se
+        puede comprobar.
+        """
+        return None
+
+class RepositorioAPI(Repositorio):
+    """
+    Repositorio sobre la API HTTP
+    """
+
+    remoto = True
+
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+        self.cliente = obtener_cliente(api_url)
+        # ETag de la última respuesta de cada listado (para revalidar la instantánea)
+        self.etags: Dict[str, Optional[str]] = {}
+
+    def _listado(self, endpoint: str) -> Optional[List[Dict]]:
+        try:
+            response = self.cliente.get(endpoint)
+            response.raise_for_status()
+            self.etags[endpoint] = response.headers.get("ETag")
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error al obtener datos de la API: {e}")
+            return None
+
+    def paises(self):
+        return self._listado("paises")
+
+    def mundiales(self):
+        return self._listado("mundiales")
+
+    def mundial(self, mundial_id):
+        return self.cliente.get_json(f"mundiales/{mundial_id}")
+
+    def posiciones(self):
+        return self._listado("posiciones")
+
+    def jugadores(self):
+        return self._listado("jugadores")
+
+    def buscar_jugadores(self, texto):
+        return self.cliente.get_json(f"jugadores/buscar?q={quote(texto)}")
+
+    def crear_pais(self, nombre):
+        return self.cliente.post_json("paises", {"nombre": nombre})
+
+    def crear_mundial(self, anio, pais_id):
+        return self.cliente.post_json("mundiales", {"anio": anio, "pais_id": pais_id})
+
+    def crear_jugador(self, nombre, mundial_id, posicion_id, titular):
+        return self.cliente.post_json("jugadores", {
+            "nombre": nombre,
+            "mundial_id": mundial_id,
+            "posicion_id": posicion_id,
+            "titular": titular
+        })
+
+    def crear_jugadores(self, jugadores):
+        try:
+            response = self.cliente.post("jugadores/lote", json={"jugadores": jugadores})
+            if response.status_code == 404:
+                # API sin la ruta de lotes: uno a uno
+                return super().crear_jugadores(jugadores)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error al enviar datos a la API: {e}")
+            return None
+
+    def endpoint_modificado(self, etags):
+        for endpoint in LISTADOS:
+            etag = etags.get(endpoint)
+            cabeceras = {"If-None-Match": etag} if etag else {}
+            response = self.cliente.get(endpoint, headers=cabeceras)
+
+            if response.status_code == 304 or response.status_code == 404:
+                # Sin cambios (o endpoint no disponible en esta versión de la API)
+                continue
+
+            response.raise_for_status()
+            return endpoint
+        return None
+
+# Esquema de la base local: el del volcado de MySQL más los índices de las consultas
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS paises (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS mundiales (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    anio INTEGER NOT NULL UNIQUE,
+    pais_id INTEGER NOT NULL REFERENCES paises(id)
+);
+CREATE TABLE IF NOT EXISTS posiciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    abreviatura TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS jugadores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL COLLATE NOCASE,
+    mundial_id INTEGER NOT NULL REFERENCES mundiales(id),
+    posicion_id INTEGER NOT NULL REFERENCES posiciones(id),
+    titular INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_paises_nombre ON paises(nombre);
+CREATE INDEX IF NOT EXISTS idx_mundiales_pais ON mundiales(pais_id, anio);
+CREATE INDEX IF NOT EXISTS idx_jugadores_mundial ON jugadores(mundial_id, posicion_id, titular);
+-- Índice de bases anteriores: los nombres se comparan ahora con clave_nombre()
+DROP INDEX IF EXISTS idx_jugadores_nombre;
+CREATE INDEX IF NOT EXISTS idx_jugadores_posicion ON jugadores(posicion_id);
+"""
+
+# Columnas de un mundial y de un jugador con sus datos relacionados (como en la API)
+_SELECT_MUNDIAL = """
+    SELECT m.id, m.anio, p.id AS pais_id, p.nombre AS pais
+    FROM mundiales m
+    JOIN paises p ON m.pais_id = p.id
+"""
+_SELECT_JUGADOR = """
+    SELECT j.id, j.nombre, pos.nombre AS posicion, pos.id AS posicion_id, pos.abreviatura AS posicion_abr,
+           j.titular, m.id AS mundial_id, m.anio, p.nombre AS pais
+    FROM jugadores j
+    JOIN mundiales m ON j.mundial_id = m.id
+    JOIN paises p ON m.pais_id = p.id
+    JOIN posiciones pos ON j.posicion_id = pos.id
+"""
+
+def importar_volcado(conexion: sqlite3.Connection, ruta_sql: str) -> int:
+    """
+    Carga los datos de un volcado de MySQL (sentencias INSERT/REPLACE INTO)
+
+    Las definiciones de tablas del volcado se ignoran (el esquema es
+    ESQUEMA_SQLITE); solo se traducen los escapes de cadenas de MySQL.
+
+    Returns:
+        Número de sentencias ejecutadas
+    """
+    with open(ruta_sql, encoding="utf-8") as f:
+        contenido = f.read()
+
+    escapes = {"'": "''", '"': '"', "\\": "\\", "n": "\n", "r": "\r", "t": "\t", "0": ""}
+    sentencias = 0
+    for sentencia in re.split(r";\s*\n", contenido):
+        # Quitar los comentarios de línea que preceden a cada sentencia
+        sentencia = re.sub(r"^\s*--.*$", "", sentencia, flags=re.MULTILINE).strip()
+        if not re.match(r"(INSERT|REPLACE)\s+INTO", sentencia, re.IGNORECASE):
+            continue
+        sentencia = re.sub(r"\\(.)", lambda m: escapes.get(m.group(1), m.group(1)), sentencia)
+        conexion.execute(sentencia)
+        sentencias += 1
+    return sentencias
+
+class RepositorioSQLite(Repositorio):
+    """
+    Repositorio sobre una base SQLite local (archivo o memoria)
+    """
+
+    def __init__(self, ruta: str = "mundiales.db", ruta_sql: Optional[str] = None):
+        """
+        Args:
+            ruta: Archivo de la base (":memory:" para no guardarla en disco)
+            ruta_sql: Volcado con el que se llena la base si está vacía
+        """
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.create_function("normalizar", 1, normalizar, deterministic=True)
+        # Los nombres repetidos se detectan con la misma clave que la API: COLLATE
+        # NOCASE solo ignora las mayúsculas ASCII ("Álvarez" != "álvarez")
+        self.conexion.create_function("clave_nombre", 1, clave_nombre, deterministic=True)
+
+        with self._lock, self.conexion:
+            self.conexion.execute("PRAGMA journal_mode=WAL")
+            self.conexion.executescript(ESQUEMA_SQLITE)
+            vacia = self.conexion.execute("SELECT COUNT(*) FROM mundiales").fetchone()[0] == 0
+            if vacia and ruta_sql and os.path.exists(ruta_sql):
+                sentencias = importar_volcado(self.conexion, ruta_sql)
+                print(f"Base {ruta} importada de {ruta_sql} ({sentencias} sentencias)")
+        # Fuera de la transacción (dentro de una no tiene efecto); el volcado
+        # inserta los jugadores antes que los mundiales a los que apuntan
+        self.conexion.execute("PRAGMA foreign_keys=ON")
+
+    def _consulta(self, sql: str, parametros: tuple = ()) -> List[Dict]:
+        with self._lock:
+            return [dict(fila) for fila in self.conexion.execute(sql, parametros)]
+
+    def paises(self):
+        return self._consulta("SELECT * FROM paises ORDER BY nombre")
+
+    def mundiales(self):
+        return self._consulta(f"{_SELECT_MUNDIAL} ORDER BY m.anio DESC")
+
+    def mundial(self, mundial_id):
+        filas = self._consulta(f"{_SELECT_MUNDIAL} WHERE m.id = ?", (mundial_id,))
+        if not filas:
+            return None
+
+        mundial = filas[0]
+        # Por línea (posicion_id sigue el orden portero, defensa, medio, delantero)
+        jugadores = self._consulta("""
+            SELECT j.id, j.nombre, p.nombre AS posicion, p.id AS posicion_id, p.abreviatura AS posicion_abr, j.titular
+            FROM jugadores j
+            JOIN posiciones p ON j.posicion_id = p.id
+            WHERE j.mundial_id = ?
+            ORDER BY p.id, j.titular DESC, j.nombre
+        """, (mundial_id,))
+        mundial["jugadores"] = {
+            "titulares": [j for j in jugadores if j["titular"]],
+            "suplentes": [j for j in jugadores if not j["titular"]]
+        }
+        return mundial
+
+    def posiciones(self):
+        return self._consulta("SELECT * FROM posiciones ORDER BY id")
+
+    def jugadores(self):
+        return self._consulta(f"{_SELECT_JUGADOR} ORDER BY m.anio DESC, j.titular DESC, j.posicion_id, j.nombre")
+
+    def buscar_jugadores(self, texto):
+        # Como el LIKE de MySQL con collation española: sin tildes ni mayúsculas
+        return self._consulta(
+            f"{_SELECT_JUGADOR} WHERE normalizar(j.nombre) LIKE ? ORDER BY m.anio DESC, j.nombre",
+            (f"%{normalizar(texto)}%",)
+        )
+
+    def crear_pais(self, nombre):
+        with self._lock, self.conexion:
+            fila = self.conexion.execute(
+                "SELECT id, nombre FROM paises WHERE clave_nombre(nombre) = ?", (clave_nombre(nombre),)
+            ).fetchone()
+            if fila:
+                return dict(fila)
+            cursor = self.conexion.execute("INSERT INTO paises (nombre) VALUES (?)", (nombre,))
+            return {"id": cursor.lastrowid, "nombre": nombre}
+
+    def crear_mundial(self, anio, pais_id):
+        with self._lock, self.conexion:
+            fila = self.conexion.execute(
+                "SELECT id FROM mundiales WHERE anio = ? AND pais_id = ?", (anio, pais_id)
+            ).fetchone()
+            mundial_id = fila["id"] if fila else self.conexion.execute(
+                "INSERT INTO mundiales (anio, pais_id) VALUES (?, ?)", (anio, pais_id)
+            ).lastrowid
+            fila = self.conexion.execute(f"{_SELECT_MUNDIAL} WHERE m.id = ?", (mundial_id,)).fetchone()
+        return dict(fila)
+
+    def crear_jugador(self, nombre, mundial_id, posicion_id, titular):
+        with self._lock, self.conexion:
+            fila = self.conexion.execute(
+                "SELECT id FROM jugadores WHERE mundial_id = ? AND clave_nombre(nombre) = ?",
+                (mundial_id, clave_nombre(nombre))
+            ).fetchone()
+            jugador_id = fila["id"] if fila else self.conexion.execute(
+                "INSERT INTO jugadores (nombre, mundial_id, posicion_id, titular) VALUES (?, ?, ?, ?)",
+                (nombre, mundial_id, posicion_id, 1 if titular else 0)
+            ).lastrowid
+            fila = self.conexion.execute(f"{_SELECT_JUGADOR} WHERE j.id = ?", (jugador_id,)).fetchone()
+        return dict(fila)
+
+    def crear_jugadores(self, jugadores):
+        filas = [(j["nombre"], j["mundial_id"], j["posicion_id"], 1 if j["titular"] else 0) for j in jugadores]
+        with self._lock, self.conexion:
+            # Una transacción para todo el lote, con la escritura reservada desde
+            # el principio para que ultimo_id siga valiendo hasta el commit
+            self.conexion.execute("BEGIN IMMEDIATE")
+            ultimo_id = self.conexion.execute("SELECT COALESCE(MAX(id), 0) FROM jugadores").fetchone()[0]
+            # El NOT EXISTS recorre solo la plantilla del mundial (idx_jugadores_mundial)
+            self.conexion.executemany("""
+                INSERT INTO jugadores (nombre, mundial_id, posicion_id, titular)
+                SELECT ?1, ?2, ?3, ?4
+                WHERE NOT EXISTS (SELECT 1 FROM jugadores WHERE mundial_id = ?2 AND clave_nombre(nombre) = clave_nombre(?1))
+            """, filas)
+            # Los ids se buscan por la clave del nombre, así "alvarez " devuelve
+            # el "Álvarez" que ya existía
+            ids = [
+                self.conexion.execute(
+                    "SELECT id FROM jugadores WHERE mundial_id = ? AND clave_nombre(nombre) = ?",
+                    (j["mundial_id"], clave_nombre(j["nombre"]))
+                ).fetchone()[0]
+                for j in jugadores
+            ]
+            unicos = sorted(set(ids))
+            creados = {
+                fila["id"]: dict(fila)
+                for fila in self.conexion.execute(
+                    f"{_SELECT_JUGADOR} WHERE j.id IN ({', '.join('?' * len(unicos))})", unicos
+                )
+            }
+        # AUTOINCREMENT no reutiliza ids: los mayores que ultimo_id son de este lote
+        return [dict(creados[jugador_id], nuevo=jugador_id > ultimo_id) for jugador_id in ids]
+
+# Un repositorio por configuración, compartido por todos los agentes
+_repositorios: Dict[tuple, Repositorio] = {}
+_lock_repositorios = threading.Lock()
+
+def obtener_repositorio(api_url: Optional[str] = None) -> Repositorio:
+    """
+    Repositorio configurado con DATOS_BACKEND ("api" o "sqlite")
+
+    Args:
+        api_url: URL de la API para el backend "api" (por defecto API_BASE_URL)
+    """
+    backend = os.getenv("DATOS_BACKEND", "api")
+    if backend == "sqlite":
+        clave = (backend, os.getenv("DATOS_SQLITE", "mundiales.db"), os.getenv("DATOS_VOLCADO_SQL", "../agenteadivinador.sql"))
+    elif backend == "api":
+        clave = (backend, api_url or os.getenv("API_BASE_URL", "http://localhost:3000/api"))
+    else:
+        raise ValueError(f"DATOS_BACKEND desconocido: {backend} (opciones: api, sqlite)")
+
+    with _lock_repositorios:
+        if clave not in _repositorios:
+            _repositorios[clave] = RepositorioSQLite(*clave[1:]) if backend == "sqlite" else RepositorioAPI(*clave[1:])
+        return _repositorios[clave]
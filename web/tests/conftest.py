@@ -0,0 +1,36 @@
+"""
+Configuración común de las pruebas.
+
+Los módulos de web/ se importan entre sí por su nombre (from gazetteer import
+...), así que la carpeta se añade al path. Los datos de prueba son los del
+volcado agenteadivinador.sql, cargados en una base SQLite en memoria.
+"""
+
+import os
+import sys
+
+import pytest
+
+WEB = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WEB)
+
+VOLCADO_SQL = os.path.join(os.path.dirname(WEB), "agenteadivinador.sql")
+
+@pytest.fixture(scope="session")
+def datos():
+    """
+    Listados del volcado: paises, mundiales, posiciones y jugadores
+    """
+    from repositorio import RepositorioSQLite
+
+    repositorio = RepositorioSQLite(":memory:", VOLCADO_SQL)
+    return {nombre: repositorio.listado(nombre) for nombre in ["paises", "mundiales", "posiciones", "jugadores"]}
+
+@pytest.fixture
+def repositorio_sqlite():
+    """
+    Repositorio SQLite en memoria recién importado (cada prueba tiene el suyo)
+    """
+    from repositorio import RepositorioSQLite
+
+    return RepositorioSQLite(":memory:", VOLCADO_SQL)
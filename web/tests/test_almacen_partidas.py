@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pytest
+
+from almacen_partidas import AlmacenPartidas, AlmacenPartidasSQLite
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def almacen(request, tmp_path):
+    if request.param == "memoria":
+        return AlmacenPartidas(ttl=60, max_partidas=3)
+    return AlmacenPartidasSQLite(str(tmp_path / "partidas.db"), ttl=60, max_partidas=3)
+
+def test_guardar_y_obtener(almacen):
+    estado = {"modo": "equipo", "probabilidades": np.array([0.25, 0.75]), "preguntas_hechas": ["p1"]}
+    partida_id = almacen.crear(estado)
+    recuperado = almacen.obtener(partida_id)
+    assert recuperado["preguntas_hechas"] == ["p1"]
+    assert np.array_equal(recuperado["probabilidades"], estado["probabilidades"])
+
+    # Lo devuelto es una copia: modificarla no cambia la partida guardada
+    recuperado["preguntas_hechas"].append("p2")
+    assert almacen.obtener(partida_id)["preguntas_hechas"] == ["p1"]
+
+def test_eliminar_y_desconocida(almacen):
+    partida_id = almacen.crear({"modo": "jugador"})
+    almacen.eliminar(partida_id)
+    assert almacen.obtener(partida_id) is None
+    assert almacen.obtener(None) is None
+    assert almacen.obtener("no-existe") is None
+
+def test_caducidad(almacen):
+    partida_id = almacen.crear({"modo": "equipo"})
+    almacen.ttl = 0.01
+    time.sleep(0.02)
+    assert almacen.obtener(partida_id) is None
+
+def test_maximo_de_partidas(almacen):
+    ids = [almacen.crear({"n": i}) for i in range(5)]
+    assert len(almacen) == 3
+    assert almacen.obtener(ids[0]) is None
+    assert almacen.obtener(ids[-1]) == {"n": 4}
+
+def test_sqlite_compartido_entre_instancias(tmp_path):
+    # Dos workers con el mismo archivo ven las mismas partidas
+    ruta = str(tmp_path / "partidas.db")
+    partida_id = AlmacenPartidasSQLite(ruta).crear({"modo": "equipo"})
+    assert AlmacenPartidasSQLite(ruta).obtener(partida_id) == {"modo": "equipo"}
+
+def test_partida_continua_en_otro_worker(tmp_path):
+    # Dos workers con su propio MundialesAkinator sobre la misma base: el
+    # segundo carga los datos después de un registro que los reordena
+    from conftest import VOLCADO_SQL
+    from mundiales_akinator import MundialesAkinator
+    from repositorio import RepositorioSQLite
+
+    def worker(nombre):
+        akinator = MundialesAkinator(ruta_instantanea=str(tmp_path / f"{nombre}.pkl"))
+        akinator.repositorio = RepositorioSQLite(str(tmp_path / "mundiales.db"), VOLCADO_SQL)
+        akinator.cargar_datos()
+        return akinator
+
+    primero = worker("primero")
+    ultimo = max(primero.cache["mundiales"], key=lambda m: m["anio"])
+    nuevo = primero.repositorio.crear_jugador("Aaa Nuevo", ultimo["id"], 1, True)
+    segundo = worker("segundo")
+    ids = [j["id"] for j in segundo.cache["jugadores"]]
+    # El jugador nuevo no queda al final: cambian las posiciones de los demás
+    assert ids.index(nuevo["id"]) < len(ids) - 1
+    assert primero.motor().huella != segundo.motor().huella
+
+    almacen = AlmacenPartidasSQLite(str(tmp_path / "partidas.db"))
+    estado, _ = primero.motor().iniciar("jugador")
+    estado, _ = primero.motor().hacer_pregunta(estado)
+    estado, _ = primero.motor().step(estado, "sí")
+    partida_id = almacen.crear(estado)
+
+    estado = almacen.obtener(partida_id)
+    esperado, _ = primero.motor().step(estado, "no")
+    continuado, _ = segundo.motor().step(estado, "no")
+    assert continuado["candidatos"] == esperado["candidatos"]
+    assert nuevo["id"] not in continuado["candidatos"]
@@ -0,0 +1,43 @@
+import pytest
+
+from arbol_preguntas import ArbolPreguntas
+from preguntas import RegistroPreguntas
+
+def _recorrer(arbol, registro, candidato_posicion):
+    """
+    Responde con la verdad para el candidato y devuelve la máscara de la hoja
+    """
+    bit = 1 << candidato_posicion
+    mascara = registro.indice.todos
+    nodo = arbol.raiz
+    while arbol.pregunta(nodo) is not None:
+        pregunta = registro.get(arbol.pregunta(nodo))
+        afirmativo = bool(pregunta.mascara & bit)
+        mascara &= pregunta.mascara if afirmativo else ~pregunta.mascara
+        nodo = arbol.siguiente(nodo, afirmativo)
+    return mascara
+
+@pytest.mark.parametrize("modo", ["equipo", "jugador"])
+def test_cada_candidato_llega_a_una_hoja_que_lo_contiene(datos, modo):
+    candidatos = datos["mundiales"] if modo == "equipo" else datos["jugadores"]
+    registro = RegistroPreguntas(modo, candidatos)
+    arbol = ArbolPreguntas(registro, max_candidatos_hoja=2)
+    for posicion in range(len(candidatos)):
+        hoja = _recorrer(arbol, registro, posicion)
+        assert hoja & (1 << posicion)
+        assert registro.indice.contar(hoja) <= 2 or registro.mejor_pregunta(hoja) is None
+
+def test_raiz_es_la_mejor_pregunta(datos):
+    registro = RegistroPreguntas("equipo", datos["mundiales"])
+    arbol = ArbolPreguntas(registro)
+    assert arbol.pregunta(arbol.raiz) == registro.mejor_pregunta(registro.indice.todos).id
+
+def test_estadisticas_y_nodos_fuera_de_rango(datos):
+    registro = RegistroPreguntas("equipo", datos["mundiales"])
+    arbol = ArbolPreguntas(registro)
+    estadisticas = arbol.estadisticas()
+    assert estadisticas["nodos"] == len(arbol.nodos)
+    assert 0 < estadisticas["hojas"] < estadisticas["nodos"]
+    assert estadisticas["profundidad_media"] <= estadisticas["profundidad_maxima"]
+    assert arbol.pregunta(None) is None
+    assert arbol.pregunta(len(arbol.nodos)) is None
@@ -0,0 +1,56 @@
+"""
+Pruebas del procesador BERT con un estudiante diminuto (necesitan torch,
+transformers y el tokenizador de bert-base-multilingual-cased)
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+EJEMPLOS = [
+    {"texto": "¿Quién ganó el mundial de 1970?", "intencion": "buscar_mundial_por_anio"},
+    {"texto": "¿Cuántos mundiales ha ganado Brasil?", "intencion": "buscar_mundiales_por_pais"},
+    {"texto": "¿Jugó Pelé en el mundial de 1958?", "intencion": "buscar_jugador"},
+    {"texto": "Alineación de Brasil 1970", "intencion": "consultar_equipo_completo"},
+    {"texto": "Háblame de los mundiales", "intencion": "consulta_general"}
+]
+
+@pytest.fixture
+def estudiante_reducido(tmp_path, monkeypatch):
+    """
+    Estudiante de 1 capa con el vocabulario reducido a los tokens de EJEMPLOS
+    """
+    from bert_processor import guardar_modelo
+    from train_bert import vocabulario_corpus
+
+    try:
+        tokenizer = transformers.BertTokenizerFast.from_pretrained("bert-base-multilingual-cased")
+    except OSError as e:
+        pytest.skip(f"Tokenizador no disponible: {e}")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BERT_CLASIFICADOR", "cabeza")
+    vocabulario = vocabulario_corpus(tokenizer, [e["texto"] for e in EJEMPLOS])
+    config = transformers.BertConfig(vocab_size=len(vocabulario), hidden_size=32, num_hidden_layers=1,
+                                     num_attention_heads=2, intermediate_size=64, num_labels=5)
+    ruta = str(tmp_path / "estudiante.safetensors")
+    guardar_modelo(transformers.BertForSequenceClassification(config), ruta, destilado=True, metadatos={
+        "etiquetas": [e["intencion"] for e in EJEMPLOS],
+        "vocabulario": vocabulario
+    })
+    return ruta
+
+def test_fine_tune_conserva_el_vocabulario_reducido(estudiante_reducido):
+    from bert_processor import BERTProcessor
+
+    processor = BERTProcessor(model_path=estudiante_reducido, backend="pytorch")
+    processor.fine_tune(EJEMPLOS, epochs=1, tamano_lote=2)
+    processor.cola.detener()
+
+    recargado = BERTProcessor(model_path=processor.model_path, backend="pytorch")
+    assert recargado.vocabulario == processor.vocabulario
+    # "Zidane" no está en el vocabulario: se lee como [UNK] en lugar de salirse de la tabla
+    [probabilidades] = recargado.classify_intents(["¿Jugó Zidane en 1998?"])
+    assert sum(probabilidades.values()) == pytest.approx(1.0, abs=1e-4)
+    recargado.cola.detener()
@@ -0,0 +1,63 @@
+import time
+
+from cache_ttl import CacheTTL
+
+def test_acierto_y_fallo():
+    cache = CacheTTL(ttl=60)
+    assert cache.get("a") is None
+    cache.poner("a", 1)
+    assert cache.get("a") == 1
+    estadisticas = cache.estadisticas()
+    assert (estadisticas["aciertos"], estadisticas["fallos"]) == (1, 1)
+    assert estadisticas["tasa_aciertos"] == 0.5
+
+def test_caducidad():
+    cache = CacheTTL(ttl=0.01)
+    cache.poner("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.estadisticas()["entradas"] == 0
+
+def test_sin_ttl_no_caduca():
+    cache = CacheTTL(ttl=0)
+    cache.poner("a", 1)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+
+def test_expulsion_lru():
+    cache = CacheTTL(ttl=60, max_entradas=2)
+    cache.poner("a", 1)
+    cache.poner("b", 2)
+    cache.get("a")
+    cache.poner("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.estadisticas()["expulsiones"] == 1
+
+def test_none_no_se_guarda():
+    cache = CacheTTL(ttl=60)
+    llamadas = []
+
+    def cargar():
+        llamadas.append(1)
+        return None
+
+    assert cache.obtener("a", cargar) is None
+    assert cache.obtener("a", cargar) is None
+    assert len(llamadas) == 2
+
+def test_obtener_carga_una_vez_e_invalidar():
+    cache = CacheTTL(ttl=60)
+    llamadas = []
+
+    def cargar():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert cache.obtener("a", cargar) == 1
+    assert cache.obtener("a", cargar) == 1
+    cache.invalidar("a")
+    assert cache.obtener("a", cargar) == 2
+    cache.poner("b", 0)
+    cache.invalidar()
+    assert cache.estadisticas()["entradas"] == 0
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from cola_inferencia import ColaInferencia
+
+def _doble(entradas):
+    return [entrada * 2 for entrada in entradas]
+
+def test_agrupa_consultas_concurrentes():
+    cola = ColaInferencia(_doble, ventana_ms=50, max_lote=8)
+    resultados = {}
+    hilos = [threading.Thread(target=lambda i=i: resultados.__setitem__(i, cola.enviar(i))) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+    cola.detener()
+    assert resultados == {i: i * 2 for i in range(8)}
+    assert cola.estadisticas()["lote_maximo"] > 1
+
+def test_enviar_tras_detener_no_se_queda_colgado():
+    cola = ColaInferencia(_doble, ventana_ms=1)
+    resultados = []
+    hilos = [threading.Thread(target=lambda i=i: resultados.append(cola.enviar(i, timeout=5))) for i in range(100)]
+    for i, hilo in enumerate(hilos):
+        hilo.start()
+        if i == 50:
+            cola.detener()
+    for hilo in hilos:
+        hilo.join(5)
+    assert sorted(resultados) == [i * 2 for i in range(100)]
+    assert cola.enviar(7) == 14
+
+def test_timeout_por_defecto():
+    cola = ColaInferencia(lambda entradas: (time.sleep(0.5), entradas)[1], timeout=0.05)
+    with pytest.raises(TimeoutError):
+        cola.enviar(1)
+    cola.detener()
+
+def test_lote_con_resultados_de_menos_falla_para_todos():
+    cola = ColaInferencia(lambda entradas: entradas[:-1], ventana_ms=50, max_lote=4)
+    errores = []
+
+    def enviar(i):
+        try:
+            cola.enviar(i, timeout=5)
+        except RuntimeError as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=enviar, args=(i,)) for i in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+    cola.detener()
+    assert len(errores) == 4
@@ -0,0 +1,22 @@
+from cache_ttl import CacheTTL
+from datos_async import DatosAsync
+
+def test_detalles_en_orden_y_sin_fallidos(repositorio_sqlite):
+    mundial = repositorio_sqlite.mundial
+
+    def mundial_o_error(mundial_id):
+        if mundial_id == 2:
+            raise ConnectionError("sin conexión")
+        return mundial(mundial_id)
+
+    repositorio_sqlite.mundial = mundial_o_error
+    cache = CacheTTL(ttl=60)
+    datos = DatosAsync(repositorio_sqlite, cache, max_concurrencia=4)
+
+    # El 2 falla y el -1 no existe: se omiten sin romper el resto
+    detalles = datos.mundiales_detalle([5, 2, -1, 1, 3])
+    assert [detalle["id"] for detalle in detalles] == [5, 1, 3]
+    assert cache.get(5)["id"] == 5 and cache.get(2) is None
+
+    assert datos.mundiales_detalle([2]) == []
+    assert datos.mundiales_detalle([]) == []
@@ -0,0 +1,48 @@
+from gazetteer import Gazetteer, clave_nombre, normalizar
+
+def _gazetteer(difuso=False):
+    gazetteer = Gazetteer(difuso=difuso)
+    for pais in ["BRASIL", "ESPAÑA", "ALEMANIA"]:
+        gazetteer.agregar_pais(pais)
+    for jugador in ["Lionel Messi", "Pelé", "Kylian Mbappé"]:
+        gazetteer.agregar_jugador(jugador)
+    return gazetteer
+
+def test_normalizar():
+    assert normalizar("Pelé") == "pele"
+    assert normalizar("ESPAÑA") == "espana"
+
+def test_extrae_pais_y_jugador_sin_tildes_ni_mayusculas():
+    entidades = _gazetteer().extraer("¿Jugó PELE con brasil en 1970?")
+    assert entidades == {"pais": "Brasil", "jugador": "Pelé"}
+    assert _gazetteer().extraer("Campeones de españa")["pais"] == "España"
+
+def test_apellido_y_coincidencia_mas_larga():
+    gazetteer = _gazetteer()
+    assert gazetteer.extraer("¿Messi fue campeón?")["jugador"] == "Messi"
+    assert gazetteer.extraer("¿Lionel Messi fue campeón?")["jugador"] == "Lionel Messi"
+    assert ("jugador", "Mbappé") in gazetteer
+
+def test_solo_palabras_completas():
+    gazetteer = _gazetteer()
+    assert gazetteer.buscar("brasileños") == []
+    assert gazetteer.extraer("alemaniaa")["pais"] is None
+
+def test_todas_las_apariciones():
+    encontrados = _gazetteer().buscar("brasil o alemania, no brasil")
+    assert [valor for _, _, _, valor in encontrados] == ["Brasil", "Alemania", "Brasil"]
+
+def test_agregar_despues_de_buscar():
+    gazetteer = _gazetteer()
+    assert gazetteer.extraer("Italia 2006")["pais"] is None
+    gazetteer.agregar_pais("ITALIA")
+    assert gazetteer.extraer("Italia 2006")["pais"] == "Italia"
+
+def test_busqueda_difusa():
+    assert _gazetteer().extraer("Alemannia")["pais"] is None
+    assert _gazetteer(difuso=True).extraer("Alemannia")["pais"] == "Alemania"
+
+def test_clave_nombre_como_la_api():
+    assert clave_nombre("Álvarez  ") == clave_nombre("alvarez") == "alvarez"
+    assert clave_nombre("MUÑOZ") == "muñoz"
+    assert clave_nombre("Müller") == "muller"
@@ -0,0 +1,45 @@
+from indice_candidatos import IndiceCandidatos
+
+CANDIDATOS = [
+    {"pais": "BRASIL", "anio": 1970},
+    {"pais": "ITALIA", "anio": 1982},
+    {"pais": "BRASIL", "anio": 1994},
+    {"pais": "FRANCIA", "anio": 1998}
+]
+
+def _indice():
+    return IndiceCandidatos(CANDIDATOS, {"pais": lambda c: c["pais"], "anio": lambda c: c["anio"]})
+
+def test_mascara_por_valor():
+    indice = _indice()
+    assert indice.mascara("pais", "BRASIL") == 0b0101
+    assert indice.mascara("pais", "ALEMANIA") == 0
+    assert indice.mascara("desconocido", "BRASIL") == 0
+    assert indice.todos == 0b1111
+    assert len(indice) == 4
+
+def test_filtrar_con_and_y_and_not():
+    indice = _indice()
+    brasil = indice.mascara("pais", "BRASIL")
+    assert indice.candidatos_de(indice.todos & brasil) == [CANDIDATOS[0], CANDIDATOS[2]]
+    assert indice.candidatos_de(indice.todos & ~brasil) == [CANDIDATOS[1], CANDIDATOS[3]]
+
+def test_contar_primero_y_posiciones():
+    indice = _indice()
+    mascara = 0b1010
+    assert indice.contar(mascara) == 2
+    assert indice.posiciones(mascara) == [1, 3]
+    assert indice.primero(mascara) is CANDIDATOS[1]
+    assert indice.primero(0) is None
+
+def test_valores_presentes_en_la_mascara():
+    indice = _indice()
+    assert sorted(indice.valores("pais", 0b0011)) == ["BRASIL", "ITALIA"]
+    assert indice.valores("anio", 0) == []
+
+def test_coincide_con_filtrar_la_lista(datos):
+    jugadores = datos["jugadores"]
+    indice = IndiceCandidatos(jugadores, {"pais": lambda j: j["pais"], "titular": lambda j: bool(j["titular"])})
+    mascara = indice.mascara("pais", "ARGENTINA") & ~indice.mascara("titular", True)
+    esperados = [j for j in jugadores if j["pais"] == "ARGENTINA" and not j["titular"]]
+    assert indice.candidatos_de(mascara) == esperados
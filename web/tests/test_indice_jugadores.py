@@ -0,0 +1,38 @@
+from indice_jugadores import IndiceJugadores, limpiar
+
+def test_limpiar():
+    assert limpiar("¿Pelé?") == "pele"
+    assert limpiar("  N'Golo   Kanté ") == "n golo kante"
+
+def test_busca_como_like_sin_tildes(datos):
+    indice = IndiceJugadores()
+    assert indice.agregar(datos["jugadores"]) == len(datos["jugadores"])
+    for consulta in ["mart", "MESSI", "kante"]:
+        esperados = {j["id"] for j in datos["jugadores"] if limpiar(consulta) in limpiar(j["nombre"])}
+        assert {j["id"] for j in indice.buscar(consulta)} == esperados
+
+def test_relevancia_y_limite():
+    indice = IndiceJugadores()
+    indice.agregar([
+        {"id": 1, "nombre": "Martínez", "anio": 2022},
+        {"id": 2, "nombre": "Emiliano Martínez", "anio": 2022},
+        {"id": 3, "nombre": "Lautaro Martinez", "anio": 2026},
+        {"id": 4, "nombre": "Rodrigo Almartin", "anio": 2030}
+    ])
+    assert [j["id"] for j in indice.buscar("martinez")] == [1, 3, 2]
+    assert [j["id"] for j in indice.buscar("martin", limite=2)] == [3, 2]
+    assert indice.buscar("ma") == []
+
+def test_sincronizar(datos):
+    indice = IndiceJugadores()
+    jugadores = list(datos["jugadores"])
+    indice.sincronizar(jugadores)
+
+    # Solo jugadores nuevos: se indexan sin reconstruir
+    nuevo = {"id": 9999, "nombre": "Jugador Inventado", "mundial_id": 1, "anio": 2030}
+    assert indice.sincronizar(jugadores + [nuevo]) == 1
+    assert [j["id"] for j in indice.buscar("inventado")] == [9999]
+
+    # Falta uno de los indexados: se reconstruye
+    assert indice.sincronizar(jugadores) == len(jugadores)
+    assert indice.buscar("inventado") == []
@@ -0,0 +1,76 @@
+import numpy as np
+
+from motor_akinator import MotorAkinator
+from motor_probabilistico import DATOS_CAMBIADOS, MotorProbabilistico
+
+def _motores(datos, modo, clase=MotorProbabilistico):
+    """
+    Motor con un candidato menos y motor con todos en orden inverso (como
+    tras un registro nuevo y una recarga de los datos)
+    """
+    if modo == "equipo":
+        return (clase(datos["mundiales"][:-1], datos["jugadores"], version=1),
+                clase(datos["mundiales"][::-1], datos["jugadores"], version=2))
+    return (clase(datos["mundiales"], datos["jugadores"][:-1], version=1),
+            clase(datos["mundiales"], datos["jugadores"][::-1], version=2))
+
+def test_probabilidades_suman_uno(datos):
+    motor = MotorProbabilistico(datos["mundiales"], datos["jugadores"])
+    estado, _ = motor.iniciar("equipo")
+    estado, _ = motor.hacer_pregunta(estado)
+    estado, _ = motor.step(estado, "sí")
+    assert np.isclose(sum(estado["probabilidades"].values()), 1.0)
+
+def test_respuesta_equivocada_no_descarta(datos):
+    motor = MotorProbabilistico(datos["mundiales"], datos["jugadores"])
+    estado, _ = motor.iniciar("equipo")
+    estado, _ = motor.hacer_pregunta(estado)
+    matriz = motor.matrices["equipo"]
+    fila = matriz.respuestas[matriz.posicion[estado["ultima_pregunta"]]]
+
+    # Responder lo contrario de lo que corresponde al primer candidato
+    estado, _ = motor.step(estado, "no" if fila[0] else "sí")
+    assert estado["probabilidades"][datos["mundiales"][0]["id"]] > 0
+
+def test_partida_sigue_con_los_candidatos_reordenados(datos):
+    for modo in ("equipo", "jugador"):
+        anterior, actual = _motores(datos, modo)
+        nuevo = (datos["mundiales"] if modo == "equipo" else datos["jugadores"])[-1]["id"]
+        estado, _ = anterior.iniciar(modo)
+        estado, _ = anterior.hacer_pregunta(estado)
+        esperado, _ = anterior.step(estado, "no")
+
+        # La partida continúa con el motor nuevo: cada id conserva su probabilidad
+        estado, resultado = actual.step(estado, "no")
+        assert resultado != DATOS_CAMBIADOS
+        assert nuevo not in estado["probabilidades"]
+        assert estado["probabilidades"].keys() == esperado["probabilidades"].keys()
+        for candidato_id, probabilidad in esperado["probabilidades"].items():
+            assert np.isclose(estado["probabilidades"][candidato_id], probabilidad)
+
+def test_adivinanza_rechazada_descarta_el_candidato_propuesto(datos):
+    for clase in (MotorAkinator, MotorProbabilistico):
+        anterior, actual = _motores(datos, "equipo", clase)
+        estado, _ = anterior.iniciar("equipo")
+        estado = dict(estado, max_intentos=1)
+        estado, _ = anterior.hacer_pregunta(estado)
+        assert estado["ultimo_tipo"] == "adivinanza"
+        propuesto = estado["candidato_propuesto"]
+
+        estado = dict(estado, max_intentos=10)
+        estado, _ = actual.step(estado, "no")
+        candidatos = estado["probabilidades"] if clase is MotorProbabilistico else estado["candidatos"]
+        assert propuesto not in candidatos
+        assert len(candidatos) == len(datos["mundiales"]) - 2
+
+def test_partida_termina_si_no_queda_ningun_candidato(datos):
+    motor = MotorProbabilistico(datos["mundiales"], datos["jugadores"])
+    estado, _ = motor.iniciar("equipo")
+    estado, _ = motor.hacer_pregunta(estado)
+
+    _, resultado = motor.step(dict(estado, probabilidades={-1: 1.0}), "sí")
+    assert resultado == DATOS_CAMBIADOS
+
+    # Estado guardado con el formato anterior (vector por posiciones)
+    _, resultado = motor.hacer_pregunta(dict(estado, probabilidades=np.ones(3) / 3))
+    assert resultado == DATOS_CAMBIADOS
@@ -0,0 +1,43 @@
+import pytest
+
+from preguntas import RegistroPreguntas, entropia
+
+def test_entropia():
+    assert entropia(0.5) == pytest.approx(1.0)
+    assert entropia(0) == entropia(1) == 0.0
+    assert entropia(0.25) == pytest.approx(entropia(0.75))
+
+@pytest.mark.parametrize("modo", ["equipo", "jugador"])
+def test_mascaras_coinciden_con_el_predicado(datos, modo):
+    candidatos = datos["mundiales"] if modo == "equipo" else datos["jugadores"]
+    registro = RegistroPreguntas(modo, candidatos)
+    assert list(registro)
+    for pregunta in registro:
+        extraer = registro.indice.bitmaps[pregunta.atributo]
+        esperada = sum(bits for valor, bits in extraer.items() if pregunta.predicado(valor))
+        assert pregunta.mascara == esperada
+        assert registro.get(pregunta.id) is pregunta
+
+def test_preguntas_del_catalogo(datos):
+    registro = RegistroPreguntas("equipo", datos["mundiales"])
+    sudamericano = registro.get("sudamericano=True")
+    assert sudamericano.texto() == "¿El equipo es de Sudamérica?"
+    paises = {m["pais"] for m in registro.indice.candidatos_de(sudamericano.mascara)}
+    assert paises <= {"BRASIL", "ARGENTINA", "URUGUAY"}
+    assert registro.get("pais=BRASIL").texto() == "¿El equipo es BRASIL?"
+
+def test_mejor_pregunta_maximiza_la_ganancia(datos):
+    registro = RegistroPreguntas("equipo", datos["mundiales"])
+    todos = registro.indice.todos
+    mejor = registro.mejor_pregunta(todos)
+
+    def ganancia(pregunta):
+        return entropia(registro.indice.contar(todos & pregunta.mascara) / registro.indice.contar(todos))
+
+    assert ganancia(mejor) == max(ganancia(pregunta) for pregunta in registro)
+    assert registro.mejor_pregunta(todos, excluidas={mejor.id}).id != mejor.id
+
+def test_sin_pregunta_que_distinga(datos):
+    registro = RegistroPreguntas("equipo", datos["mundiales"])
+    assert registro.mejor_pregunta(0) is None
+    assert registro.mejor_pregunta(1) is None
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from importar_jugadores import leer_filas
+from mundiales_akinator import MundialesAkinator
+
+@pytest.fixture
+def akinator(repositorio_sqlite, tmp_path):
+    """
+    Akinator sobre la base SQLite en memoria (sin la API ni la instantánea)
+    """
+    akinator = MundialesAkinator(ruta_instantanea=str(tmp_path / "datos.pkl"))
+    akinator.repositorio = repositorio_sqlite
+    akinator.cargar_datos()
+    return akinator
+
+def _nombres(akinator, nombre):
+    return [j for j in akinator.cache["jugadores"] if j["nombre"].casefold() == nombre.casefold()]
+
+def test_existente_con_otras_mayusculas(akinator):
+    resumen = akinator.registrar_lote([
+        {"nombre": "lionel messi", "pais": "argentina", "anio": 2022, "posicion": "DEL", "titular": "sí"}
+    ])
+    assert (resumen["insertados"], resumen["existentes"]) == (0, 1)
+    assert len(_nombres(akinator, "Lionel Messi")) == 1
+
+def test_existente_con_tildes_y_espacios_distintos(akinator):
+    resumen = akinator.registrar_lote([
+        {"nombre": "N'Golo Kante  ", "pais": "Francia", "anio": 2018, "posicion": "MED", "titular": "sí"},
+        {"nombre": "Nuevo Peña", "pais": "Argentina", "anio": 2022, "posicion": 1, "titular": 0},
+        {"nombre": "NUEVO PÉÑA ", "pais": "Argentina", "anio": 2022, "posicion": 1, "titular": 0},
+        {"nombre": "Nuevo Pena", "pais": "Argentina", "anio": 2022, "posicion": 1, "titular": 0}
+    ])
+    # Como en la API: sin tildes ni espacios finales, pero la ñ cuenta
+    assert (resumen["insertados"], resumen["existentes"]) == (2, 2)
+
+def test_repetidos_en_el_mismo_lote(akinator):
+    avisos = []
+    akinator.al_cambiar_datos(lambda: avisos.append(1))
+    resumen = akinator.registrar_lote([
+        {"nombre": "Nuevo Uno", "pais": "Argentina", "anio": 2022, "posicion": "Portero", "titular": 0},
+        {"nombre": "nuevo uno", "pais": "ARGENTINA", "anio": 2022, "posicion": 1, "titular": "no"}
+    ])
+    assert (resumen["insertados"], resumen["existentes"]) == (1, 1)
+    [jugador] = _nombres(akinator, "Nuevo Uno")
+    assert jugador["titular"] == 0 and jugador["posicion"] == "Portero"
+    assert avisos == [1]
+
+def test_existente_en_la_base_pero_no_en_la_cache(akinator):
+    # Otro proceso lo registró después de cargar la caché
+    mundial = next(m for m in akinator.cache["mundiales"] if int(m["anio"]) == 2022)
+    akinator.repositorio.crear_jugador("Otro Proceso", mundial["id"], 2, True)
+
+    resumen = akinator.registrar_lote([
+        {"nombre": "OTRO PROCESO", "pais": "Argentina", "anio": 2022, "posicion": "DEF", "titular": 1}
+    ])
+    assert (resumen["insertados"], resumen["existentes"]) == (0, 1)
+    [jugador] = _nombres(akinator, "Otro Proceso")
+    assert jugador["nombre"] == "Otro Proceso" and jugador["titular"] == 1
+
+def test_mundial_nuevo_y_lotes_pequenos(akinator):
+    filas = [{"nombre": f"Jugador {i}", "pais": "Pais Nuevo", "anio": 2030, "posicion": "MED", "titular": i < 11}
+             for i in range(23)]
+    resumen = akinator.registrar_lote(filas, tamano_lote=5)
+    assert resumen["mundiales_creados"] == 1
+    assert resumen["insertados"] == 23
+    assert len([j for j in akinator.cache["jugadores"] if j["anio"] == 2030]) == 23
+
+def test_errores_de_validacion_no_escriben_nada(akinator):
+    total = len(akinator.cache["jugadores"])
+    resumen = akinator.registrar_lote([
+        {"nombre": "Bueno", "pais": "Argentina", "anio": 2022, "posicion": "DEL"},
+        {"nombre": "Malo", "pais": "Narnia", "anio": 2022, "posicion": "DEL"},
+        {"nombre": "", "pais": "Argentina", "anio": 2022, "posicion": "DEL"},
+        {"nombre": "Sin posición", "pais": "Argentina", "anio": 2022, "posicion": "zzz"},
+        {"nombre": "Año", "pais": "Argentina", "anio": "dos mil", "posicion": "DEL"}
+    ])
+    assert not resumen["validas"]
+    assert [error.split(":")[0] for error in resumen["errores"]] == ["Fila 2", "Fila 3", "Fila 4", "Fila 5"]
+    assert len(akinator.cache["jugadores"]) == total
+
+def test_leer_csv_con_punto_y_coma():
+    contenido = "\ufeffnombre;pais;anio;posicion;titular\n Lionel Messi ;Argentina;2022;DEL;sí\n"
+    assert leer_filas(contenido, "csv") == [
+        {"nombre": "Lionel Messi", "pais": "Argentina", "anio": "2022", "posicion": "DEL", "titular": "sí"}
+    ]
+
+def test_leer_csv_sin_columnas():
+    with pytest.raises(ValueError, match="anio"):
+        leer_filas("nombre,pais\nMessi,Argentina\n", "csv")
+
+def test_leer_json():
+    filas = [{"nombre": "Messi", "pais": "Argentina", "anio": 2022}]
+    assert leer_filas(json.dumps(filas), "json") == filas
+    assert leer_filas(json.dumps({"jugadores": filas}), "json") == filas
+    with pytest.raises(ValueError):
+        leer_filas(json.dumps({"otra": filas}), "json")
+    with pytest.raises(ValueError):
+        leer_filas("", "xml")
@@ -0,0 +1,79 @@
+import sqlite3
+
+from conftest import VOLCADO_SQL
+from repositorio import ESQUEMA_SQLITE, RepositorioSQLite, importar_volcado
+
+def test_importar_volcado():
+    conexion = sqlite3.connect(":memory:")
+    conexion.executescript(ESQUEMA_SQLITE)
+    # Cada sentencia del volcado va precedida de comentarios "--"
+    assert importar_volcado(conexion, VOLCADO_SQL) == 4
+    for tabla in ["paises", "mundiales", "posiciones", "jugadores"]:
+        assert conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] > 0
+
+def test_escapes_de_mysql(repositorio_sqlite):
+    nombres = [j["nombre"] for j in repositorio_sqlite.jugadores()]
+    assert "N'Golo Kanté" in nombres
+    assert not any("\\" in nombre for nombre in nombres)
+
+def test_listados_con_datos_relacionados(repositorio_sqlite):
+    mundiales = repositorio_sqlite.mundiales()
+    assert [m["anio"] for m in mundiales] == sorted((m["anio"] for m in mundiales), reverse=True)
+    jugador = repositorio_sqlite.jugadores()[0]
+    assert {"id", "nombre", "posicion", "posicion_id", "posicion_abr", "titular", "mundial_id", "anio", "pais"} <= set(jugador)
+
+def test_mundial_con_plantilla(repositorio_sqlite):
+    mundial = next(m for m in repositorio_sqlite.mundiales() if m["anio"] == 2022)
+    detalle = repositorio_sqlite.mundial(mundial["id"])
+    assert detalle["pais"] == "ARGENTINA"
+    assert all(j["titular"] for j in detalle["jugadores"]["titulares"])
+    assert not any(j["titular"] for j in detalle["jugadores"]["suplentes"])
+    assert repositorio_sqlite.mundial(-1) is None
+
+def test_buscar_sin_tildes_ni_mayusculas(repositorio_sqlite):
+    assert [j["nombre"] for j in repositorio_sqlite.buscar_jugadores("KANTE")] == ["N'Golo Kanté"]
+
+def test_crear_pais_y_mundial_sin_duplicar(repositorio_sqlite):
+    pais = repositorio_sqlite.crear_pais("PAIS NUEVO")
+    assert repositorio_sqlite.crear_pais("pais nuevo")["id"] == pais["id"]
+    mundial = repositorio_sqlite.crear_mundial(2030, pais["id"])
+    assert repositorio_sqlite.crear_mundial(2030, pais["id"])["id"] == mundial["id"]
+    assert mundial["pais"] == "PAIS NUEVO"
+
+def test_crear_jugadores_marca_los_nuevos(repositorio_sqlite):
+    messi = next(j for j in repositorio_sqlite.jugadores() if j["nombre"] == "Lionel Messi")
+    creados = repositorio_sqlite.crear_jugadores([
+        {"nombre": "lionel messi", "mundial_id": messi["mundial_id"], "posicion_id": 4, "titular": True},
+        {"nombre": "Jugador Nuevo", "mundial_id": messi["mundial_id"], "posicion_id": 1, "titular": False},
+        {"nombre": "jugador nuevo", "mundial_id": messi["mundial_id"], "posicion_id": 1, "titular": False}
+    ])
+    assert creados[0]["id"] == messi["id"] and not creados[0]["nuevo"]
+    assert creados[1]["nuevo"] and creados[1]["titular"] == 0
+    assert creados[2]["id"] == creados[1]["id"]
+
+    # Un segundo lote con los mismos jugadores no crea nada
+    otra_vez = repositorio_sqlite.crear_jugadores([
+        {"nombre": "JUGADOR NUEVO", "mundial_id": messi["mundial_id"], "posicion_id": 1, "titular": False}
+    ])
+    assert otra_vez[0]["id"] == creados[1]["id"] and not otra_vez[0]["nuevo"]
+
+def test_base_en_archivo_no_se_reimporta(tmp_path):
+    ruta = str(tmp_path / "mundiales.db")
+    total = len(RepositorioSQLite(ruta, VOLCADO_SQL).jugadores())
+    assert len(RepositorioSQLite(ruta, VOLCADO_SQL).jugadores()) == total
+
+def test_nombres_repetidos_sin_tildes_ni_espacios_finales(repositorio_sqlite):
+    pais = repositorio_sqlite.crear_pais("Perú")
+    assert repositorio_sqlite.crear_pais("PERU ")["id"] == pais["id"]
+    mundial = repositorio_sqlite.crear_mundial(2034, pais["id"])
+
+    alvarez = repositorio_sqlite.crear_jugador("Álvarez", mundial["id"], 4, True)
+    assert repositorio_sqlite.crear_jugador("álvarez", mundial["id"], 4, True)["id"] == alvarez["id"]
+    creados = repositorio_sqlite.crear_jugadores([
+        {"nombre": "ALVAREZ ", "mundial_id": mundial["id"], "posicion_id": 4, "titular": True},
+        {"nombre": "Muñoz", "mundial_id": mundial["id"], "posicion_id": 2, "titular": True},
+        {"nombre": "Munoz", "mundial_id": mundial["id"], "posicion_id": 2, "titular": True}
+    ])
+    assert creados[0]["id"] == alvarez["id"] and not creados[0]["nuevo"]
+    # Como en la API, la ñ no es una n con tilde
+    assert creados[1]["nuevo"] and creados[2]["nuevo"]
@@ -0,0 +1,62 @@
+import queue
+
+from trabajos_entrenamiento import CANCELADO, COMPLETADO, EN_COLA, ENTRENANDO, GestorEntrenamientos
+
+class _ProcesoTerminado:
+    """
+    Proceso hijo que ya terminó (sustituye al de multiprocessing)
+    """
+    exitcode = 0
+
+    def is_alive(self):
+        return False
+
+    def join(self):
+        pass
+
+def _trabajo(estado):
+    """
+    Trabajo que el gestor ya sacó de la cola (sin lanzar ningún proceso)
+    """
+    return {"id": "prueba", "estado": estado, "epochs": 2, "epoch_actual": 0, "perdidas": [],
+            "num_ejemplos": None, "creado": 0.0, "inicio": 0.0, "fin": None, "error": None}
+
+def _seguir(gestor, trabajo, *mensajes_hijo):
+    mensajes = queue.Queue()
+    for mensaje in mensajes_hijo:
+        mensajes.put(mensaje)
+    gestor._seguir(trabajo, _ProcesoTerminado(), mensajes)
+
+def test_fin_completa_el_trabajo():
+    gestor = GestorEntrenamientos()
+    trabajo = _trabajo(ENTRENANDO)
+    _seguir(gestor, trabajo, ("epoch", 1, 2, 0.5), ("epoch", 2, 2, 0.25), ("fin",))
+    assert trabajo["estado"] == COMPLETADO
+    assert trabajo["perdidas"] == [0.5, 0.25]
+
+def test_cancelado_no_pasa_a_completado():
+    gestor = GestorEntrenamientos()
+    trabajo = _trabajo(CANCELADO)
+    _seguir(gestor, trabajo, ("fin",))
+    assert trabajo["estado"] == CANCELADO
+
+def test_cancelado_no_pasa_a_error():
+    gestor = GestorEntrenamientos()
+    trabajo = _trabajo(CANCELADO)
+    _seguir(gestor, trabajo, ("error", "interrumpido"))
+    assert trabajo["estado"] == CANCELADO
+    assert trabajo["error"] is None
+
+def test_solo_se_conservan_los_terminados_recientes():
+    gestor = GestorEntrenamientos(max_terminados=2)
+    for fin in range(3):
+        gestor._trabajos[f"t{fin}"] = dict(_trabajo(COMPLETADO), id=f"t{fin}", fin=float(fin))
+
+    # Trabajo en espera (sin avisar al gestor, para que no lo lance)
+    with gestor._lock:
+        gestor._trabajos["espera"] = dict(_trabajo(EN_COLA), id="espera", _ejemplos=[{"texto": "", "intencion": ""}])
+        gestor._pendientes.append("espera")
+
+    assert gestor.cancelar("espera")
+    assert "_ejemplos" not in gestor._trabajos["espera"]
+    assert {t["id"] for t in gestor.listar()} == {"t2", "espera"}
@@ -0,0 +1,238 @@
+"""
+Trabajos de entrenamiento del modelo BERT en segundo plano.
+
+Cada entrenamiento se ejecuta en un proceso aparte (no ocupa un worker de
+Flask ni compite por el GIL con las peticiones) y se identifica con un id.
+El proceso informa del avance por una cola de multiprocessing al terminar
+cada época, y el gestor mantiene el estado de los trabajos. Los trabajos se
+ejecutan de uno en uno, la cola de espera tiene un límite y de los
+terminados solo se conservan los más recientes.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# Estados de un trabajo
+EN_COLA = "en_cola"
+ENTRENANDO = "entrenando"
+COMPLETADO = "completado"
+CANCELADO = "cancelado"
+ERROR = "error"
+
+class ColaEntrenamientoLlena(Exception):
+    """
+    Se alcanzó el número máximo de trabajos pendientes
+    """
+
+def _entrenar_en_proceso(epochs: int, ejemplos: Optional[List[Dict[str, str]]], mensajes):
+    """
+    Punto de entrada del proceso hijo: entrena y envía el avance al gestor
+    """
+    try:
+        import train_bert
+
+        def progreso(epoch, total, perdida):
+            mensajes.put(("epoch", epoch, total, perdida))
+
+        train_bert.entrenar_modelo(epochs=epochs, ejemplos=ejemplos, progreso=progreso)
+        mensajes.put(("fin",))
+    except Exception as e:
+        mensajes.put(("error", str(e)))
+
+class GestorEntrenamientos:
+    """
+    Cola de trabajos de entrenamiento ejecutados de uno en uno en otro proceso
+    """
+
+    def __init__(self, max_en_cola: int = 2, al_completar: Optional[Callable[[Dict], None]] = None,
+                 max_terminados: int = 50):
+        """
+        Args:
+            max_en_cola: Trabajos que pueden esperar a la vez (sin contar el que se ejecuta)
+            max_terminados: Trabajos terminados cuyo estado se conserva (los más recientes)
+            al_completar: Función llamada (en el hilo del gestor) cuando un
+                trabajo termina bien, por ejemplo para cargar el modelo nuevo
+        """
+        self.max_en_cola = max_en_cola
+        self.max_terminados = max_terminados
+        self.al_completar = al_completar
+        self._trabajos: Dict[str, Dict] = {}
+        self._pendientes = deque()
+        self._proceso = None
+        self._lock = threading.Lock()
+        self._hay_trabajo = threading.Condition(self._lock)
+        self._contexto = multiprocessing.get_context("spawn")
+        threading.Thread(target=self._bucle, daemon=True).start()
+
+    def encolar(self, epochs: int = 3, ejemplos: Optional[List[Dict[str, str]]] = None) -> Dict:
+        """
+        Añade un trabajo de entrenamiento
+
+        Returns:
+            Copia del estado del trabajo (con su "id")
+
+        Raises:
+            ColaEntrenamientoLlena: Si ya hay max_en_cola trabajos esperando
+        """
+        with self._lock:
+            if len(self._pendientes) >= self.max_en_cola:
+                raise ColaEntrenamientoLlena(f"Ya hay {len(self._pendientes)} entrenamientos en espera")
+
+            trabajo = {
+                "id": uuid.uuid4().hex,
+                "estado": EN_COLA,
+                "epochs": epochs,
+                "epoch_actual": 0,
+                "perdidas": [],
+                "num_ejemplos": len(ejemplos) if ejemplos is not None else None,
+                "creado": time.time(),
+                "inicio": None,
+                "fin": None,
+                "error": None
+            }
+            self._trabajos[trabajo["id"]] = dict(trabajo, _ejemplos=ejemplos)
+            self._pendientes.append(trabajo["id"])
+            self._hay_trabajo.notify()
+            return trabajo
+
+    def obtener(self, trabajo_id: str) -> Optional[Dict]:
+        """
+        Estado de un trabajo, o None si no existe
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            return self._publico(trabajo) if trabajo else None
+
+    def listar(self) -> List[Dict]:
+        """
+        Estado de todos los trabajos, del más reciente al más antiguo
+        """
+        with self._lock:
+            return sorted((self._publico(t) for t in self._trabajos.values()), key=lambda t: -t["creado"])
+
+    def cancelar(self, trabajo_id: str) -> bool:
+        """
+        Cancela un trabajo en espera o detiene el proceso del que se ejecuta
+
+        Returns:
+            False si el trabajo no existe o ya terminó
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            if trabajo is None or trabajo["estado"] not in (EN_COLA, ENTRENANDO):
+                return False
+
+            if trabajo["estado"] == EN_COLA:
+                self._pendientes.remove(trabajo_id)
+            elif self._proceso is not None:
+                self._proceso.terminate()
+
+            trabajo["estado"] = CANCELADO
+            trabajo["fin"] = time.time()
+            trabajo.pop("_ejemplos", None)
+            self._purgar_terminados()
+            return True
+
+    def _bucle(self):
+        """
+        Hilo del gestor: saca trabajos de la cola y los ejecuta de uno en uno
+        """
+        while True:
+            with self._lock:
+                while not self._pendientes:
+                    self._hay_trabajo.wait()
+                trabajo = self._trabajos[self._pendientes.popleft()]
+                trabajo["estado"] = ENTRENANDO
+                trabajo["inicio"] = time.time()
+
+                mensajes = self._contexto.Queue()
+                self._proceso = self._contexto.Process(
+                    target=_entrenar_en_proceso,
+                    args=(trabajo["epochs"], trabajo.pop("_ejemplos"), mensajes),
+                    daemon=True
+                )
+                self._proceso.start()
+
+            self._seguir(trabajo, self._proceso, mensajes)
+
+            with self._lock:
+                self._proceso = None
+                completado = trabajo["estado"] == COMPLETADO
+                self._purgar_terminados()
+
+            if completado and self.al_completar:
+                try:
+                    self.al_completar(self._publico(trabajo))
+                except Exception as e:
+                    print(f"Error al cargar el modelo del entrenamiento {trabajo['id']}: {e}")
+
+    def _seguir(self, trabajo: Dict, proceso, mensajes):
+        """
+        Lee los mensajes del proceso hasta que termina y actualiza el trabajo
+        """
+        terminado = False
+        sin_proceso = False
+        while not terminado:
+            try:
+                mensaje = mensajes.get(timeout=1)
+            except queue.Empty:
+                # Sin mensajes: si el proceso ya había terminado en la espera
+                # anterior (y no quedan mensajes por leer), murió o fue cancelado
+                if sin_proceso:
+                    with self._lock:
+                        if trabajo["estado"] == ENTRENANDO:
+                            trabajo["estado"] = ERROR
+                            trabajo["error"] = f"El proceso terminó con código {proceso.exitcode}"
+                            trabajo["fin"] = time.time()
+                    terminado = True
+                sin_proceso = not proceso.is_alive()
+                continue
+
+            with self._lock:
+                # Un trabajo cancelado mientras el proceso terminaba sigue
+                # cancelado: ni pasa a COMPLETADO ni se pone en servicio
+                activo = trabajo["estado"] == ENTRENANDO
+                if mensaje[0] == "epoch":
+                    _, epoch, total, perdida = mensaje
+                    trabajo["epoch_actual"] = epoch
+                    trabajo["perdidas"].append(perdida)
+                elif mensaje[0] == "fin":
+                    if activo:
+                        trabajo["estado"] = COMPLETADO
+                        trabajo["fin"] = time.time()
+                    terminado = True
+                elif mensaje[0] == "error":
+                    if activo:
+                        trabajo["estado"] = ERROR
+                        trabajo["error"] = mensaje[1]
+                        trabajo["fin"] = time.time()
+                    terminado = True
+
+        proceso.join()
+
+    def _purgar_terminados(self):
+        """
+        Olvida los trabajos terminados más antiguos si hay más de max_terminados
+        (debe llamarse con el lock adquirido)
+        """
+        terminados = sorted(
+            (t for t in self._trabajos.values() if t["estado"] in (COMPLETADO, CANCELADO, ERROR)),
+            key=lambda t: t["fin"]
+        )
+        for trabajo in terminados[:max(0, len(terminados) - self.max_terminados)]:
+            del self._trabajos[trabajo["id"]]
+
+    @staticmethod
+    def _publico(trabajo: Dict) -> Dict:
+        """
+        Copia del trabajo sin los campos internos, con el progreso calculado
+        """
+        publico = {clave: valor for clave, valor in trabajo.items() if not clave.startswith("_")}
+        publico["perdidas"] = list(trabajo["perdidas"])
+        publico["progreso"] = trabajo["epoch_actual"] / trabajo["epochs"] if trabajo["epochs"] else 0.0
+        return publico
@@ -7,8 +7,14 @@ relacionadas con equipos campeones, jugadores y años de mundiales.
 """
 
 import os
+import copy
+import time
 import json
+import torch
+from transformers import BertForSequenceClassification
 from mundiales_agent_bert import MundialesAgentBERT
+from bert_processor import BERTProcessor, RUTA_MODELO, RUTA_ESTUDIANTE, guardar_modelo, mapa_tokens
+from repositorio import obtener_repositorio
 
 def crear_ejemplos_adicionales():
     """
@@ -90,9 +96,59 @@ def cargar_ejemplos(filename="ejemplos_entrenamiento.json"):
         print(f"No se encontró el archivo {filename}")
         return None
 
-def entrenar_modelo(epochs=5, ejemplos=None):
+def es_conjunto_entrenamiento(filename):
+    """
+    Si el archivo de ejemplos es el del entrenamiento (o el del índice kNN)
+    
+    La precisión sobre esos ejemplos mide el ajuste del modelo, no cómo
+    generaliza a consultas nuevas.
+    """
+    ruta = os.path.abspath(filename)
+    return ruta in (os.path.abspath("ejemplos_entrenamiento.json"),
+                    os.path.abspath(os.getenv("BERT_EJEMPLOS", "ejemplos_entrenamiento.json")))
+
+def aviso_conjunto_entrenamiento(filename):
+    """
+    Aviso para los informes de precisión si filename es el conjunto de
+    entrenamiento (None si no lo es)
+    """
+    if not es_conjunto_entrenamiento(filename):
+        return None
+    return (f"Precisión sobre el conjunto de entrenamiento ({filename}): mide el ajuste, no la "
+            f"generalización. Usa --ejemplos con consultas que no se usaron para entrenar.")
+
+def medir_clasificacion(processor, ejemplos, repeticiones=3):
+    """
+    Clasifica los ejemplos de uno en uno y mide la latencia de cada consulta
+
+    Se llama directamente al lote de una consulta (sin caché ni cola), tras
+    una llamada de calentamiento que absorbe las inicializaciones perezosas.
+
+    Returns:
+        (intención predicha de cada ejemplo, latencias en milisegundos)
+    """
+    processor.classify_intents([ejemplos[0]["texto"]])
+
+    predicciones = []
+    latencias = []
+    for ejemplo in ejemplos:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            probs = processor.classify_intents([ejemplo["texto"]])[0]
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        predicciones.append(max(probs.items(), key=lambda x: x[1])[0])
+
+    return predicciones, latencias
+
+def entrenar_modelo(epochs=5, ejemplos=None, progreso=None):
     """
     Entrena el modelo BERT con los ejemplos proporcionados
+    
+    Args:
+        epochs: Número de épocas
+        ejemplos: Ejemplos de entrenamiento (por defecto los predeterminados)
+        progreso: Función opcional llamada al terminar cada época con
+            (época, total de épocas, pérdida media)
     """
     # Si no se proporcionan ejemplos, usar los predeterminados
     if ejemplos is None:
@@ -106,12 +162,177 @@ def entrenar_modelo(epochs=5, ejemplos=None):
     
     # Entrenar el modelo
     print(f"Iniciando entrenamiento con {len(ejemplos)} ejemplos durante {epochs} épocas...")
-    agente.entrenar_modelo(epochs=epochs)
+    agente.entrenar_modelo(epochs=epochs, progreso=progreso)
     
-    print("Entrenamiento completado. Modelo guardado como 'mundiales_bert_model.pt'")
+    print(f"Entrenamiento completado. Modelo guardado como '{agente.nlp.model_path}'")
     
     return agente
 
+def textos_dominio():
+    """
+    Nombres de países, posiciones y jugadores y años de los mundiales
+    (del repositorio de datos configurado), para el vocabulario del estudiante
+    """
+    try:
+        repositorio = obtener_repositorio()
+        paises = repositorio.paises() or []
+        mundiales = repositorio.mundiales() or []
+        posiciones = repositorio.posiciones() or []
+        jugadores = repositorio.jugadores() or []
+    except Exception as e:
+        print(f"No se pudieron leer los datos para el vocabulario del estudiante: {e}")
+        return []
+    
+    textos = [jugador["nombre"] for jugador in jugadores]
+    textos += [posicion["nombre"] for posicion in posiciones]
+    textos += [str(mundial["anio"]) for mundial in mundiales]
+    # Los países están en mayúsculas en la base; las consultas no
+    textos += [nombre for pais in paises for nombre in (pais["nombre"], pais["nombre"].title())]
+    return textos
+
+def vocabulario_corpus(tokenizer, textos):
+    """
+    Ids del tokenizador que aparecen en los textos, más los tokens especiales
+    
+    El vocabulario de bert-base-multilingual-cased tiene 119.547 tokens y su
+    matriz de embeddings (92M parámetros) es más grande que 12 capas del
+    encoder; el dominio solo usa unos pocos miles.
+    """
+    ids = set(tokenizer.all_special_ids)
+    for fila in tokenizer(list(textos), add_special_tokens=False)["input_ids"]:
+        ids.update(fila)
+    return sorted(ids)
+
+def crear_estudiante(profesor, capas=4, vocabulario=None):
+    """
+    Crea un modelo estudiante con menos capas a partir del profesor
+    
+    El estudiante conserva los embeddings, el pooler y el clasificador del
+    profesor, y toma `capas` capas del encoder repartidas uniformemente
+    (la primera y la última incluidas), como en DistilBERT.
+    
+    Con `vocabulario` (ids del tokenizador, en orden creciente) solo conserva
+    esas filas de la matriz de embeddings; ver vocabulario_corpus.
+    """
+    config = copy.deepcopy(profesor.config)
+    total = config.num_hidden_layers
+    capas = max(1, min(capas, total))
+    config.num_hidden_layers = capas
+    
+    embeddings = profesor.bert.embeddings.state_dict()
+    if vocabulario is not None:
+        config.vocab_size = len(vocabulario)
+        embeddings["word_embeddings.weight"] = embeddings["word_embeddings.weight"][torch.tensor(vocabulario)].clone()
+    
+    estudiante = BertForSequenceClassification(config)
+    estudiante.bert.embeddings.load_state_dict(embeddings)
+    estudiante.bert.pooler.load_state_dict(profesor.bert.pooler.state_dict())
+    estudiante.classifier.load_state_dict(profesor.classifier.state_dict())
+    
+    indices = [round(i * (total - 1) / (capas - 1)) for i in range(capas)] if capas > 1 else [total - 1]
+    for destino, origen in enumerate(indices):
+        estudiante.bert.encoder.layer[destino].load_state_dict(profesor.bert.encoder.layer[origen].state_dict())
+    
+    print(f"Estudiante con capas {indices} del profesor y {config.vocab_size} tokens: "
+          f"{sum(p.numel() for p in estudiante.parameters()) / 1e6:.1f}M parámetros, "
+          f"{estudiante.bert.embeddings.word_embeddings.weight.numel() / 1e6:.1f}M en los embeddings "
+          f"(profesor {sum(p.numel() for p in profesor.parameters()) / 1e6:.1f}M)")
+    return estudiante
+
+def destilar_modelo(ejemplos=None, capas=4, epochs=10, temperatura=2.0, alpha=0.7,
+                    ruta_profesor=RUTA_MODELO, ruta_salida=RUTA_ESTUDIANTE, reducir_vocabulario=True):
+    """
+    Entrena un modelo pequeño (estudiante) imitando al modelo ya ajustado (profesor)
+    
+    La pérdida combina la divergencia KL con las probabilidades suavizadas
+    (temperatura) del profesor y la entropía cruzada con la intención etiquetada.
+    El resultado se guarda en `ruta_salida` y se puede cargar con
+    BERTProcessor(model_path=ruta_salida).
+    
+    Con reducir_vocabulario, el estudiante solo conserva los tokens de los
+    ejemplos y de los nombres de la base (textos_dominio); las palabras de
+    una consulta que no estén entre ellos se leen como [UNK].
+    
+    Args:
+        ejemplos: Lista de diccionarios con 'texto' e 'intencion'
+        capas: Número de capas del encoder del estudiante
+        epochs: Número de épocas de entrenamiento
+        temperatura: Temperatura para suavizar las distribuciones
+        alpha: Peso de la pérdida de destilación frente a la de las etiquetas
+        ruta_profesor: Pesos del modelo ajustado
+        ruta_salida: Archivo donde se guarda el estudiante
+        reducir_vocabulario: Conservar solo los tokens del dominio
+    """
+    if ejemplos is None:
+        ejemplos = crear_ejemplos_adicionales()
+    
+    profesor = BERTProcessor(model_path=ruta_profesor, backend="pytorch")
+    device = profesor.device
+    
+    textos = [ejemplo['texto'] for ejemplo in ejemplos]
+    etiquetas = torch.tensor([profesor.intent_labels.index(ejemplo['intencion']) for ejemplo in ejemplos])
+    encodings = profesor.tokenizer(textos, padding=True, truncation=True, max_length=128, return_tensors="pt")
+    
+    # Logits del profesor, calculados una sola vez
+    with torch.no_grad():
+        logits_profesor = profesor.model(**{k: v.to(device) for k, v in encodings.items()}).logits
+    
+    vocabulario = vocabulario_corpus(profesor.tokenizer, textos + textos_dominio()) if reducir_vocabulario else None
+    if vocabulario is not None:
+        # El estudiante lee los mismos textos con los ids de su vocabulario
+        encodings_estudiante = dict(encodings, input_ids=mapa_tokens(
+            vocabulario, len(profesor.tokenizer), profesor.tokenizer.unk_token_id)[encodings["input_ids"]])
+    else:
+        encodings_estudiante = encodings
+    
+    estudiante = crear_estudiante(profesor.model, capas, vocabulario).to(device)
+    estudiante.train()
+    optimizer = torch.optim.AdamW(estudiante.parameters(), lr=5e-5)
+    kl = torch.nn.KLDivLoss(reduction="batchmean")
+    
+    print(f"Destilando en {len(ejemplos)} ejemplos durante {epochs} épocas...")
+    inicio = time.perf_counter()
+    for epoch in range(epochs):
+        total_loss = 0
+        orden = torch.randperm(len(ejemplos))
+        lotes = orden.split(8)
+        for indices in lotes:
+            optimizer.zero_grad()
+            
+            batch = {k: v[indices].to(device) for k, v in encodings_estudiante.items()}
+            logits = estudiante(**batch).logits
+            
+            perdida_destilacion = kl(
+                torch.log_softmax(logits / temperatura, dim=1),
+                torch.softmax(logits_profesor[indices.to(device)] / temperatura, dim=1)
+            ) * temperatura ** 2
+            perdida_etiquetas = torch.nn.functional.cross_entropy(logits, etiquetas[indices].to(device))
+            loss = alpha * perdida_destilacion + (1 - alpha) * perdida_etiquetas
+            total_loss += loss.item()
+            
+            loss.backward()
+            optimizer.step()
+        
+        print(f"Epoch {epoch+1}/{epochs} - Avg. Loss: {total_loss / len(lotes):.4f}")
+    
+    estudiante.eval()
+    guardar_modelo(estudiante.to("cpu"), ruta_salida, destilado=True, metadatos={
+        "etiquetas": profesor.intent_labels,
+        "vocabulario": vocabulario,
+        "entrenamiento": {
+            "ejemplos": len(ejemplos),
+            "epochs": epochs,
+            "perdida": total_loss / len(lotes),
+            "segundos": time.perf_counter() - inicio,
+            "profesor": ruta_profesor,
+            "temperatura": temperatura,
+            "alpha": alpha
+        }
+    })
+    print(f"Modelo destilado guardado como: {ruta_salida}")
+    
+    return estudiante
+
 def evaluar_modelo(agente, consultas_prueba):
     """
     Evalúa el rendimiento del modelo con consultas de prueba
@@ -160,6 +381,12 @@ if __name__ == "__main__":
         # Evaluar el modelo
         evaluar_modelo(agente, consultas_prueba)
         
+        # Destilar un modelo pequeño a partir del recién entrenado
+        destilar = input("¿Deseas destilar un modelo pequeño a partir del entrenado? (s/n): ")
+        if destilar.lower() in ['s', 'si', 'sí', 'y', 'yes']:
+            destilar_modelo(ejemplos=ejemplos)
+            print(f"Para usarlo, define BERT_MODEL_PATH=./{RUTA_ESTUDIANTE}")
+        
         # Iniciar chat interactivo
         iniciar_chat = input("¿Deseas iniciar un chat interactivo con el agente? (s/n): ")
         if iniciar_chat.lower() in ['s', 'si', 'sí', 'y', 'yes']:
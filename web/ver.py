@@ -1,5 +1,23 @@
-import torch
+import sys
+from formato_modelo import es_safetensors, leer_cabecera
 
-archivo = "mundiales_bert_model.pt"  # Reemplázalo con tu archivo
-modelo = torch.load(archivo, map_location=torch.device("cpu"))
-print(modelo)
\ No newline at end of file
+archivo = sys.argv[1] if len(sys.argv) > 1 else "mundiales_bert_model.safetensors"  # Reemplázalo con tu archivo
+
+if es_safetensors(archivo):
+    # Solo se lee la cabecera: ni se cargan los pesos ni hace falta torch
+    metadatos, tensores, _ = leer_cabecera(archivo)
+    config = metadatos.pop("config", {})
+    for clave, valor in metadatos.items():
+        print(f"{clave}: {valor}")
+    print(f"capas: {config.get('num_hidden_layers')}, tamaño oculto: {config.get('hidden_size')}")
+    
+    total = 0
+    for nombre, info in tensores.items():
+        print(f"  {nombre}: {info['dtype']} {info['shape']}")
+        desde, hasta = info["data_offsets"]
+        total += hasta - desde
+    print(f"{len(tensores)} tensores, {total / 2 ** 20:.1f} MB")
+else:
+    import torch
+    modelo = torch.load(archivo, map_location=torch.device("cpu"), mmap=True, weights_only=True)
+    print(modelo)